@@ -0,0 +1,98 @@
+# Asset pack builder. Writes every file under assets/ into one pack the game memory-maps,
+# so a release build opens a single file instead of dozens of loose ones. PNG images are
+# stored decoded, the rest byte for byte. The freezer scripts build the pack before bundling;
+# during development the game reads the loose files while there is no pack.
+#     python assetpack.py [--verify]
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # no window needed to decode the images
+
+import argparse
+import zlib
+import pygame
+import settings
+import assets
+
+# files the game never loads; the freezers read the build icons straight from assets/
+SKIPPED_EXTENSIONS = (".icns", ".ico", ".txt")
+
+
+def collect_files(root: str = "assets") -> list[str]:
+    """Returns the paths of every file under root that goes into the pack, in a stable order."""
+    paths = []
+    for directory, directory_names, file_names in os.walk(root):
+        directory_names.sort()
+        for file_name in sorted(file_names):
+            if not file_name.endswith(SKIPPED_EXTENSIONS):
+                paths.append(os.path.join(directory, file_name))
+    return paths
+
+
+def encode(path: str) -> tuple:
+    """Returns the (type, data) pack entry of the file at path."""
+    if path.endswith(".png"):
+        image = pygame.image.load(path)
+        pixel_format = "RGBA" if image.get_flags() & pygame.SRCALPHA else "RGB"
+        header = assets.PACK_IMAGE.pack(image.get_width(), image.get_height(), len(pixel_format))
+        return assets.IMAGE, header + pygame.image.tobytes(image, pixel_format)
+    with open(path, "rb") as f:
+        return assets.FILE, f.read()
+
+
+def build(path: str = os.path.join(assets.DIRECTORY, settings.ASSET_PACK_PATH), root: str = "assets") -> int:
+    """
+    Writes the pack of every asset under root to path and returns its size in bytes.
+
+    Parameters:
+    path (str): the pack file to write.
+    root (str): the asset directory.
+    """
+    entries = [(assets.pack_name(file_path),) + encode(file_path) for file_path in collect_files(root)]
+    if assets.pack is not None and os.path.abspath(assets.pack.path) == os.path.abspath(path):
+        # the pack being replaced was mapped when assets was imported
+        assets.pack.close()
+        assets.pack = None
+
+    index_size = assets.PACK_HEADER.size + sum(assets.PACK_ENTRY.size + len(name.encode()) for name, _, _ in entries)
+    index = bytearray(assets.PACK_HEADER.pack(assets.PACK_MAGIC, assets.PACK_VERSION, len(entries)))
+    body = bytearray()
+    offset = index_size
+    for name, entry_type, data in entries:
+        padding = -offset % assets.PACK_ALIGNMENT
+        body += bytes(padding)
+        offset += padding
+        encoded = name.encode()
+        index += assets.PACK_ENTRY.pack(len(encoded), offset, len(data), entry_type, zlib.crc32(data)) + encoded
+        body += data
+        offset += len(data)
+
+    with open(path, "wb") as f:
+        f.write(index)
+        f.write(body)
+    return offset
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds the memory-mapped asset pack used by release builds.")
+    parser.add_argument("--output", default=os.path.join(assets.DIRECTORY, settings.ASSET_PACK_PATH),
+                        help="the pack file to write")
+    parser.add_argument("--verify", action="store_true", help="check every entry's checksum after writing")
+    arguments = parser.parse_args()
+
+    # asset paths are relative to the repository root
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    pygame.init()
+    size = build(arguments.output)
+    pack = assets.AssetPack(arguments.output)
+    print("packed {} assets into {} ({} bytes)".format(len(pack.entries), arguments.output, size))
+    if arguments.verify:
+        corrupt = pack.verify()
+        if corrupt:
+            raise SystemExit("checksum mismatch: {}".format(", ".join(corrupt)))
+        print("all checksums match")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+import pygame
+import pygame.freetype
+import settings
+import json
+import logging
+import collections
+import struct
+import io
+import os
+import sys
+import mmap
+import zlib
+
+log = logging.getLogger(__name__)
+
+# directory of the game's data files, so they are found whatever the working directory is; frozen
+# builds keep the modules in an archive and the data files in the app bundle's resources (py2app)
+# or next to the executable (cx_Freeze)
+if getattr(sys, "frozen", False):
+    DIRECTORY = os.environ.get("RESOURCEPATH", os.path.dirname(sys.executable))
+else:
+    DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+class AssetCache:
+    """A keyed, reference-counted cache for assets loaded from disk."""
+
+    def __init__(self, limit: int = settings.ASSET_CACHE_LIMIT):
+        """
+        Initializes the AssetCache object.
+
+        Parameters:
+        limit (int): the maximum number of unreferenced assets kept in memory.
+        """
+        self.limit = limit
+        self.entries = {}
+        self.ref_counts = {}
+        # unreferenced assets, ordered from least to most recently released
+        self.unused = collections.OrderedDict()
+
+    def acquire(self, key: tuple, loader) -> object:
+        """
+        Returns the asset stored under key, loading it with loader if it is not cached.
+
+        Parameters:
+        key (tuple): a hashable key uniquely identifying the asset.
+        loader (callable): a function with no parameters that loads the asset.
+        """
+        if key not in self.entries:
+            self.entries[key] = loader()
+            self.ref_counts[key] = 0
+        self.ref_counts[key] += 1
+        self.unused.pop(key, None)
+        return self.entries[key]
+
+    def release(self, key: tuple) -> None:
+        """
+        Drops a reference to the asset stored under key.
+
+        Parameters:
+        key (tuple): the key that was passed to acquire().
+        """
+        if key not in self.entries:
+            return
+        self.ref_counts[key] -= 1
+        if self.ref_counts[key] <= 0:
+            self.ref_counts[key] = 0
+            self.unused[key] = True
+            self.evict()
+
+    def evict(self) -> None:
+        """Deletes least recently used unreferenced assets until the limit is respected."""
+        while len(self.unused) > self.limit:
+            key, _ = self.unused.popitem(last=False)
+            del self.entries[key]
+            del self.ref_counts[key]
+
+    def clear(self) -> None:
+        """Deletes every cached asset, e.g. when pygame is shut down."""
+        self.entries.clear()
+        self.ref_counts.clear()
+        self.unused.clear()
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+# process-wide cache shared by every game round
+cache = AssetCache()
+
+# asset pack file layout (little endian), written by assetpack.py:
+#   header: magic, format version, entry count
+#   entries: name length, offset, length, type, crc32 of the data, then the UTF-8 name
+#   the data of every entry, each starting on a PACK_ALIGNMENT byte boundary
+# images are stored decoded so they load without decompression: width, height and
+# bytes per pixel (PACK_IMAGE) followed by the RGB or RGBA pixels
+PACK_MAGIC = b"GMPK"
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct("<4sBI")
+PACK_ENTRY = struct.Struct("<BQIBI")
+PACK_IMAGE = struct.Struct("<HHB")
+PACK_ALIGNMENT = 16
+FILE = 0  # the file's bytes as they are on disk
+IMAGE = 1  # decoded pixels
+
+
+class BufferReader(io.RawIOBase):
+    """A read-only file object over a buffer, so loaders can stream from memory without copying it."""
+
+    def __init__(self, buffer: memoryview):
+        super().__init__()
+        self.buffer = buffer
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        data = self.buffer[self.position:self.position + len(b)]
+        b[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += len(self.buffer)
+        self.position = max(0, offset)
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+
+class AssetPack:
+    """A single-file asset pack that is memory-mapped and read through zero-copy buffers."""
+
+    def __init__(self, path: str):
+        """
+        Initializes the AssetPack object by mapping the pack and reading its index.
+
+        Parameters:
+        path (str): path to the pack written by assetpack.py.
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mapping)
+        magic, version, entry_count = PACK_HEADER.unpack_from(self.view)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError("{} is not a version {} asset pack".format(path, PACK_VERSION))
+
+        self.entries = {}  # name -> (offset, length, type, crc32)
+        offset = PACK_HEADER.size
+        for _ in range(entry_count):
+            name_length, data_offset, length, entry_type, checksum = PACK_ENTRY.unpack_from(self.view, offset)
+            offset += PACK_ENTRY.size
+            name = bytes(self.view[offset:offset + name_length]).decode()
+            offset += name_length
+            self.entries[name] = (data_offset, length, entry_type, checksum)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def buffer(self, name: str) -> memoryview:
+        """Returns the stored data of the entry called name without copying it."""
+        offset, length, entry_type, checksum = self.entries[name]
+        return self.view[offset:offset + length]
+
+    def open(self, name: str) -> BufferReader:
+        """Returns a file object reading the entry called name straight from the mapping."""
+        return BufferReader(self.buffer(name))
+
+    def image(self, name: str) -> pygame.Surface:
+        """Returns a surface whose pixels are the mapped pixels of the image called name."""
+        data = self.buffer(name)
+        width, height, pixel_size = PACK_IMAGE.unpack_from(data)
+        pixels = data[PACK_IMAGE.size:]
+        return pygame.image.frombuffer(pixels, (width, height), "RGBA" if pixel_size == 4 else "RGB")
+
+    def close(self) -> None:
+        """Unmaps the pack; surfaces and readers still using its buffers must be gone."""
+        self.view.release()
+        self.mapping.close()
+
+    def verify(self) -> list[str]:
+        """Returns the names of the entries whose data does not match their checksum."""
+        return [name for name, (offset, length, entry_type, checksum) in self.entries.items()
+                if zlib.crc32(self.view[offset:offset + length]) != checksum]
+
+
+def open_pack(path: str) -> AssetPack:
+    """Returns the asset pack at path, or None if there is none, e.g. during development."""
+    if not os.path.exists(path):
+        return None
+    return AssetPack(path)
+
+
+# assets are read from the pack when the game ships one, and from the loose files otherwise
+pack = open_pack(os.path.join(DIRECTORY, settings.ASSET_PACK_PATH))
+
+
+def pack_name(path: str) -> str:
+    """Returns the name of the pack entry holding the file at path."""
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def exists(path: str) -> bool:
+    """Returns True if the asset at path is in the pack or on disk."""
+    return (pack is not None and pack_name(path) in pack) or os.path.exists(path)
+
+
+def open_file(path: str):
+    """Returns a binary file object reading the asset at path, from the pack if it has it."""
+    if pack is not None and pack_name(path) in pack:
+        return pack.open(pack_name(path))
+    return open(path, "rb")
+
+
+def read_file(path: str) -> bytes:
+    """Returns the bytes of the asset at path, from the pack if it has it."""
+    with open_file(path) as f:
+        return f.read()
+
+# texture atlas file layout (little endian), written by atlas.py:
+#   header: magic, format version, entry count, PNG size
+#   entries: name length, x, y, width, height, then the UTF-8 name
+#   the PNG image holding every entry
+ATLAS_MAGIC = b"GMAT"
+ATLAS_VERSION = 1
+ATLAS_HEADER = struct.Struct("<4sBHI")
+ATLAS_ENTRY = struct.Struct("<B4H")
+
+
+class Atlas:
+    """A texture atlas handing out subsurfaces of one display-ready surface."""
+
+    def __init__(self, surface: pygame.Surface, rects: dict[str, pygame.Rect]):
+        """
+        Initializes the Atlas object.
+
+        Parameters:
+        surface (pygame.Surface): the packed image.
+        rects (dict[str, pygame.Rect]): the location of every entry in surface, by name.
+        """
+        self.surface = surface
+        self.rects = rects
+
+    def image(self, name: str) -> pygame.Surface:
+        """Returns the entry called name as a subsurface sharing the atlas' pixels."""
+        return self.surface.subsurface(self.rects[name])
+
+    def frames(self, color: str, animation_name: str) -> list[pygame.Surface]:
+        """Returns the frames of a player animation, or an empty list if the atlas does not have it."""
+        frames = []
+        while True:
+            name = frame_name(color, animation_name, len(frames))
+            if name not in self.rects:
+                return frames
+            frames.append(self.image(name))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.rects
+
+
+def frame_name(color: str, animation_name: str, index: int) -> str:
+    """Returns the atlas entry name of a player animation frame."""
+    return "player/{}/{}/{}".format(color, animation_name, index)
+
+
+class AssetGroup:
+    """Keeps track of the assets acquired by one owner so they can be released together."""
+
+    def __init__(self, asset_cache: AssetCache = cache):
+        """
+        Initializes the AssetGroup object.
+
+        Parameters:
+        asset_cache (AssetCache): the cache assets are acquired from.
+        """
+        self.cache = asset_cache
+        self.keys = []
+
+    def acquire(self, key: tuple, loader) -> object:
+        """Acquires an asset from the cache and remembers its key."""
+        self.keys.append(key)
+        return self.cache.acquire(key, loader)
+
+    def release_all(self) -> None:
+        """Releases every asset acquired through this group."""
+        for key in self.keys:
+            self.cache.release(key)
+        self.keys = []
+
+    def image(self, path: str, alpha: bool = False) -> pygame.Surface:
+        """Returns the converted image located at path."""
+        return self.acquire(("image", path, alpha), lambda: load_image(path, alpha))
+
+    def sound(self, path: str) -> pygame.mixer.Sound:
+        """Returns the sound located at path."""
+        return self.acquire(("sound", path), lambda: load_sound(path))
+
+    def font(self, path: str, size: int) -> pygame.freetype.Font:
+        """Returns the font located at path with the given size."""
+        return self.acquire(("font", path, size), lambda: load_font(path, size))
+
+    def frame_rects(self, path: str) -> list[pygame.Rect]:
+        """Returns the frame rects described by the sprite sheet json file at path."""
+        return self.acquire(("frame_rects", path), lambda: load_frame_rects(path))
+
+    def atlas(self, path: str) -> Atlas:
+        """Returns the texture atlas built by atlas.py at path."""
+        return self.acquire(("atlas", path), lambda: load_atlas(path))
+
+
+# assets decoded ahead of time by preload.Preloader, as key -> concurrent.futures.Future;
+# decoding needs no display, so it can run while the launcher is open
+preloaded = {}
+
+
+def take_preloaded(key: tuple) -> object:
+    """
+    Returns the asset preloaded under key, waiting for it if it is being decoded, or None if the caller has to decode it.
+
+    Parameters:
+    key (tuple): the key of the decoded asset, e.g. ("image", path).
+    """
+    future = preloaded.pop(key, None)
+    if future is None or future.cancel():
+        return None  # not requested, or not started yet, so the caller decodes it itself
+    try:
+        return future.result()
+    except Exception:
+        # the caller decodes it again, so a failed worker does not stop the game from starting
+        log.warning("preloading %s failed; decoding it on the main thread", key, exc_info=True)
+        return None
+
+
+def load_image(path: str, alpha: bool = False) -> pygame.Surface:
+    """
+    Loads an image from disk and converts it to the display format.
+
+    Parameters:
+    path (str): path to the image file.
+    alpha (bool): whether per-pixel transparency should be kept.
+    """
+    image = take_preloaded(("image", path))
+    if image is None:
+        image = decode_image(path)
+    if pygame.display.get_surface() is None:
+        # converting requires a display; the copy keeps mapped pack pixels read-only
+        return image.copy()
+    if alpha:
+        return image.convert_alpha()
+    return image.convert()
+
+
+def decode_image(path: str) -> pygame.Surface:
+    """Returns the image at path in its file's pixel format, reading it from the asset pack if it has it."""
+    if pack is not None and pack_name(path) in pack:
+        return pack.image(pack_name(path))
+    return pygame.image.load(path)
+
+
+def load_sound(path: str) -> pygame.mixer.Sound:
+    """Loads the sound at path, streaming it from the asset pack if it has it."""
+    sound = take_preloaded(("sound", path))
+    if sound is None:
+        sound = decode_sound(path)
+    return sound
+
+
+def decode_sound(path: str) -> pygame.mixer.Sound:
+    """Returns the sound at path, streamed from the asset pack if it has it."""
+    if pack is not None and pack_name(path) in pack:
+        return pygame.mixer.Sound(file=pack.open(pack_name(path)))
+    return pygame.mixer.Sound(path)
+
+
+def load_font(path: str, size: int) -> pygame.freetype.Font:
+    """Loads the font at path with the given size, reading it from the asset pack if it has it."""
+    font = take_preloaded(("font", path, size))
+    if font is None:
+        font = decode_font(path, size)
+    return font
+
+
+def decode_font(path: str, size: int) -> pygame.freetype.Font:
+    """Returns the font at path with the given size, read from the asset pack if it has it."""
+    if pack is not None and pack_name(path) in pack:
+        return pygame.freetype.Font(pack.open(pack_name(path)), size)
+    return pygame.freetype.Font(path, size)
+
+
+def load_frame_rects(path: str) -> list[pygame.Rect]:
+    """
+    Returns a list of pygame.Rect objects representing each individual frame of a sprite sheet.
+
+    Parameters:
+    path (str): path to json file containing spritesheet information.
+    """
+    rect_list = take_preloaded(("frame_rects", path))
+    if rect_list is None:
+        rect_list = decode_frame_rects(path)
+    return rect_list
+
+
+def decode_frame_rects(path: str) -> list[pygame.Rect]:
+    """Returns the frame rects described by the sprite sheet json file at path."""
+    with open_file(path) as f:
+        data = json.load(f)
+
+    rect_list = []
+    for frame in data["frames"].values():
+        dimensions = frame["frame"]
+        x, y, w, h = dimensions["x"], dimensions["y"], dimensions["w"], dimensions["h"]
+        rect_list.append(pygame.Rect(x, y, w, h))
+
+    return rect_list
+
+
+def load_atlas(path: str) -> Atlas:
+    """
+    Loads a texture atlas and its index with a single read and converts it to the display format.
+
+    Parameters:
+    path (str): path to the atlas file written by atlas.py.
+    """
+    atlas = take_preloaded(("atlas", path))
+    if atlas is None:
+        atlas = decode_atlas(path)
+    if pygame.display.get_surface() is not None:
+        atlas.surface = atlas.surface.convert_alpha()
+    return atlas
+
+
+def decode_atlas(path: str) -> Atlas:
+    """Returns the texture atlas at path with its image in the file's pixel format."""
+    data = read_file(path)
+    magic, version, entry_count, image_size = ATLAS_HEADER.unpack_from(data)
+    if magic != ATLAS_MAGIC or version != ATLAS_VERSION:
+        raise ValueError("{} is not a version {} atlas".format(path, ATLAS_VERSION))
+
+    rects = {}
+    offset = ATLAS_HEADER.size
+    for _ in range(entry_count):
+        name_length, x, y, w, h = ATLAS_ENTRY.unpack_from(data, offset)
+        offset += ATLAS_ENTRY.size
+        rects[data[offset:offset + name_length].decode()] = pygame.Rect(x, y, w, h)
+        offset += name_length
+
+    surface = pygame.image.load(io.BytesIO(data[offset:offset + image_size]), "atlas.png")
+    return Atlas(surface, rects)
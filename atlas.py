@@ -0,0 +1,128 @@
+# Offline texture atlas builder. Packs every player colour's animation frames, the bullet,
+# the muzzle flash and the platform tile into one image with a binary index, so the game
+# loads them with a single file read instead of one PNG and JSON file per animation.
+# The atlas is a build artifact: the freezer scripts build it before the asset pack, and
+# during development the game loads the separate images unless it is built by hand, and
+# rebuilt whenever an image in assets/ changes:
+#     python atlas.py
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # no window needed to build the atlas
+
+import argparse
+import io
+import pygame
+import settings
+import assets
+
+ANIMATIONS = ("idle", "run", "jump")
+ATLAS_WIDTH = 1024
+
+
+def get_player_colors() -> list[str]:
+    """Returns the player colours that have a directory of sprite sheets."""
+    return sorted(name for name in os.listdir("assets/player") if os.path.isdir(os.path.join("assets/player", name)))
+
+
+def bake_colorkey(image: pygame.Surface) -> pygame.Surface:
+    """
+    Returns the frame as the game used to draw it, black keyed out, with per-pixel alpha.
+
+    Parameters:
+    image (pygame.Surface): a frame cut from a sprite sheet.
+    """
+    keyed = pygame.Surface(image.get_size())
+    keyed.blit(image, (0, 0))  # transparent pixels become black
+    keyed.set_colorkey((0, 0, 0))
+    baked = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+    baked.blit(keyed, (0, 0))
+    return baked
+
+
+def bake_opaque(image: pygame.Surface) -> pygame.Surface:
+    """Returns the image with its alpha channel dropped, as pygame.Surface.convert() does."""
+    opaque = image.copy()
+    opaque.fill((0, 0, 0, 255), special_flags=pygame.BLEND_RGBA_MAX)
+    return opaque
+
+
+def collect_images() -> dict[str, pygame.Surface]:
+    """Returns every image packed into the atlas by entry name."""
+    images = {}
+    for color in get_player_colors():
+        for animation_name in ANIMATIONS:
+            sheet = pygame.image.load("assets/player/{}/{}.png".format(color, animation_name))
+            rects = assets.load_frame_rects("assets/player/{}.json".format(animation_name))
+            for index, rect in enumerate(rects):
+                images[assets.frame_name(color, animation_name, index)] = bake_colorkey(sheet.subsurface(rect))
+    images["bullet"] = bake_opaque(pygame.image.load("assets/bullet/bullet.png"))
+    images["platform"] = bake_opaque(pygame.image.load("assets/platform/platform.png"))
+    images["muzzle_flash"] = pygame.image.load("assets/misc/muzzle_flash.png")
+    return images
+
+
+def pack(sizes: dict[str, tuple], width: int = ATLAS_WIDTH) -> tuple:
+    """
+    Places rectangles on shelves, tallest first, and returns (rects by name, atlas height).
+
+    Parameters:
+    sizes (dict[str, tuple]): the (width, height) of every entry.
+    width (int): the width of the atlas.
+    """
+    rects = {}
+    x = y = shelf_height = 0
+    for name in sorted(sizes, key=lambda name: (-sizes[name][1], name)):
+        w, h = sizes[name]
+        if x + w > width:
+            x, y = 0, y + shelf_height
+            shelf_height = 0
+        rects[name] = pygame.Rect(x, y, w, h)
+        x += w
+        shelf_height = max(shelf_height, h)
+    return rects, y + shelf_height
+
+
+def build(path: str = settings.ATLAS_PATH) -> assets.Atlas:
+    """
+    Packs the images into an atlas, writes it with its index to path and returns it.
+
+    Parameters:
+    path (str): the file to write.
+    """
+    images = collect_images()
+    rects, height = pack({name: image.get_size() for name, image in images.items()})
+    surface = pygame.Surface((ATLAS_WIDTH, height), pygame.SRCALPHA)
+    for name, image in images.items():
+        surface.blit(image, rects[name], special_flags=pygame.BLEND_RGBA_MAX)  # copy pixels, alpha included
+
+    image_file = io.BytesIO()
+    pygame.image.save(surface, image_file, "atlas.png")
+    image_data = image_file.getvalue()
+
+    data = bytearray(assets.ATLAS_HEADER.pack(assets.ATLAS_MAGIC, assets.ATLAS_VERSION, len(rects), len(image_data)))
+    for name, rect in rects.items():
+        encoded = name.encode()
+        data += assets.ATLAS_ENTRY.pack(len(encoded), *rect) + encoded
+    data += image_data
+    with open(path, "wb") as f:
+        f.write(data)
+    return assets.Atlas(surface, rects)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds the texture atlas loaded by the game.")
+    parser.add_argument("--output", default=settings.ATLAS_PATH, help="the atlas file to write")
+    arguments = parser.parse_args()
+
+    # asset paths are relative to the repository root
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    pygame.init()
+    atlas = build(arguments.output)
+    print("packed {} images into a {}x{} atlas at {} ({} bytes)".format(
+        len(atlas.rects), *atlas.surface.get_size(), arguments.output, os.path.getsize(arguments.output)))
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import pygame
+import settings
+import assets
+
+# sound effects play on a fixed pool of mixer channels; every effect has a voice limit,
+# a priority used to steal channels when the pool is full, and a cooldown that drops
+# repeats of an effect by the same player too close together. Long sounds are streamed as music.
+
+
+def init_mixer() -> None:
+    """
+    Opens the audio device in the format every sound is converted to when it is loaded.
+
+    Must run before pygame.init(), which otherwise opens the device in the default format first.
+    """
+    # pygame.init() after a pygame.quit() reopens the device with these settings too
+    pygame.mixer.pre_init(settings.AUDIO_FREQUENCY, -16, 2, settings.AUDIO_BUFFER)
+    if pygame.mixer.get_init() is None:
+        pygame.mixer.init()
+    pygame.mixer.set_num_channels(settings.AUDIO_CHANNELS)
+
+
+def play_music(path: str, volume: float, loops: int = -1) -> None:
+    """
+    Streams a long sound from disk, or from the asset pack, instead of decoding it into memory.
+
+    Parameters:
+    path (str): path to the sound file.
+    volume (float): the volume from 0 to 1.
+    loops (int): the number of repeats; -1 repeats forever.
+    """
+    if assets.pack is not None and assets.pack_name(path) in assets.pack:
+        pygame.mixer.music.load(assets.pack.open(assets.pack_name(path)), path)
+    else:
+        pygame.mixer.music.load(path)
+    pygame.mixer.music.set_volume(volume)
+    pygame.mixer.music.play(loops)
+
+
+class SoundMixer:
+    """Plays sound effects on a fixed channel pool with per-effect voice limits, priorities and cooldowns."""
+
+    def __init__(self, sounds: dict[str, pygame.mixer.Sound], limits: dict[str, tuple] = settings.SFX_LIMITS,
+                 channel_count: int = settings.AUDIO_CHANNELS) -> None:
+        """
+        Initializes the SoundMixer object.
+
+        Parameters:
+        sounds (dict[str, pygame.mixer.Sound]): the sound of every effect by name.
+        limits (dict[str, tuple]): the (voices, priority, cooldown in ms) of every effect by name.
+        channel_count (int): the number of mixer channels in the pool.
+        """
+        self.sounds = sounds
+        self.limits = limits
+        self.channels = [pygame.mixer.Channel(index) for index in range(channel_count)]
+        # effect name and start time of the last sound played on each channel
+        self.voices = [(None, 0)] * channel_count
+        self.last_played = {}  # (effect name, source) -> start time
+        self.played_count = 0
+        self.stolen_count = 0
+        self.dropped_count = 0
+
+    def play(self, name: str, source: int = None, now: int = None) -> pygame.mixer.Channel:
+        """
+        Plays the effect called name and returns its channel, or None if it was dropped.
+
+        Parameters:
+        name (str): the name of the effect, e.g. "shoot".
+        source (int): what made the sound, e.g. a player index; cooldowns apply per effect and source.
+        now (int): the current time in milliseconds; defaults to pygame.time.get_ticks().
+        """
+        sound = self.sounds.get(name)
+        if sound is None:
+            return None
+        if now is None:
+            now = pygame.time.get_ticks()
+        voice_limit, priority, cooldown = self.limits.get(name, settings.SFX_DEFAULT_LIMIT)
+        if now - self.last_played.get((name, source), -cooldown) < cooldown:
+            self.dropped_count += 1
+            return None
+
+        index = self.find_channel(name, voice_limit, priority)
+        if index is None:
+            self.dropped_count += 1
+            return None
+        channel = self.channels[index]
+        if channel.get_busy():
+            self.stolen_count += 1
+        channel.play(sound)
+        self.voices[index] = (name, now)
+        self.last_played[(name, source)] = now
+        self.played_count += 1
+        return channel
+
+    def find_channel(self, name: str, voice_limit: int, priority: int) -> int:
+        """
+        Returns the index of the channel a new voice of an effect plays on, or None if it should be dropped.
+
+        A full effect replaces its own oldest voice. Otherwise a free channel is used,
+        or the oldest voice of the lowest priority effect below this one is stolen.
+        """
+        own_voices = []
+        free = None
+        victim = None
+        victim_key = None
+        for index, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                if free is None:
+                    free = index
+                continue
+            voice_name, start = self.voices[index]
+            if voice_name == name:
+                own_voices.append((start, index))
+            voice_priority = self.limits.get(voice_name, settings.SFX_DEFAULT_LIMIT)[1]
+            if voice_priority < priority and (victim_key is None or (voice_priority, start) < victim_key):
+                victim, victim_key = index, (voice_priority, start)
+
+        if len(own_voices) >= voice_limit:
+            return min(own_voices)[1]
+        if free is not None:
+            return free
+        return victim
+
+    def stop(self) -> None:
+        """Stops every effect."""
+        for channel in self.channels:
+            channel.stop()
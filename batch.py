@@ -0,0 +1,397 @@
+import numpy as np  # uses NumPy for vectorized simulation
+import settings
+import simulation
+import hitmasks
+
+# the batch simulation advances many independent matches at once with the movement,
+# recoil, knockback and animation rules of simulation.Simulation, but without sound
+# events. Players collide as the bounding box of their current frame's opaque pixels
+# instead of the pixels themselves, so contacts that touch the box but miss the
+# silhouette (a bullet over the shoulder, a platform edge under the gun) still count
+
+PLAYER_DTYPE = np.dtype([
+    ("x", np.float64),
+    ("y", np.float64),
+    ("prev_x", np.float64),  # position at the start of the tick, for swept collisions
+    ("prev_y", np.float64),
+    ("vel_x", np.float64),
+    ("vel_y", np.float64),
+    ("acc_x", np.float64),
+    ("acc_y", np.float64),
+    ("direction", np.int8),  # -1 for left, 1 for right
+    ("animation_tick", np.int16),
+    ("idle_index", np.int8),  # indices of the next frames of the looping animations
+    ("run_index", np.int8),
+    ("frame", np.int16),  # id of the current animation frame, see frame_boxes()
+    ("shooting", np.bool_),  # shot since the frame last changed
+    ("standing", np.bool_),
+    ("falling", np.bool_),
+    ("respawn_count", np.int32),
+    ("hit_count", np.int32)  # number of times the player was hit by an opponent
+])
+
+BULLET_DTYPE = np.dtype([
+    ("x", np.float64),
+    ("y", np.float64),
+    ("prev_x", np.float64),  # x at the start of the tick, for swept collisions
+    ("vel_x", np.float64),
+    ("author", np.int8),
+    ("order", np.int64),  # firing order, so hits resolve oldest bullet first like the scalar simulation
+    ("alive", np.bool_)
+])
+
+# indices of the animations in simulation.ANIMATIONS, the first axis of the frame ids
+IDLE, RUN, JUMP = (simulation.ANIMATIONS.index(name) for name in ("idle", "run", "jump"))
+
+# settings that can be overridden per match, mapped to their defaults
+PARAMETERS = {
+    "gun_recoil": settings.GUN_RECOIL,
+    "knockback_multiplier": settings.KNOCKBACK_MULTIPLIER,
+    "player_friction": settings.PLAYER_FRICTION,
+    "player_jump_height": settings.PLAYER_JUMP_HEIGHT
+}
+
+
+def direction_sign(direction: str) -> int:
+    """Returns -1 for "left" and 1 for "right"."""
+    return -1 if direction == "left" else 1
+
+
+def frame_boxes() -> tuple:
+    """
+    Returns (ids, left, top, right, bottom) for the player frames of hitmasks.get_masks().
+
+    ids maps (animation index, frame index, facing left, shooting) to a frame id, shaped
+    (animations, frames, 2, 2), and the other arrays hold the edges of the opaque pixels of
+    every frame relative to the player's position, indexed by frame id.
+    """
+    masks = hitmasks.get_masks()
+    frame_count = max(index for _, index, _, _ in masks) + 1
+    ids = np.zeros((len(simulation.ANIMATIONS), frame_count, 2, 2), dtype=np.int16)
+    edges = np.zeros((4, len(masks)))
+    for frame_id, key in enumerate(sorted(masks)):
+        name, index, facing_left, shooting = key
+        ids[simulation.ANIMATIONS.index(name), index, int(facing_left), int(shooting)] = frame_id
+        mask = masks[key]
+        edges[:, frame_id] = mask.left, mask.top, mask.right, mask.bottom
+    return (ids, *edges)
+
+
+def sweep(x, y, dx, dy, left, top, right, bottom) -> np.ndarray:
+    """
+    Vectorized collision.sweep against boxes that are already expanded by the moving box's half size.
+
+    Returns the time of impact of every element, or infinity where the boxes never touch.
+    """
+    t_enter = np.zeros(np.broadcast(x, dx, left).shape)
+    t_exit = np.ones_like(t_enter)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for position, delta, low, high in ((x, dx, left, right), (y, dy, top, bottom)):
+            moving = delta != 0
+            inside = (low < position) & (position < high)
+            t_low = (low - position) / delta
+            t_high = (high - position) / delta
+            first = np.where(moving, np.minimum(t_low, t_high), np.where(inside, -np.inf, np.inf))
+            last = np.where(moving, np.maximum(t_low, t_high), np.where(inside, np.inf, -np.inf))
+            t_enter = np.maximum(t_enter, first)
+            t_exit = np.minimum(t_exit, last)
+    return np.where(t_enter < t_exit, t_enter, np.inf)
+
+
+class BatchSimulation:
+    """
+    A vectorized simulation of many concurrent matches.
+
+    Players follow the same frames as in simulation.Simulation, but collide as the bounding
+    box of each frame rather than its pixels, so a match drifts from the scalar simulation
+    once a bullet or platform touches a frame's box without touching its silhouette; until
+    then the two agree exactly.
+    """
+
+    def __init__(self, match_count: int, spawns: list[tuple] = None, platform_list: list[tuple] = None,
+                 bullet_pool_size: int = settings.BULLET_POOL_SIZE, **parameters) -> None:
+        """
+        Initializes the BatchSimulation object.
+
+        Parameters:
+        match_count (int): the number of matches simulated at once.
+        spawns (list[tuple]): a (spawn_point, direction) tuple for every player.
+        platform_list (list[tuple]): a (coordinates, tile_count) tuple for every platform.
+        bullet_pool_size (int): the maximum number of live bullets per match; shots fired
+            while the pool is full produce no bullet.
+        parameters: per-match overrides of PARAMETERS, either scalars or arrays of length match_count.
+        """
+        if spawns is None:
+            spawns = [
+                (settings.PLAYER_1_SPAWN_POINT, settings.PLAYER_1_SPAWN_DIRECTION),
+                (settings.PLAYER_2_SPAWN_POINT, settings.PLAYER_2_SPAWN_DIRECTION)
+            ]
+        if platform_list is None:
+            platform_list = settings.PLATFORM_LIST
+
+        unknown = set(parameters) - set(PARAMETERS)
+        if unknown:
+            raise TypeError("unknown parameters: {}".format(", ".join(sorted(unknown))))
+
+        self.match_count = match_count
+        self.player_count = len(spawns)
+        self.tick = 0
+
+        # per-match settings, shaped (matches, 1) so they broadcast over players
+        for name, default in PARAMETERS.items():
+            value = np.broadcast_to(
+                np.asarray(parameters.get(name, default), dtype=np.float64), (match_count,))
+            setattr(self, name, value.reshape(match_count, 1).copy())
+
+        self.spawn_x = np.array([point[0] for point, _ in spawns], dtype=np.float64)
+        self.spawn_y = np.array([point[1] for point, _ in spawns], dtype=np.float64)
+        self.spawn_direction = np.array([direction_sign(direction) for _, direction in spawns], dtype=np.int8)
+
+        # platform boxes, with the same rounding as the scalar simulation
+        boxes = [simulation.PlatformState(coordinates, tile_count).box
+                 for coordinates, tile_count in platform_list]
+        self.platform_left = np.array([box.left for box in boxes], dtype=np.float64)
+        self.platform_top = np.array([box.top for box in boxes], dtype=np.float64)
+        self.platform_right = np.array([box.right for box in boxes], dtype=np.float64)
+        self.platform_bottom = np.array([box.bottom for box in boxes], dtype=np.float64)
+
+        (self.frame_ids, self.frame_left, self.frame_top,
+         self.frame_right, self.frame_bottom) = frame_boxes()
+
+        self.players = np.zeros((match_count, self.player_count), dtype=PLAYER_DTYPE)
+        self.players["x"] = self.players["prev_x"] = self.spawn_x
+        self.players["y"] = self.players["prev_y"] = self.spawn_y
+        self.players["direction"] = self.spawn_direction
+        self.players["falling"] = True
+        # players start on the first idle frame, like PlayerState
+        self.players["idle_index"] = 1 % settings.PLAYER_IDLE_FRAMES
+        self.players["frame"] = self.frame_ids[IDLE, 0, (self.spawn_direction < 0).astype(np.intp), 0]
+
+        self.bullets = np.zeros((match_count, bullet_pool_size), dtype=BULLET_DTYPE)
+
+    def step(self, inputs: np.ndarray) -> None:
+        """
+        Advances every match by one tick.
+
+        Parameters:
+        inputs (np.ndarray): input bitfields shaped (matches, players), using the simulation.UP etc. bits.
+        """
+        inputs = np.asarray(inputs)
+        for player_index in range(self.player_count):
+            self.fire_bullets(player_index, (inputs[:, player_index] & simulation.SHOOT) != 0)
+        self.update_players(inputs)
+        self.update_bullets()
+        self.handle_collisions()
+        self.tick += 1
+
+    def fire_bullets(self, player_index: int, shooting: np.ndarray) -> None:
+        """
+        Creates bullets for one player in every match where they shot, then adds recoil.
+
+        Parameters:
+        player_index (int): the index of the player.
+        shooting (np.ndarray): boolean array shaped (matches,).
+        """
+        players = self.players[:, player_index]
+        direction = players["direction"].astype(np.float64)
+        x_vel = direction * settings.BULLET_SPEED + players["vel_x"]
+
+        # claim the first free slot of every match that shot and has one
+        free = ~self.bullets["alive"]
+        slot = np.argmax(free, axis=1)
+        matches = np.nonzero(shooting & free.any(axis=1))[0]
+        slot = slot[matches]
+        x_vel = x_vel[matches]
+
+        x_offset = np.where(x_vel < 0, -settings.BULLET_OFFSET_X, settings.BULLET_OFFSET_X)
+        y_offset = np.where(np.abs(x_vel) > settings.BULLET_SPEED,
+                            settings.BULLET_OFFSET_Y + settings.BULLET_RUNNING_OFFSET_Y,
+                            settings.BULLET_OFFSET_Y)
+        bullets = self.bullets
+        bullets["x"][matches, slot] = players["x"][matches] + x_offset
+        bullets["prev_x"][matches, slot] = bullets["x"][matches, slot]
+        bullets["y"][matches, slot] = players["y"][matches] + y_offset
+        bullets["vel_x"][matches, slot] = x_vel
+        bullets["author"][matches, slot] = player_index
+        bullets["order"][matches, slot] = self.tick * self.player_count + player_index
+        bullets["alive"][matches, slot] = True
+
+        # recoil pushes the player away from the direction they are facing
+        recoil = -direction * self.gun_recoil[:, 0]
+        self.players["vel_x"][:, player_index] += np.where(shooting, recoil, 0)
+        self.players["shooting"][:, player_index] |= shooting
+
+    def update_players(self, inputs: np.ndarray) -> None:
+        """Applies input, friction, velocity, position, animation frames and respawns to every player."""
+        players = self.players
+        standing = players["standing"]
+        players["prev_x"] = players["x"]
+        players["prev_y"] = players["y"]
+
+        # acceleration in the y is gravity
+        acc_x = np.zeros(players.shape)
+        acc_y = np.full(players.shape, settings.PLAYER_GRAVITY)
+
+        jumping = ((inputs & simulation.UP) != 0) & standing
+        players["vel_y"] = np.where(jumping, self.player_jump_height, players["vel_y"])
+        standing &= ~jumping
+
+        left = (inputs & simulation.LEFT) != 0
+        right = ((inputs & simulation.RIGHT) != 0) & ~left
+        acc_x[left] = -settings.PLAYER_ACC
+        acc_x[right] = settings.PLAYER_ACC
+        players["direction"][left] = -1
+        players["direction"][right] = 1
+
+        # model friction as proportional to player speed
+        acc_x += players["vel_x"] * self.player_friction
+
+        vel_x = players["vel_x"] + acc_x
+        vel_x[np.abs(vel_x) < 0.4] = 0  # fixes perpetual running
+        players["vel_x"] = vel_x
+        players["vel_y"] += acc_y
+
+        players["x"] += vel_x - 0.5 * acc_x
+        players["y"] += players["vel_y"] - 0.5 * acc_y
+        players["falling"] = players["vel_y"] > 0
+        players["acc_x"] = acc_x
+        players["acc_y"] = acc_y
+
+        self.update_frames()
+
+        # player dies when below certain height
+        dead = players["y"] > settings.VOID_HEIGHT
+        if dead.any():
+            players["x"] = np.where(dead, self.spawn_x, players["x"])
+            players["y"] = np.where(dead, self.spawn_y, players["y"])
+            # teleporting is not movement
+            players["prev_x"] = np.where(dead, players["x"], players["prev_x"])
+            players["prev_y"] = np.where(dead, players["y"], players["prev_y"])
+            players["direction"] = np.where(dead, self.spawn_direction, players["direction"])
+            players["vel_x"][dead] = 0
+            players["vel_y"][dead] = 0
+            players["respawn_count"] += dead
+
+    def update_frames(self) -> None:
+        """Advances the animation frame of every player like PlayerState.update_animation."""
+        players = self.players
+        standing = players["standing"]
+        # frames change every tick in the air and every n ticks on the ground
+        ticks_per_frame = settings.FPS // settings.PLAYER_ANIMATION_FPS
+        tick = players["animation_tick"]
+        airborne = ~standing
+        ground_frame = standing & (tick == 0)
+        players["animation_tick"] = np.where(standing, (tick + 1) % ticks_per_frame, tick)
+        # running if accelerating in the direction they are moving
+        running = ground_frame & (players["acc_x"] * players["vel_x"] > 0)
+        idle = ground_frame & ~running
+
+        idle_index, run_index = players["idle_index"], players["run_index"]
+        name = np.select([airborne, running], [JUMP, RUN], IDLE)
+        # the falling down image, the jumping up image, or the next frame of the looping animation
+        index = np.select([airborne, running], [np.where(players["falling"], 0, 1), run_index], idle_index)
+        players["run_index"] = np.where(running, (run_index + 1) % settings.PLAYER_RUN_FRAMES, run_index)
+        players["idle_index"] = np.where(idle, (idle_index + 1) % settings.PLAYER_IDLE_FRAMES, idle_index)
+
+        new_frame = airborne | ground_frame
+        frame = self.frame_ids[name, index, (players["direction"] < 0).astype(np.intp),
+                               players["shooting"].astype(np.intp)]
+        players["frame"] = np.where(new_frame, frame, players["frame"])
+        players["shooting"] &= ~new_frame
+
+    def update_bullets(self) -> None:
+        """Moves every bullet and frees the slots of bullets outside of the screen."""
+        bullets = self.bullets
+        alive = bullets["alive"]
+        bullets["prev_x"] = bullets["x"]
+        bullets["x"] += np.where(alive, bullets["vel_x"], 0)
+        x = bullets["x"]
+        bullets["alive"] = alive & (x >= 0) & (x <= settings.WIDTH)
+
+    def player_hitboxes(self) -> tuple:
+        """
+        Returns (left, top, right, bottom) arrays of the bounding box of every player's current frame,
+        shaped (matches, players), placed on whole pixels like PlayerState.hitbox.
+        """
+        players = self.players
+        frame = players["frame"]
+        # pixel the player's position falls on, rounding like hitmasks.pixel
+        x = np.floor(players["x"] + 0.5)
+        y = np.floor(players["y"] + 0.5)
+        return (x + self.frame_left[frame], y + self.frame_top[frame],
+                x + self.frame_right[frame], y + self.frame_bottom[frame])
+
+    def handle_collisions(self) -> None:
+        """Checks and handles player collisions with platforms and bullets using the frames' bounding boxes."""
+        players = self.players
+        left, top, right, bottom = self.player_hitboxes()
+
+        # platform contacts shaped (matches, players, platforms)
+        contact = ((left[..., None] < self.platform_right) & (self.platform_left < right[..., None])
+                   & (top[..., None] < self.platform_bottom) & (self.platform_top < bottom[..., None]))
+        on_platform = contact.any(axis=2)
+        first_platform = np.argmax(contact, axis=2)
+
+        # catch landings on platforms the player fell through during the tick
+        sweeping = ~on_platform & players["falling"]
+        if sweeping.any():
+            dx = (players["x"] - players["prev_x"])[..., None]
+            dy = (players["y"] - players["prev_y"])[..., None]
+            half_width = ((right - left) / 2)[..., None]
+            half_height = ((bottom - top) / 2)[..., None]
+            times = sweep(left[..., None] + half_width - dx, top[..., None] + half_height - dy, dx, dy,
+                          self.platform_left - half_width, self.platform_top - half_height,
+                          self.platform_right + half_width, self.platform_bottom + half_height)
+            # only landings from above
+            times[bottom[..., None] - dy > self.platform_top] = np.inf
+            swept = sweeping & np.isfinite(times).any(axis=2)
+            on_platform = on_platform | swept
+            first_platform = np.where(swept, np.argmin(times, axis=2), first_platform)
+
+        landing = on_platform & players["falling"]
+        players["vel_y"][landing] = 0
+        # offset due to sprite feet being above the bottom of the image
+        players["y"] = np.where(landing, self.platform_top[first_platform] + settings.PLAYER_OFFSET, players["y"])
+        players["standing"] = (players["standing"] | landing) & on_platform
+
+        bullets = self.bullets
+        half_width = settings.BULLET_WIDTH / 2
+        half_height = settings.BULLET_HEIGHT / 2
+        rows = np.arange(self.match_count)
+        # players are checked in order, so a bullet can only hit the first player it touches
+        for player_index in range(self.player_count):
+            player_left, player_top = left[:, player_index, None], top[:, player_index, None]
+            player_right, player_bottom = right[:, player_index, None], bottom[:, player_index, None]
+            alive = bullets["alive"]
+            overlapping = (alive
+                           & (player_left < bullets["x"] + half_width)
+                           & (bullets["x"] - half_width < player_right)
+                           & (player_top < bullets["y"] + half_height)
+                           & (bullets["y"] - half_height < player_bottom))
+
+            # sweep the bullets along their motion relative to the player
+            player_dx = (players["x"][:, player_index] - players["prev_x"][:, player_index])[:, None]
+            player_dy = (players["y"][:, player_index] - players["prev_y"][:, player_index])[:, None]
+            dx = (bullets["x"] - bullets["prev_x"]) - player_dx
+            dy = -player_dy
+            times = sweep(bullets["x"] - dx, bullets["y"] - dy, dx, dy,
+                          player_left - half_width, player_top - half_height,
+                          player_right + half_width, player_bottom + half_height)
+            swept = np.isfinite(times)
+
+            # a player's own bullets only count if they overlap at the end of the tick
+            hits = overlapping | (alive & swept & (bullets["author"] != player_index))
+            hit = hits.any(axis=1)
+            if not hit.any():
+                continue
+
+            # earliest impact first, then oldest bullet
+            times = np.where(hits, np.where(swept, times, 1.0), np.inf)
+            earliest = hits & (times == times.min(axis=1, keepdims=True))
+            first = np.argmin(np.where(earliest, bullets["order"], np.iinfo(np.int64).max), axis=1)
+
+            knocked = hit & (bullets["author"][rows, first] != player_index)
+            knockback = bullets["vel_x"][rows, first] * self.knockback_multiplier[:, 0]
+            players["vel_x"][:, player_index] += np.where(knocked, knockback, 0)
+            players["hit_count"][:, player_index] += knocked
+            bullets["alive"] &= ~hits
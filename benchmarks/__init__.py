@@ -0,0 +1,8 @@
+# headless benchmark suite, run from the repository root with:
+#     python -m benchmarks [--output results.json] [--baseline baseline.json]
+import os
+
+# benchmarks never open a window or an audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
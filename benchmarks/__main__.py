@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+
+import benchmarks  # sets the dummy SDL drivers before pygame is imported
+import pygame
+import bots
+import game
+from benchmarks import cases
+
+
+def get_cases(arguments: argparse.Namespace, game_instance: game.Game) -> list[tuple]:
+    """Returns (name, function) pairs of every benchmark; each function returns (seconds, operations)."""
+    ticks, seed = arguments.ticks, arguments.seed
+    case_list = [
+        ("load/cold", lambda: cases.load(game_instance, warm=False)),
+        ("load/warm", lambda: cases.load(game_instance, warm=True))
+    ]
+    for scenario in ("rapid_fire", "constant_jumping", "many_respawns", "random"):
+        for player_count in (2, 8):
+            case_list.append(("simulate/{}/players={}".format(scenario, player_count),
+                              lambda s=scenario, p=player_count: cases.simulate(s, p, 0, ticks, seed)))
+    for bot_name in sorted(bots.BOTS):
+        for player_count in (2, 8):
+            case_list.append(("bots/{}/players={}".format(bot_name, player_count),
+                              lambda b=bot_name, p=player_count: cases.bot_match(b, p, ticks, seed)))
+    for player_count in (2, 8):
+        for bullet_count in (32, 256):
+            case_list.append(("simulate/idle/players={}/bullets={}".format(player_count, bullet_count),
+                              lambda p=player_count, b=bullet_count: cases.simulate("idle", p, b, ticks, seed)))
+            case_list.append(("collide/players={}/bullets={}".format(player_count, bullet_count),
+                              lambda p=player_count, b=bullet_count: cases.collide(p, b, ticks, seed)))
+            case_list.append(("state/players={}/bullets={}".format(player_count, bullet_count),
+                              lambda p=player_count, b=bullet_count: cases.state(p, b, ticks, seed)))
+    for scenario in ("idle", "rapid_fire", "many_respawns"):
+        case_list.append(("render/{}".format(scenario),
+                          lambda s=scenario: cases.render(game_instance, s, ticks // 4, seed)))
+    return [(name, function) for name, function in case_list if arguments.filter in name]
+
+
+def run_case(function, repeat: int) -> dict:
+    """Runs a case repeat times and returns its timing summary."""
+    samples = []
+    operations = 1
+    for _ in range(repeat):
+        seconds, operations = function()
+        samples.append(seconds / operations)
+    median = statistics.median(samples)
+    return {
+        "operations": operations,
+        "median_s": median,
+        "min_s": min(samples),
+        "per_second": 1 / median if median else float("inf")
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Prints the speedup of every case against the baseline and returns the names of regressed cases."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        speedup = baseline[name]["median_s"] / result["median_s"]
+        flag = ""
+        if speedup < 1 - tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print("{:<45} {:>7.2f}x{}".format(name, speedup, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Headless Gun Mayhem benchmarks.")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case; the median is reported")
+    parser.add_argument("--ticks", type=int, default=1000, help="ticks per simulate/collide run")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the scripted scenarios")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results previously written with --output")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="slowdown against the baseline that counts as a regression")
+    arguments = parser.parse_args()
+
+    # asset paths are relative to the repository root
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    game_instance = game.Game()
+    results = {}
+    for name, function in get_cases(arguments, game_instance):
+        result = run_case(function, arguments.repeat)
+        results[name] = result
+        print("{:<45} {:>12.1f} µs {:>12.0f}/s".format(name, result["median_s"] * 1e6, result["per_second"]))
+    game_instance.quit()
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "repeat": arguments.repeat,
+            "ticks": arguments.ticks,
+            "seed": arguments.seed
+        },
+        "results": results
+    }
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as f:
+            baseline = json.load(f)["results"]
+        print()
+        if compare(results, baseline, arguments.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import random
+import time
+import pygame
+import assets
+import bots
+import game
+import simulation
+from benchmarks import scenarios
+
+# every case is a function returning the seconds one run took and the number of operations in that run
+
+
+def settle(sim: simulation.Simulation, ticks: int = 60) -> None:
+    """Lets the players fall onto the platforms before a measurement."""
+    for _ in range(ticks):
+        sim.step([0] * len(sim.players))
+
+
+def load(game_instance: game.Game, warm: bool) -> tuple:
+    """
+    Times Game.setup(), i.e. the asset loading and sprite creation of a new round.
+
+    Parameters:
+    game_instance (game.Game): the game to set up.
+    warm (bool): whether the asset cache is kept from the previous round.
+    """
+    if not warm:
+        game_instance.assets.release_all()
+        assets.cache.clear()
+    start = time.perf_counter()
+    game_instance.setup()
+    return time.perf_counter() - start, 1
+
+
+def simulate(scenario: str, player_count: int, bullet_count: int, ticks: int, seed: int) -> tuple:
+    """
+    Times ticks simulation steps of a scripted scenario.
+
+    Parameters:
+    scenario (str): the name of the input scenario.
+    player_count (int): the number of players.
+    bullet_count (int): the number of bullets in flight when the measurement starts.
+    ticks (int): the number of ticks to simulate.
+    seed (int): the seed of the scenario's random number generator.
+    """
+    rng = random.Random(seed)
+    inputs_for = scenarios.SCENARIOS[scenario]
+    sim = simulation.Simulation(scenarios.spread_spawns(player_count),
+                                bullet_pool_size=max(64, 2 * bullet_count))
+    settle(sim)
+    scenarios.fill_bullets(sim, bullet_count, rng)
+    inputs = [inputs_for(tick, player_count, rng) for tick in range(ticks)]
+
+    start = time.perf_counter()
+    for tick_inputs in inputs:
+        sim.step(tick_inputs)
+    return time.perf_counter() - start, ticks
+
+
+def bot_match(bot_name: str, player_count: int, ticks: int, seed: int) -> tuple:
+    """
+    Times ticks simulation steps of a match between bots, their decisions included.
+
+    Parameters:
+    bot_name (str): the kind of bot controlling every player.
+    player_count (int): the number of players.
+    ticks (int): the number of ticks to simulate.
+    seed (int): the seed of the first bot; the others use the following seeds.
+    """
+    sim = simulation.Simulation(scenarios.spread_spawns(player_count))
+    players = [bots.create_bot(bot_name, seed + index) for index in range(player_count)]
+    for index, bot in enumerate(players):
+        bot.attach(sim, index)
+    settle(sim)
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        sim.step([bot.get_input() for bot in players])
+    return time.perf_counter() - start, ticks
+
+
+def collide(player_count: int, bullet_count: int, passes: int, seed: int) -> tuple:
+    """
+    Times collision passes over a fixed arrangement of players and bullets.
+
+    Parameters:
+    player_count (int): the number of players.
+    bullet_count (int): the number of bullets.
+    passes (int): the number of handle_collisions() calls.
+    seed (int): the seed used to place the bullets.
+    """
+    rng = random.Random(seed)
+    sim = simulation.Simulation(scenarios.spread_spawns(player_count),
+                                bullet_pool_size=max(64, 2 * bullet_count))
+    settle(sim)
+    scenarios.fill_bullets(sim, bullet_count, rng)
+
+    start = time.perf_counter()
+    for _ in range(passes):
+        sim.handle_collisions([])
+    return time.perf_counter() - start, passes
+
+
+def state(player_count: int, bullet_count: int, operations: int, seed: int) -> tuple:
+    """
+    Times saving and restoring the simulation state, as done by rollback and replay seeking.
+
+    Parameters:
+    player_count (int): the number of players.
+    bullet_count (int): the number of live bullets.
+    operations (int): the number of save_state()/load_state() pairs.
+    seed (int): the seed used to place the bullets.
+    """
+    rng = random.Random(seed)
+    sim = simulation.Simulation(scenarios.spread_spawns(player_count),
+                                bullet_pool_size=max(64, 2 * bullet_count))
+    settle(sim)
+    scenarios.fill_bullets(sim, bullet_count, rng)
+
+    start = time.perf_counter()
+    for _ in range(operations):
+        sim.load_state(sim.save_state())
+    return time.perf_counter() - start, operations
+
+
+def render(game_instance: game.Game, scenario: str, frames: int, seed: int) -> tuple:
+    """
+    Times rendering frames of a scripted scenario; the simulation steps between frames are not timed.
+
+    Parameters:
+    game_instance (game.Game): the game to render.
+    scenario (str): the name of the input scenario.
+    frames (int): the number of frames to render.
+    seed (int): the seed of the scenario's random number generator.
+    """
+    rng = random.Random(seed)
+    inputs_for = scenarios.SCENARIOS[scenario]
+    game_instance.setup()
+    tick = iter(range(frames))
+    game_instance.get_inputs = lambda: inputs_for(next(tick), 2, rng)
+
+    elapsed = 0.0
+    for _ in range(frames):
+        game_instance.update()
+        pygame.event.pump()
+        start = time.perf_counter()
+        game_instance.render()
+        elapsed += time.perf_counter() - start
+    return elapsed, frames
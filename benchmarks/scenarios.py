@@ -0,0 +1,66 @@
+import random
+import settings
+import simulation
+
+# scripted input scenarios; every scenario is a function (tick, player_count, rng) -> list of input bitfields
+# that only depends on its arguments, so runs with the same seed are repeatable
+
+
+def idle(tick: int, player_count: int, rng: random.Random) -> list[int]:
+    """Nobody presses anything."""
+    return [0] * player_count
+
+
+def rapid_fire(tick: int, player_count: int, rng: random.Random) -> list[int]:
+    """Everyone shoots every other tick while strafing back and forth."""
+    move = simulation.LEFT if (tick // 30) % 2 else simulation.RIGHT
+    shoot = simulation.SHOOT if tick % 2 == 0 else 0
+    return [move | shoot] * player_count
+
+
+def constant_jumping(tick: int, player_count: int, rng: random.Random) -> list[int]:
+    """Everyone holds jump while running back and forth."""
+    move = simulation.LEFT if (tick // 45) % 2 else simulation.RIGHT
+    return [simulation.UP | move] * player_count
+
+
+def many_respawns(tick: int, player_count: int, rng: random.Random) -> list[int]:
+    """Everyone runs off the edge of the map, so players die and respawn over and over."""
+    inputs = []
+    for index in range(player_count):
+        move = simulation.LEFT if index % 2 == 0 else simulation.RIGHT
+        inputs.append(move | (simulation.SHOOT if tick % 10 == 0 else 0))
+    return inputs
+
+
+def random_inputs(tick: int, player_count: int, rng: random.Random) -> list[int]:
+    """Seeded random button presses."""
+    return [rng.getrandbits(5) for _ in range(player_count)]
+
+
+SCENARIOS = {
+    "idle": idle,
+    "rapid_fire": rapid_fire,
+    "constant_jumping": constant_jumping,
+    "many_respawns": many_respawns,
+    "random": random_inputs
+}
+
+
+def spread_spawns(player_count: int) -> list[tuple]:
+    """Returns (spawn_point, direction) tuples spreading player_count players across the map."""
+    spawns = []
+    for index in range(player_count):
+        x = settings.WIDTH * (index + 1) / (player_count + 1)
+        direction = "right" if x < settings.WIDTH / 2 else "left"
+        spawns.append(((x, 0), direction))
+    return spawns
+
+
+def fill_bullets(sim: simulation.Simulation, bullet_count: int, rng: random.Random) -> None:
+    """Spawns bullet_count bullets at seeded random positions and velocities, as if fired by random players."""
+    for _ in range(bullet_count):
+        x = rng.uniform(0, settings.WIDTH)
+        y = rng.uniform(0, settings.HEIGHT)
+        vel_x = rng.choice((-1, 1)) * rng.uniform(settings.BULLET_SPEED / 2, settings.BULLET_SPEED * 1.5)
+        sim.bullets.spawn(x, y, vel_x, rng.randrange(len(sim.players)))
@@ -0,0 +1,262 @@
+import random
+import settings
+import simulation
+import navigation
+
+# bots fill roster slots without a human; every tick a bot reads the simulation directly
+# and returns the input bitfield a player would press, so bots play headless at simulation
+# speed as well as in the game
+
+
+def coast_distance(vel_x: float) -> float:
+    """
+    Returns how far a player moving at vel_x slides before friction stops them, with no input.
+
+    Friction scales the velocity by (1 + friction) every tick and the position moves by
+    (1 + friction / 2) of the velocity, so the distances form a geometric series.
+    """
+    friction = settings.PLAYER_FRICTION
+    return vel_x * (1 + friction / 2) / -friction
+
+
+class Bot:
+    """The base class of bot controllers, which choose a player's inputs from the state of the simulation."""
+
+    def __init__(self, seed: int = None) -> None:
+        """
+        Initializes the Bot object.
+
+        Parameters:
+        seed (int): the seed of the bot's random decisions, so matches between bots are reproducible.
+        """
+        self.rng = random.Random(seed)
+        self.simulation = None
+        self.player = None
+        self.boxes = []  # collision boxes of the platforms
+        self.recoil_distance = 0  # how far the recoil of one shot pushes a standing player
+        self.next_shot_tick = 0
+        self.wander = 0  # the direction the bot walks in while it has nothing better to do
+        self.navigation = None
+        self.plan = None  # [jump being taken, tick it started, whether the player has left the ground]
+
+    def attach(self, sim: simulation.Simulation, index: int) -> None:
+        """
+        Gives the bot control of a player of a new simulation.
+
+        Parameters:
+        sim (simulation.Simulation): the simulation the player is in.
+        index (int): the index of the player.
+        """
+        self.simulation = sim
+        self.player = sim.players[index]
+        self.boxes = [platform.box for platform in sim.platforms]
+        self.recoil_distance = coast_distance(settings.GUN_RECOIL)  # read per match, as sweeps change it
+        self.next_shot_tick = 0
+        self.wander = 0
+        self.navigation = navigation.get_graph([(platform.coordinates, platform.tile_count)
+                                                for platform in sim.platforms])
+        self.plan = None
+
+    def get_input(self, keys=None) -> int:
+        """Returns the input bitfield of the bot's player for the next tick."""
+        if self.player is None:
+            return 0
+        return self.think()
+
+    def think(self) -> int:
+        """Returns the inputs for the next tick; implemented by every bot."""
+        raise NotImplementedError
+
+    def platform_below(self, x: float) -> object:
+        """Returns the box of the highest platform under the player's feet at x, or None over the void."""
+        feet = self.player.y - settings.PLAYER_OFFSET
+        best = None
+        for box in self.boxes:
+            if box.left <= x <= box.right and box.top >= feet - 1 and (best is None or box.top < best.top):
+                best = box
+        return best
+
+    def nearest_platform(self) -> object:
+        """Returns the box of the platform the player can most easily get back onto."""
+        player = self.player
+        feet = player.y - settings.PLAYER_OFFSET
+        below = [box for box in self.boxes if box.top >= feet - 1] or self.boxes
+        return min(below, key=lambda box: max(box.left - player.x, 0, player.x - box.right))
+
+    def keep_on_platform(self) -> int:
+        """Returns the movement inputs that keep the player on a platform, or 0 if it is safe to do anything."""
+        player = self.player
+        margin = settings.BOT_EDGE_MARGIN
+        landing_x = player.x + coast_distance(player.vel_x)
+        box = self.platform_below(player.x) if player.standing else self.platform_below(landing_x)
+        if box is None:
+            box = self.nearest_platform()
+        if landing_x < box.left + margin:
+            return simulation.RIGHT
+        if landing_x > box.right - margin:
+            return simulation.LEFT
+        return 0
+
+    def walk(self) -> int:
+        """Returns the input of a random walk across the platform."""
+        if self.rng.random() < settings.BOT_WANDER_CHANCE:
+            self.wander = self.rng.choice((0, simulation.LEFT, simulation.RIGHT))
+        return self.wander
+
+    def travel(self, target: int) -> int:
+        """
+        Returns the inputs that take the player towards platform target along the navigation graph.
+
+        The player stops at the start of the route's first jump and then plays it. Returns None
+        if the player is not standing on a platform, is already on target or cannot get there.
+        """
+        if self.plan is not None:
+            return self.follow_plan()
+        player = self.player
+        source = navigation.standing_platform(self.simulation, player)
+        if source is None or source == target:
+            return None
+        jump = self.navigation.route(source, target)
+        if jump is None:
+            return None
+        offset = jump.start_x - player.x
+        if abs(offset) <= settings.NAV_START_TOLERANCE:
+            if player.vel_x == 0:
+                self.plan = [jump, self.simulation.tick, False]
+                return self.follow_plan()
+            return 0  # wait to stop; jumps were measured from standing still
+        if offset * player.vel_x > 0 and abs(offset) <= abs(coast_distance(player.vel_x)):
+            return 0  # coast to a stop on the start
+        return simulation.LEFT if offset < 0 else simulation.RIGHT
+
+    def follow_plan(self) -> int:
+        """Returns the inputs of the next tick of the jump being taken, or 0 once it has landed."""
+        jump, start_tick, airborne = self.plan
+        elapsed = self.simulation.tick - start_tick
+        if not self.player.standing:
+            airborne = self.plan[2] = True
+        elif airborne or elapsed >= settings.NAV_MAX_JUMP_TICKS:
+            self.plan = None
+            return 0
+        return navigation.jump_inputs(jump, elapsed, airborne)
+
+    def nearest_opponent(self) -> simulation.PlayerState:
+        """Returns the closest other player, or None if the bot is alone."""
+        player = self.player
+        opponents = [other for other in self.simulation.players if other is not player]
+        if not opponents:
+            return None
+        return min(opponents, key=lambda other: abs(other.x - player.x) + 2 * abs(other.y - player.y))
+
+    def shoot(self, direction: str) -> int:
+        """
+        Returns the inputs that fire a shot towards direction, first turning around if needed.
+
+        A shot leaves in the direction the player faced before the tick, so turning takes a tick.
+
+        Parameters:
+        direction (str): "left" or "right".
+        """
+        turn = simulation.LEFT if direction == "left" else simulation.RIGHT
+        tick = self.simulation.tick
+        if self.player.direction != direction or tick < self.next_shot_tick:
+            return turn if self.player.direction != direction else 0
+        self.next_shot_tick = tick + settings.BOT_FIRE_INTERVAL
+        return simulation.SHOOT
+
+    def in_line(self, other: simulation.PlayerState) -> bool:
+        """Returns True if a bullet fired by the player now would cross the height of other's body."""
+        return abs(other.y - self.player.y) < settings.PLAYER_HITBOX_HEIGHT
+
+
+class EdgeAvoider(Bot):
+    """A bot that walks around without ever stepping off a platform and steers back when knocked off."""
+
+    def think(self) -> int:
+        inputs = self.keep_on_platform()
+        if inputs:
+            return inputs
+        return self.walk()
+
+
+class Aimer(Bot):
+    """
+    A bot that turns towards the nearest opponent in line and fires, unless the recoil would push it off.
+
+    Opponents on other platforms are followed along the navigation graph.
+    """
+
+    def think(self) -> int:
+        if self.plan is not None:
+            return self.follow_plan()
+        player = self.player
+        target = self.nearest_opponent()
+        if target is not None and player.standing and not self.in_line(target):
+            target_platform = navigation.standing_platform(self.simulation, target)
+            if target_platform is not None:
+                inputs = self.travel(target_platform)
+                if inputs is not None:
+                    return inputs
+        inputs = self.keep_on_platform()
+        if inputs:
+            return inputs
+        if target is None or not player.standing:
+            return self.walk()
+        direction = "left" if target.x < player.x else "right"
+        if self.in_line(target):
+            recoil_x = player.x + (self.recoil_distance if direction == "left" else -self.recoil_distance)
+            if self.platform_below(recoil_x) is not None:
+                return self.shoot(direction)
+            # too close to the edge behind to take the recoil; walk towards the target first
+            return simulation.LEFT if direction == "left" else simulation.RIGHT
+        return self.walk()
+
+
+class RecoilJumper(Bot):
+    """A bot that jumps towards its opponent, boosting itself with the recoil of shots fired behind it."""
+
+    def think(self) -> int:
+        player = self.player
+        target = self.nearest_opponent()
+        landing_x = player.x + coast_distance(player.vel_x)
+        if not player.standing and self.platform_below(landing_x) is None:
+            # falling into the void: shoot away from the nearest platform to be pushed towards it
+            box = self.nearest_platform()
+            return self.shoot("left" if box.left + box.right > 2 * player.x else "right")
+        if target is None:
+            return self.keep_on_platform() or self.walk()
+
+        towards = "left" if target.x < player.x else "right"
+        away = "right" if towards == "left" else "left"
+        if self.in_line(target) and self.recoil_lands(landing_x, towards):
+            return self.shoot(towards)
+        if player.standing:
+            inputs = self.keep_on_platform()
+            return (inputs or (simulation.LEFT if towards == "left" else simulation.RIGHT)) | simulation.UP
+        if abs(target.x - player.x) > settings.BOT_BOOST_DISTANCE and self.recoil_lands(landing_x, away):
+            return self.shoot(away)  # the recoil pushes the bot towards the target
+        return self.keep_on_platform()
+
+    def recoil_lands(self, landing_x: float, direction: str) -> bool:
+        """Returns True if the player still lands on a platform after the recoil of a shot towards direction."""
+        recoil_x = landing_x + (self.recoil_distance if direction == "left" else -self.recoil_distance)
+        return self.platform_below(recoil_x) is not None
+
+
+# the bots a roster can name as a player's controls
+BOTS = {
+    "edge_bot": EdgeAvoider,
+    "aim_bot": Aimer,
+    "recoil_bot": RecoilJumper
+}
+
+
+def create_bot(name: str, seed: int = None) -> Bot:
+    """
+    Returns a new bot of the kind called name.
+
+    Parameters:
+    name (str): a key of BOTS.
+    seed (int): the seed of the bot's random decisions.
+    """
+    return BOTS[name](seed)
@@ -0,0 +1,130 @@
+import settings
+import math
+
+
+class Box:
+    """An axis-aligned bounding box used for collision checking."""
+
+    __slots__ = ("left", "top", "right", "bottom")
+
+    def __init__(self, left: float, top: float, right: float, bottom: float):
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+
+    def overlaps(self, other: "Box") -> bool:
+        """Returns True if the two boxes overlap."""
+        return (self.left < other.right and other.left < self.right
+                and self.top < other.bottom and other.top < self.bottom)
+
+
+class UniformGrid:
+    """A broad phase that buckets items by the grid cells their boxes overlap."""
+
+    def __init__(self, cell_size: int = settings.COLLISION_CELL_SIZE) -> None:
+        """
+        Initializes the UniformGrid object.
+
+        Parameters:
+        cell_size (int): the width and height of a grid cell in pixels.
+        """
+        self.cell_size = cell_size
+        self.cells = {}  # (column, row) -> set of items
+        self.item_cells = {}  # item -> tuple of (column, row) it is stored in
+
+    def get_cells(self, left: float, top: float, right: float, bottom: float) -> tuple:
+        """Returns the (column, row) keys of every cell overlapped by the given box."""
+        size = self.cell_size
+        first_column, last_column = math.floor(left / size), math.floor(right / size)
+        first_row, last_row = math.floor(top / size), math.floor(bottom / size)
+        if first_column == last_column and first_row == last_row:
+            return ((first_column, first_row),)
+        return tuple((column, row)
+                     for column in range(first_column, last_column + 1)
+                     for row in range(first_row, last_row + 1))
+
+    def insert(self, item, left: float, top: float, right: float, bottom: float) -> None:
+        """
+        Adds item to every cell overlapped by its box.
+
+        Parameters:
+        item (hashable): the item to store, e.g. a platform index or a bullet slot.
+        left, top, right, bottom (float): the edges of the item's box.
+        """
+        keys = self.get_cells(left, top, right, bottom)
+        self.item_cells[item] = keys
+        for key in keys:
+            cell = self.cells.get(key)
+            if cell is None:
+                cell = self.cells[key] = set()
+            cell.add(item)
+
+    def move(self, item, left: float, top: float, right: float, bottom: float) -> None:
+        """Updates the cells of an item that moved, touching the grid only if its cells changed."""
+        keys = self.get_cells(left, top, right, bottom)
+        if keys == self.item_cells[item]:
+            return
+        self.remove(item)
+        self.item_cells[item] = keys
+        for key in keys:
+            cell = self.cells.get(key)
+            if cell is None:
+                cell = self.cells[key] = set()
+            cell.add(item)
+
+    def remove(self, item) -> None:
+        """Removes item from the grid."""
+        for key in self.item_cells.pop(item, ()):
+            cell = self.cells[key]
+            cell.discard(item)
+            if not cell:
+                del self.cells[key]
+
+    def query(self, box: Box) -> set:
+        """Returns every item stored in a cell overlapped by box; the caller checks exact overlap."""
+        keys = self.get_cells(box.left, box.top, box.right, box.bottom)
+        if len(keys) == 1:
+            return set(self.cells.get(keys[0], ()))
+        found = set()
+        for key in keys:
+            cell = self.cells.get(key)
+            if cell:
+                found.update(cell)
+        return found
+
+    def clear(self) -> None:
+        """Removes every item from the grid."""
+        self.cells.clear()
+        self.item_cells.clear()
+
+
+def sweep(x: float, y: float, dx: float, dy: float, box: Box, half_width: float = 0, half_height: float = 0) -> float:
+    """
+    Returns the time of impact in [0, 1] of a box moving from (x, y) by (dx, dy) against a static box, or None if they never touch.
+
+    Parameters:
+    x, y (float): the center of the moving box at time 0.
+    dx, dy (float): the displacement of the moving box between time 0 and time 1.
+    box (Box): the static box.
+    half_width, half_height (float): the half size of the moving box; 0 for a point.
+    """
+    # sweeping a box against a box is the same as sweeping its center against the expanded box
+    t_enter, t_exit = 0.0, 1.0
+    for position, delta, low, high in (
+        (x, dx, box.left - half_width, box.right + half_width),
+        (y, dy, box.top - half_height, box.bottom + half_height)
+    ):
+        if delta == 0:
+            if not (low < position < high):
+                return None
+            continue
+        t_low = (low - position) / delta
+        t_high = (high - position) / delta
+        if t_low > t_high:
+            t_low, t_high = t_high, t_low
+        t_enter = max(t_enter, t_low)
+        t_exit = min(t_exit, t_high)
+        if t_enter >= t_exit:
+            return None
+    return t_enter
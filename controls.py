@@ -1,4 +1,13 @@
+import pygame
 import settings
+import simulation
+import bots
+import math
+
+GAMEPAD = "gamepad"  # the roster controls of a player using the next gamepad plugged in
+
+# a stick direction counts when the stick is within 67.5 degrees of it, giving eight directions
+STICK_DIRECTION_THRESHOLD = math.sin(math.radians(22.5))
 
 class KeyboardControl:
     def __init__(self, up, down, left, right, shoot):
@@ -8,18 +17,303 @@ class KeyboardControl:
         self.RIGHT = right
         self.SHOOT = shoot
 
-PLAYER_1_CONTROLS = KeyboardControl(
-    settings.PLAYER_1_UP,
-    settings.PLAYER_1_DOWN,
-    settings.PLAYER_1_LEFT,
-    settings.PLAYER_1_RIGHT,
-    settings.PLAYER_1_SHOOT
-)
-
-PLAYER_2_CONTROLS = KeyboardControl(
-    settings.PLAYER_2_UP,
-    settings.PLAYER_2_DOWN,
-    settings.PLAYER_2_LEFT,
-    settings.PLAYER_2_RIGHT,
-    settings.PLAYER_2_SHOOT
-)
\ No newline at end of file
+    def get_input(self, keys) -> int:
+        """
+        Returns the simulation input bitfield for the held movement keys.
+
+        Parameters:
+        keys (sequence): pressed state of every key, as returned by pygame.key.get_pressed().
+        """
+        inputs = 0
+        if keys[self.UP]:
+            inputs |= simulation.UP
+        if keys[self.DOWN]:
+            inputs |= simulation.DOWN
+        if keys[self.LEFT]:
+            inputs |= simulation.LEFT
+        if keys[self.RIGHT]:
+            inputs |= simulation.RIGHT
+        return inputs
+
+    def bindings(self) -> list[tuple]:
+        """Returns the (key, input bit) pair of every key of the layout."""
+        return [(self.UP, simulation.UP), (self.DOWN, simulation.DOWN), (self.LEFT, simulation.LEFT),
+                (self.RIGHT, simulation.RIGHT), (self.SHOOT, simulation.SHOOT)]
+
+
+class GamepadControl:
+    """Reads a player's input from a gamepad: the stick or d-pad moves, buttons jump and shoot."""
+
+    def __init__(self, deadzone: float = settings.GAMEPAD_DEADZONE) -> None:
+        """
+        Initializes the GamepadControl object.
+
+        Parameters:
+        deadzone (float): stick positions closer to the centre than this, from 0 to 1, are ignored.
+        """
+        self.deadzone = deadzone
+        self.joystick = None  # assigned when a gamepad is plugged in
+        self.stick = [0.0, 0.0]
+        self.stick_inputs = 0
+        self.hat_inputs = 0
+        self.button_inputs = 0
+
+    def connect(self, joystick: pygame.joystick.JoystickType) -> None:
+        """Assigns a gamepad to the player and reads its current state."""
+        self.joystick = joystick
+        self.poll()
+
+    def disconnect(self) -> None:
+        """Removes the player's gamepad; the player stops moving."""
+        self.joystick = None
+        self.stick = [0.0, 0.0]
+        self.stick_inputs = self.hat_inputs = self.button_inputs = 0
+
+    def get_input(self, keys=None) -> int:
+        """Returns the simulation input bitfield for the held stick, d-pad and jump buttons."""
+        return self.stick_inputs | self.hat_inputs | self.button_inputs
+
+    def poll(self) -> None:
+        """Reads the whole state of the gamepad, e.g. after events may have been missed."""
+        joystick = self.joystick
+        if joystick is None:
+            return
+        x_axis, y_axis = settings.GAMEPAD_STICK_AXES
+        if joystick.get_numaxes() > max(x_axis, y_axis):
+            self.axis_motion(x_axis, joystick.get_axis(x_axis))
+            self.axis_motion(y_axis, joystick.get_axis(y_axis))
+        if joystick.get_numhats():
+            self.hat_motion(joystick.get_hat(0))
+        self.button_inputs = 0
+        for button in settings.GAMEPAD_JUMP_BUTTONS:
+            if button < joystick.get_numbuttons() and joystick.get_button(button):
+                self.button_inputs |= simulation.UP
+
+    def axis_motion(self, axis: int, value: float) -> None:
+        """Records the new position of a stick axis."""
+        if axis not in settings.GAMEPAD_STICK_AXES:
+            return
+        self.stick[settings.GAMEPAD_STICK_AXES.index(axis)] = value
+        x, y = self.stick
+        magnitude = math.hypot(x, y)
+        inputs = 0
+        if magnitude >= self.deadzone:  # a circular deadzone, so worn sticks do not drift diagonally
+            threshold = magnitude * STICK_DIRECTION_THRESHOLD
+            if x <= -threshold:
+                inputs |= simulation.LEFT
+            elif x >= threshold:
+                inputs |= simulation.RIGHT
+            if y <= -threshold:
+                inputs |= simulation.UP
+            elif y >= threshold:
+                inputs |= simulation.DOWN
+        self.stick_inputs = inputs
+
+    def hat_motion(self, value: tuple) -> None:
+        """Records the new position of the d-pad, as (x, y) with y pointing up."""
+        x, y = value
+        inputs = 0
+        if x < 0:
+            inputs |= simulation.LEFT
+        elif x > 0:
+            inputs |= simulation.RIGHT
+        if y > 0:
+            inputs |= simulation.UP
+        elif y < 0:
+            inputs |= simulation.DOWN
+        self.hat_inputs = inputs
+
+    def button(self, button: int, down: bool) -> int:
+        """Records a button press or release and returns its input bit, or 0 if the button does nothing."""
+        if button in settings.GAMEPAD_SHOOT_BUTTONS:
+            return simulation.SHOOT
+        if button in settings.GAMEPAD_JUMP_BUTTONS:
+            if down:
+                self.button_inputs |= simulation.UP
+            else:
+                self.button_inputs &= ~simulation.UP
+            return simulation.UP
+        return 0
+
+
+class InputState:
+    """
+    The input bitfield of every player, kept up to date from key and gamepad events.
+
+    Every event is looked up once in a key -> (player index, input bit) or gamepad -> player index
+    table, so the cost of an event does not grow with the number of players. Gamepads are
+    assigned to the players waiting for one in roster order as they are plugged in.
+    """
+
+    def __init__(self, control_list: list) -> None:
+        """
+        Initializes the InputState object.
+
+        Parameters:
+        control_list (list): the KeyboardControl, GamepadControl or bots.Bot of every player; None for a player without input.
+        """
+        self.key_table = {}
+        for index, control in enumerate(control_list):
+            if not isinstance(control, KeyboardControl):
+                continue
+            for key, bit in control.bindings():
+                if key in self.key_table:
+                    raise ValueError("key {} is bound to more than one player".format(key))
+                self.key_table[key] = (index, bit)
+        self.control_list = control_list
+        self.bots = [(index, control) for index, control in enumerate(control_list) if isinstance(control, bots.Bot)]
+        self.held = [0] * len(control_list)  # movement keys held down
+        self.pressed = [0] * len(control_list)  # keys pressed since the last snapshot, so taps are not lost
+
+        self.gamepads = {}  # joystick instance id -> player index
+        self.spare_gamepads = []  # plugged in while every gamepad player had one
+        self.handlers = {
+            pygame.KEYDOWN: lambda event: self.key_down(event.key),
+            pygame.KEYUP: lambda event: self.key_up(event.key),
+            pygame.JOYDEVICEADDED: lambda event: self.add_gamepad(pygame.joystick.Joystick(event.device_index)),
+            pygame.JOYDEVICEREMOVED: lambda event: self.remove_gamepad(event.instance_id),
+            pygame.JOYAXISMOTION: self.gamepad_motion,
+            pygame.JOYHATMOTION: self.gamepad_motion,
+            pygame.JOYBUTTONDOWN: self.gamepad_button,
+            pygame.JOYBUTTONUP: self.gamepad_button,
+        }
+        # SDL also announces the gamepads plugged in at startup, which are then already known
+        for device_index in range(pygame.joystick.get_count()):
+            self.add_gamepad(pygame.joystick.Joystick(device_index))
+
+    def handle_event(self, event: pygame.event.Event) -> bool:
+        """Updates the inputs from a key or gamepad event and returns True if it was input of a player."""
+        handler = self.handlers.get(event.type)
+        return bool(handler and handler(event))
+
+    def key_down(self, key: int) -> bool:
+        """Records a key press and returns True if the key belongs to a player."""
+        binding = self.key_table.get(key)
+        if binding is None:
+            return False
+        index, bit = binding
+        if bit != simulation.SHOOT:
+            self.held[index] |= bit  # shooting takes one press per shot
+        self.pressed[index] |= bit
+        return True
+
+    def key_up(self, key: int) -> bool:
+        """Records a key release and returns True if the key belongs to a player."""
+        binding = self.key_table.get(key)
+        if binding is None:
+            return False
+        index, bit = binding
+        self.held[index] &= ~bit
+        return True
+
+    def add_gamepad(self, joystick: pygame.joystick.JoystickType) -> bool:
+        """Assigns a newly plugged in gamepad to the first player waiting for one."""
+        instance_id = joystick.get_instance_id()
+        if instance_id in self.gamepads or any(spare.get_instance_id() == instance_id for spare in self.spare_gamepads):
+            return False
+        for index, control in enumerate(self.control_list):
+            if isinstance(control, GamepadControl) and control.joystick is None:
+                control.connect(joystick)
+                self.gamepads[instance_id] = index
+                self.update_gamepad_player(index)
+                return False
+        self.spare_gamepads.append(joystick)
+        return False
+
+    def remove_gamepad(self, instance_id: int) -> bool:
+        """Releases an unplugged gamepad and gives its player a spare one if there is one."""
+        self.spare_gamepads = [spare for spare in self.spare_gamepads if spare.get_instance_id() != instance_id]
+        index = self.gamepads.pop(instance_id, None)
+        if index is None:
+            return False
+        self.control_list[index].disconnect()
+        self.held[index] = 0
+        if self.spare_gamepads:
+            self.add_gamepad(self.spare_gamepads.pop(0))
+        return False
+
+    def gamepad_motion(self, event: pygame.event.Event) -> bool:
+        """Records stick and d-pad movement."""
+        index = self.gamepads.get(event.instance_id)
+        if index is None:
+            return False
+        control = self.control_list[index]
+        if event.type == pygame.JOYAXISMOTION:
+            control.axis_motion(event.axis, event.value)
+        elif event.hat == 0:
+            control.hat_motion(event.value)
+        return self.update_gamepad_player(index)
+
+    def gamepad_button(self, event: pygame.event.Event) -> bool:
+        """Records a gamepad button press or release."""
+        index = self.gamepads.get(event.instance_id)
+        if index is None:
+            return False
+        down = event.type == pygame.JOYBUTTONDOWN
+        bit = self.control_list[index].button(event.button, down)
+        if bit == simulation.SHOOT and down:
+            self.pressed[index] |= bit
+            return True
+        return self.update_gamepad_player(index) if bit else False
+
+    def update_gamepad_player(self, index: int) -> bool:
+        """Sets the held inputs of a gamepad player from its gamepad and returns True if they changed."""
+        inputs = self.control_list[index].get_input()
+        changed = inputs != self.held[index]
+        self.pressed[index] |= inputs & ~self.held[index]
+        self.held[index] = inputs
+        return changed
+
+    def attach(self, sim: simulation.Simulation) -> None:
+        """Gives the bots control of their players in a new simulation."""
+        for index, bot in self.bots:
+            bot.attach(sim, index)
+
+    def sync(self, keys) -> None:
+        """
+        Sets the held inputs from the keyboard and gamepad state, e.g. at the start of a round or when the window regains focus.
+
+        Parameters:
+        keys (sequence): pressed state of every key, as returned by pygame.key.get_pressed().
+        """
+        for control in self.control_list:
+            if isinstance(control, GamepadControl):
+                control.poll()
+        self.held = [control.get_input(keys) if isinstance(control, (KeyboardControl, GamepadControl)) else 0
+                     for control in self.control_list]
+        self.pressed = [0] * len(self.control_list)
+
+    def snapshot(self) -> list[int]:
+        """Returns the input bitfield of every player for the next tick."""
+        inputs = [held | pressed for held, pressed in zip(self.held, self.pressed)]
+        self.pressed = [0] * len(self.pressed)
+        for index, bot in self.bots:
+            inputs[index] = bot.get_input()
+        return inputs
+
+
+KEYBOARD_CONTROLS = {name: KeyboardControl(*keys) for name, keys in settings.KEYBOARD_LAYOUTS.items()}
+
+
+def create_control(name: str, seed: int = None):
+    """
+    Returns the controls of a player from their name in the roster.
+
+    Parameters:
+    name (str): a keyboard layout in settings.KEYBOARD_LAYOUTS, GAMEPAD, a bot in bots.BOTS, or None for a player without input.
+    seed (int): the seed of a bot's random decisions.
+    """
+    if name is None:
+        return None
+    if name == GAMEPAD:
+        return GamepadControl()
+    if name in bots.BOTS:
+        return bots.create_bot(name, seed)
+    if name not in KEYBOARD_CONTROLS:
+        raise ValueError("unknown controls: {}".format(name))
+    return KEYBOARD_CONTROLS[name]
+
+
+PLAYER_1_CONTROLS = KEYBOARD_CONTROLS["arrows"]
+
+PLAYER_2_CONTROLS = KEYBOARD_CONTROLS["wasd"]
@@ -4,7 +4,43 @@ import settings
 import sprites
 import spritesheet
 import controls
-import json # uses external Python modules
+import assets
+import simulation
+import renderer
+import profiler
+import audio
+import bots
+import replay
+import netplay
+import argparse
+import os
+import time
+
+# files loaded by every round, also preloaded by the launcher
+BACKGROUND_PATH = "assets/background/night.png"
+FONT_PATH = "assets/font/OpenSans-Regular.ttf"
+FONT_SIZE = 16
+# name -> (path, whether per-pixel transparency is kept); the atlas is used instead when it has the name
+IMAGES = {
+    "bullet": ("assets/bullet/bullet.png", False),
+    "platform": ("assets/platform/platform.png", False),
+    "muzzle_flash": ("assets/misc/muzzle_flash.png", True)
+}
+# name -> (path, volume)
+SOUND_EFFECTS = {
+    "shoot": ("assets/sfx/shooting/plasma_rife_fire.wav", 0.4),
+    "hit": ("assets/sfx/player/hit.wav", 0.6),
+    "jump": ("assets/sfx/movement/jump.wav", 0.8),
+    "step": ("assets/sfx/movement/step.wav", 0.4),
+    "death": ("assets/sfx/player/death.wav", 0.5)
+}
+# (path, volume) of the ambience loop, streamed instead of loaded
+AMBIENCE = ("assets/sfx/ambience/ambience_spacecraft_loop.wav", 0.3)
+# sprite sheets of the player animations, used when the atlas is missing
+SHEET_PATH = "assets/player/{}/{}.png"  # color, animation name
+FRAME_RECTS_PATH = "assets/player/{}.json"  # animation name
+
+SCOREBOARD_MARGIN = 175  # distance of the outermost scoreboards from the sides of the screen
 
 # uses OOP
 
@@ -12,95 +48,127 @@ import json # uses external Python modules
 class Game:
     """A class for a game of Gun Mayhem."""
 
-    def __init__(self, player_1_name="Player 1", player_2_name="Player 2", player_1_color="green", player_2_color="red"):
-        """Initializes pygame."""
+    def __init__(self, roster=None, profile=settings.PROFILER_ENABLED, replay_path=None, replay_speed=1, connection=None, local_player=0):
+        """
+        Initializes pygame.
+
+        Parameters:
+        roster (list[tuple]): the (name, colour, controls) of every player; defaults to settings.ROSTER.
+        profile (bool): whether the frame profiler is enabled.
+        replay_path (str): path of a replay to play back instead of reading the keyboard.
+        replay_speed (int): how many times faster than real time a replay is played back.
+        connection (netplay.Connection): the connection to the peer of an online match.
+        local_player (int): the index of the player controlled from this machine in an online match.
+        """
+        audio.init_mixer()  # before pygame.init(), which would open the mixer in the default format
         pygame.init()
-        pygame.mixer.init()
         self.load_and_set_icon()
-        self.screen = pygame.display.set_mode(
-            (settings.WIDTH, settings.HEIGHT))
+        self.set_display_mode()
         pygame.display.set_caption(settings.TITLE)
         self.clock = pygame.time.Clock()
         self.running = True
-
-        # set player names and colors
-        self.player_1_name = player_1_name
-        self.player_2_name = player_2_name
-        self.player_1_color = player_1_color
-        self.player_2_color = player_2_color
+        self.assets = assets.AssetGroup()
+        self.add_profiler(profile)
+
+        # replay playback
+        self.playback = replay.Replay.load(replay_path) if replay_path else None
+        if self.playback:
+            self.playback.check_settings()
+        self.tick_duration = 1 / (settings.FPS * (replay_speed if self.playback else 1))
+
+        # online versus
+        self.connection = connection
+        self.local_player = local_player
+        self.session = None
+
+        # set player names, colors and controls
+        if roster is None:
+            roster = settings.ROSTER
+        if self.playback:
+            roster = fill_roster(roster, self.playback.player_count)
+        elif connection:
+            roster = fill_roster(roster, 2)  # online matches are one against one
+        if not 1 <= len(roster) <= settings.MAX_PLAYERS:
+            raise ValueError("a game has 1 to {} players".format(settings.MAX_PLAYERS))
+        self.roster = roster
+        # gamepads stay assigned from round to round
+        self.input_state = controls.InputState([controls.create_control(name, index)
+                                                for index, (_, _, name) in enumerate(roster)])
 
     def new(self):
         """Starts a new Gun Mayhem game."""
+        self.setup()
+        self.run()
+
+    def setup(self):
+        """Loads the assets and creates the simulation and sprites of a new game."""
         self.players = pygame.sprite.Group()
         self.platforms = pygame.sprite.Group()
-        self.bullets = pygame.sprite.Group()
-        self.all_sprites = pygame.sprite.Group()
+        self.all_sprites = pygame.sprite.LayeredDirty()
 
+        # release the previous round's assets; they stay cached and are reacquired below
+        self.assets.release_all()
         self.load_images()
         self.load_sfx()
         self.load_font()
+        self.simulation = simulation.Simulation(settings.PLAYER_SPAWNS[:len(self.roster)])
+        self.input_state.attach(self.simulation)
+        self.recording = replay.Replay(len(self.simulation.players))
+        if self.connection:
+            self.session = netplay.RollbackSession(self.simulation, self.local_player, self.connection)
+        self.bullets = sprites.BulletRenderer(self.bullet_image, self.simulation.bullets)
         self.add_platforms()
         self.add_players()
         self.add_scoreboards()
-        self.run()
+        self.add_profiler_overlay()
+        self.renderer = renderer.Renderer(
+            self.screen, self.background, self.platforms, self.all_sprites, self.bullets)
 
     def load_sfx(self):
         """Loads sound files from disk and populates a dictionary object with them."""
         # uses files
-        Sound = pygame.mixer.Sound
+        Sound = self.assets.sound
         self.sfx = {}
 
-        sound = Sound("assets/sfx/shooting/plasma_rife_fire.wav")
-        sound.set_volume(0.4)
-        self.sfx.update({"shoot": sound})
-
-        sound = Sound("assets/sfx/player/hit.wav")
-        sound.set_volume(0.6)
-        self.sfx.update({"hit": sound})
-
-        sound = Sound("assets/sfx/ambience/ambience_spacecraft_loop.wav")
-        sound.set_volume(0.3)
-        self.sfx.update({"ambience": sound})
-
-        sound = Sound("assets/sfx/movement/jump.wav")
-        sound.set_volume(0.8)
-        self.sfx.update({"jump": sound})
-
-        sound = Sound("assets/sfx/movement/step.wav")
-        sound.set_volume(0.4)
-        self.sfx.update({"step": sound})
+        for name, (path, volume) in SOUND_EFFECTS.items():
+            sound = Sound(path)
+            sound.set_volume(volume)
+            self.sfx.update({name: sound})
+        self.audio = audio.SoundMixer(self.sfx)
 
-        sound = Sound("assets/sfx/player/death.wav")
-        sound.set_volume(0.5)
-        self.sfx.update({"death": sound})
-
-    def sfx_shoot(self):
-        sound = self.sfx.get("shoot")
-        sound.play()
+    def play_sfx(self, name: str, player_index: int = None) -> None:
+        """
+        Plays the sound effect called name through the voice-limited mixer.
 
-    def sfx_hit(self):
-        sound = self.sfx.get("hit")
-        sound.play()
+        Parameters:
+        name (str): the key of the sound in self.sfx, e.g. "shoot".
+        player_index (int): the index of the player who made the sound.
+        """
+        self.audio.play(name, player_index)
 
     def loop_ambience(self):
-        sound = self.sfx.get("ambience")
-        sound.play(loops=-1)
+        """Starts streaming the ambience loop unless it is already playing from a previous round."""
+        if not pygame.mixer.music.get_busy():
+            audio.play_music(*AMBIENCE)
 
     def load_and_set_icon(self):
         """Loads surface from image file from disk and sets it as the game icon."""
-        icon = pygame.image.load("assets/icon/icon.png")
+        icon = assets.load_image("assets/icon/icon.png")
         pygame.display.set_icon(icon)
 
     def load_font(self):
         """Loads font from file and sets it to self.font"""
-        self.font = pygame.freetype.Font(
-            "assets/font/OpenSans-Regular.ttf", 16)
+        self.font = self.assets.font(FONT_PATH, FONT_SIZE)
 
     def add_scoreboards(self):
-        """Creates two scoreboard sprites at their proper locations and adds them to the all_sprites group."""
-        self.add_scoreboard(self.player_1, settings.WIDTH -
-                            175, settings.HEIGHT - 20)
-        self.add_scoreboard(self.player_2, 175, settings.HEIGHT - 20)
+        """Creates a scoreboard for every player along the bottom of the screen, in the order of their spawn points."""
+        count = len(self.player_list)
+        margin = min(SCOREBOARD_MARGIN, settings.WIDTH / (2 * count))
+        spacing = (settings.WIDTH - 2 * margin) / (count - 1) if count > 1 else 0
+        order = sorted(self.player_list, key=lambda player: player.state.spawn_point[0])
+        for column, player in enumerate(order):
+            x = margin + spacing * column if count > 1 else settings.WIDTH / 2
+            self.add_scoreboard(player, x, settings.HEIGHT - 20)
 
     def add_scoreboard(self, player: sprites.Player, x: int, y: int) -> None:
         """
@@ -115,8 +183,41 @@ class Game:
             self.font, settings.WHITE, (x, y), player)
         self.all_sprites.add(scoreboard)
 
+    def set_display_mode(self):
+        """Opens the window, synchronized to the display's refresh if frames are paced by vsync."""
+        self.frame_pacing = settings.FRAME_PACING
+        if self.frame_pacing == "vsync":
+            try:
+                self.screen = pygame.display.set_mode((settings.WIDTH, settings.HEIGHT), pygame.SCALED, vsync=1)
+                return
+            except pygame.error:
+                self.frame_pacing = "sleep"  # the video driver cannot wait for vsync
+        self.screen = pygame.display.set_mode(
+            (settings.WIDTH, settings.HEIGHT))
+
+    def add_profiler(self, enabled: bool) -> None:
+        """
+        Creates the frame profiler and instruments the update methods of the simulation and sprites.
+
+        Parameters:
+        enabled (bool): whether the game is profiled.
+        """
+        frame_budget = 1 / settings.RENDER_FPS if settings.RENDER_FPS else 1 / settings.FPS
+        self.profiler = profiler.Profiler(enabled, frame_budget=frame_budget)
+        self.profiler.instrument(simulation.Simulation, "handle_collisions")
+        self.profiler.instrument(sprites.Player, "update")
+        self.profiler.instrument(sprites.Scoreboard, "update")
+
+    def add_profiler_overlay(self):
+        """Creates the profiler overlay and adds it above the other sprites if profiling is enabled."""
+        self.profiler_overlay = None
+        if self.profiler.enabled:
+            self.profiler_overlay = sprites.ProfilerOverlay(
+                self.font, settings.WHITE, (10, 10), self.profiler)
+            self.all_sprites.add(self.profiler_overlay, layer=1)
+
     def add_platforms(self):
-        """Creates and adds platforms to self.platforms and self.all_sprites."""
+        """Creates and adds platforms to self.platforms."""
         for platform_attributes in settings.PLATFORM_LIST:
             coordinates, tile_count = platform_attributes
             platform = sprites.Platform(
@@ -125,7 +226,6 @@ class Game:
                 tile_count
             )
             self.platforms.add(platform)
-            self.all_sprites.add(platform)
 
     def parse_spritesheet_json(self, file_path: str) -> list[pygame.Rect]:
         """
@@ -134,18 +234,7 @@ class Game:
         Parameters:
         file_path (str): path to json file containing spritesheet information.
         """
-        with open(file_path) as f:
-            data = json.load(f)
-        frame_names = tuple(data["frames"].keys())
-
-        # uses arrays
-        rect_list = []
-        for frame_name in frame_names:
-            dimensions = data["frames"][frame_name]["frame"]
-            x, y, w, h = dimensions["x"], dimensions["y"], dimensions["w"], dimensions["h"]
-            rect_list.append(pygame.Rect(x, y, w, h))
-
-        return rect_list
+        return self.assets.frame_rects(file_path)
 
     def get_player_animations(self, color: str = "black") -> sprites.Animation:
         """
@@ -155,11 +244,14 @@ class Game:
         color (str): the color of the player model. Must match file directory name.
         """
 
-        idle_frames = self.get_frames(color, "idle")
-        run_frames = self.get_frames(color, "run")
-        jump_frames = self.get_frames(color, "jump")
-        animation = sprites.Animation(idle_frames, run_frames, jump_frames)
-        return animation
+        def build_animation():
+            idle_frames = self.get_frames(color, "idle")
+            run_frames = self.get_frames(color, "run")
+            jump_frames = self.get_frames(color, "jump")
+            return sprites.Animation(idle_frames, run_frames, jump_frames, self.muzzle_flash)
+
+        # the precomputed frame variants are shared by every round using this color
+        return self.assets.acquire(("animation", color), build_animation)
 
     def get_frames(self, color: str, animation_name: str) -> list[pygame.Surface]:
         """
@@ -170,56 +262,79 @@ class Game:
         animation_name (str): the name of the animation (eg. "run"). Must match file name.
         """
 
-        image = pygame.image.load(
-            "assets/player/{}/{}.png".format(color, animation_name))
-        sheet = spritesheet.Spritesheet(image)
+        if self.atlas:
+            frames = self.atlas.frames(color, animation_name)
+            if frames:
+                return frames
+
+        sheet = spritesheet.Spritesheet.load(
+            SHEET_PATH.format(color, animation_name), self.assets)
         rect_list = self.parse_spritesheet_json(
-            "assets/player/{}.json".format(animation_name))
+            FRAME_RECTS_PATH.format(animation_name))
         frames = sheet.get_frames(rect_list)
         return frames
 
     def add_players(self):
-        """Creates and adds the players to self.players and self.all_sprites."""
-
-        player_1_animations = self.get_player_animations(
-            self.player_1_color)
-        player_2_animations = self.get_player_animations(
-            self.player_2_color)
-
-        self.player_1 = sprites.Player(
-            name=self.player_1_name,
-            controls=controls.PLAYER_1_CONTROLS,
-            spawn_point=settings.PLAYER_1_SPAWN_POINT,
-            animation=player_1_animations,
-            direction=settings.PLAYER_1_SPAWN_DIRECTION,
-            muzzle_flash=self.muzzle_flash,
-            sfx=self.sfx
-        )
-
-        self.player_2 = sprites.Player(
-            name=self.player_2_name,
-            controls=controls.PLAYER_2_CONTROLS,
-            spawn_point=settings.PLAYER_2_SPAWN_POINT,
-            animation=player_2_animations,
-            direction=settings.PLAYER_2_SPAWN_DIRECTION,
-            muzzle_flash=self.muzzle_flash,
-            sfx=self.sfx
-        )
-
-        self.players.add(self.player_1)
-        self.all_sprites.add(self.player_1)
-        self.players.add(self.player_2)
-        self.all_sprites.add(self.player_2)
+        """Creates a player for every roster entry and adds them to self.players and self.all_sprites."""
+        self.player_list = []  # in roster order, the order of the simulated players and their inputs
+        for index, (name, color, _) in enumerate(self.roster):
+            player = sprites.Player(
+                name=name,
+                controls=self.input_state.control_list[index],
+                state=self.simulation.players[index],
+                animation=self.get_player_animations(color)
+            )
+            self.player_list.append(player)
+            self.players.add(player)
+            self.all_sprites.add(player)
 
     def run(self):
-        """Starts the game loop."""
+        """
+        Starts the game loop.
+
+        The simulation advances in fixed ticks of 1 / settings.FPS seconds, as many per frame as
+        the time since the last frame allows, while frames are drawn at settings.RENDER_FPS with
+        moving objects placed between their last two simulated positions.
+        """
         self.loop_ambience()
         self.playing = True
+        self.input_state.sync(pygame.key.get_pressed())
+        lag = self.tick_duration  # simulated time owed to the real clock; the first frame shows a tick
+        last_frame = time.perf_counter()
         while self.playing:
-            self.clock.tick(settings.FPS)
-            self.handle_events()
-            self.update()
-            self.render()
+            self.pace_frame()
+            self.profiler.begin_frame()
+            now = time.perf_counter()
+            lag += min(now - last_frame, settings.MAX_FRAME_TIME)  # after a stall, skip time instead of catching up
+            last_frame = now
+            with self.profiler.measure("handle_events"):
+                self.handle_events()
+            with self.profiler.measure("update"):
+                while lag >= self.tick_duration and self.playing:
+                    self.update()
+                    lag -= self.tick_duration
+            alpha = min(lag / self.tick_duration, 1.0) if settings.INTERPOLATION else 1.0
+            with self.profiler.measure("render"):
+                self.render(alpha)
+            self.profiler.end_frame()
+        self.save_recording()
+
+    def pace_frame(self):
+        """Waits until the next frame is due."""
+        if self.frame_pacing == "vsync" or not settings.RENDER_FPS:
+            self.clock.tick()  # presenting the frame waits for vsync, if at all
+        elif self.frame_pacing == "busy_loop":
+            self.clock.tick_busy_loop(settings.RENDER_FPS)  # spins instead of sleeping, to the millisecond
+        else:
+            self.clock.tick(settings.RENDER_FPS)
+
+    def save_recording(self):
+        """Saves the inputs of the round as a replay file if recording is enabled."""
+        if not settings.REPLAY_RECORDING or self.playback or self.session or not len(self.recording):
+            return
+        os.makedirs(settings.REPLAY_DIRECTORY, exist_ok=True)
+        file_name = time.strftime("%Y%m%d-%H%M%S") + ".gmr"
+        self.recording.save(os.path.join(settings.REPLAY_DIRECTORY, file_name))
 
     def handle_events(self):
         """Handles pygame events."""
@@ -230,107 +345,144 @@ class Game:
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.playing = False # restart game
-                else:
-                    for player in self.players:
-                        if event.key == player.controls.SHOOT:
-                            self.fire_bullet(player)
-
-    def fire_bullet(self, player: sprites.Player) -> None:
-        """
-        Creates a bullet on the screen and adds recoil effect to the player.
-
-        Parameters:
-        player (sprites.Player): the player that shot the bullet.
-        """
-
-        player.shooting = True
-        self.add_bullet(player)
-        self.sfx_shoot()
-        self.add_recoil(player)
+                    if self.session:
+                        self.running = False  # an online round cannot restart on one side only
+                elif event.key == settings.PROFILER_OVERLAY_KEY and self.profiler_overlay:
+                    self.profiler_overlay.toggle()
+                elif self.input_state.handle_event(event):
+                    self.profiler.input_received()
+            elif event.type == pygame.WINDOWFOCUSGAINED:
+                # keys released while another window had focus sent no events here
+                self.input_state.sync(pygame.key.get_pressed())
+            elif self.input_state.handle_event(event):
+                self.profiler.input_received()
+
+    def get_inputs(self) -> list[int]:
+        """Returns the input bitfield of every player for the current tick."""
+        if self.playback:
+            return self.get_playback_inputs()
+        return self.input_state.snapshot()
+
+    def get_playback_inputs(self) -> list[int]:
+        """Returns the recorded inputs of the current tick, or None and ends the game after the last one."""
+        tick = self.simulation.tick
+        if tick >= len(self.playback):
+            self.playing = False
+            self.running = False
+            return None
+        return list(self.playback.inputs[tick])
 
-    def add_recoil(self, player: sprites.Player) -> None:
+    def load_images(self):
+        """Loads necessary images from file, converts them to surfaces, and stores them in appropriate variables."""
+        self.atlas = None
+        if assets.exists(settings.ATLAS_PATH):
+            self.atlas = self.assets.atlas(settings.ATLAS_PATH)
+        self.bullet_image = self.get_image("bullet")
+        self.platform_image = self.get_image("platform")
+        self.background = self.assets.image(BACKGROUND_PATH)
+        self.muzzle_flash = self.get_image("muzzle_flash")
+
+    def get_image(self, name: str) -> pygame.Surface:
         """
-        Changes the velocity of the player according to the recoil settings.
+        Returns an image from the texture atlas, or loaded from its own file if the atlas does not have it.
 
         Parameters:
-        player (sprites.Player): the player to add the recoil effect to.
+        name (str): the key of the image in IMAGES, which is also its name in the atlas.
         """
+        if self.atlas and name in self.atlas:
+            return self.atlas.image(name)
+        path, alpha = IMAGES[name]
+        return self.assets.image(path, alpha)
 
-        if player.direction == "left":
-            player.vel.x += settings.GUN_RECOIL
+    def update(self):
+        """Steps the simulation and updates all sprites."""
+        inputs = self.get_inputs()
+        if inputs is None:
+            return  # the replay has ended
+        if self.session:
+            events = self.session.advance(inputs[self.local_player])
+            if events is None:
+                return  # waiting for the peer
         else:
-            player.vel.x += -settings.GUN_RECOIL
+            if settings.REPLAY_RECORDING and not self.playback:
+                self.recording.record(inputs)
+            events = self.simulation.step(inputs)
+        self.profiler.inputs_simulated()
+        for name, player_index in events:
+            self.play_sfx(name, player_index)
+        self.all_sprites.update()
 
-    def load_images(self):
-        """Loads necessary images from file, converts them to surfaces, and stores them in appropriate variables."""
-        self.bullet_image = pygame.image.load(
-            "assets/bullet/bullet.png").convert()
-        self.platform_image = pygame.image.load(
-            "assets/platform/platform.png").convert()
-        self.background = pygame.image.load(
-            "assets/background/night.png").convert()
-        self.muzzle_flash = pygame.image.load(
-            "assets/misc/muzzle_flash.png").convert_alpha()
-
-    def add_bullet(self, player: sprites.Player) -> None:
+    def render(self, alpha: float = 1.0):
         """
-        Creates a bullet on the screen with the appropriate velocity.
+        Renders a single frame to the display.
 
         Parameters:
-        player (sprites.Player): the player that shot the bullet.
+        alpha (float): the fraction of a tick elapsed since the last tick, from 0 to 1.
         """
-        x_vel = settings.BULLET_SPEED + player.vel.x
-        if player.direction == "left":
-            x_vel = -settings.BULLET_SPEED + player.vel.x
-        bullet = sprites.Bullet(player.pos, x_vel, self.bullet_image, player)
-
-        self.bullets.add(bullet)
-        self.all_sprites.add(bullet)
-
-    def update(self):
-        """Updates all sprites."""
-        self.all_sprites.update()
-        self.handle_collisions()
-
-    def handle_collisions(self):
-        """Checks and handles player collisions with platforms and bullets."""
         for player in self.players:
-            platform_collisions = pygame.sprite.spritecollide(
-                player, self.platforms, False, pygame.sprite.collide_mask)
-            if platform_collisions:
-                platform = platform_collisions[0]
-                if player.falling:
-                    player.vel.y = 0
-                    player.standing = True
-                    # offset due to sprite feet being above the bottom of the image
-                    player.pos.y = platform.rect.top + settings.PLAYER_OFFSET
-            else:
-                player.standing = False
-
-            bullet_collisions = pygame.sprite.spritecollide(
-                player, self.bullets, True, pygame.sprite.collide_mask)
-
-            if bullet_collisions:
-                bullet = bullet_collisions[0]
-                if bullet.author != player:
-                    player.vel.x += bullet.vel.x * settings.KNOCKBACK_MULTIPLIER
-                    self.sfx_hit()
-
-    def render(self):
-        """Renders a single frame to the display."""
-        self.screen.blit(self.background, (0, 0))
-
-        self.all_sprites.draw(self.screen)
-
-        pygame.display.flip()
+            player.interpolate(alpha)
+        self.renderer.render(alpha)
+        self.profiler.frame_presented()
 
     def quit(self):
         """Close pygame."""
+        if self.profiler.enabled:
+            self.profiler.export(settings.PROFILER_EXPORT_PATH)
+            self.profiler.restore()
+        self.assets.release_all()
+        assets.cache.clear()  # cached surfaces and sounds are invalid once pygame quits
+        sprites.render_text.cache_clear()
+        if self.connection:
+            self.connection.close()
         pygame.quit()
 
 
+def fill_roster(roster: list[tuple], player_count: int) -> list[tuple]:
+    """
+    Returns the first player_count players of roster, adding players with the unused keyboard layouts,
+    then gamepads, if it is too short.
+
+    Parameters:
+    roster (list[tuple]): the (name, colour, controls) of every player.
+    player_count (int): the number of players to return.
+    """
+    roster = list(roster[:player_count])
+    used_layouts = {layout for name, color, layout in roster}
+    free_layouts = [layout for layout in settings.KEYBOARD_LAYOUTS if layout not in used_layouts]
+    for index in range(len(roster), player_count):
+        color = settings.PLAYER_COLORS[index % len(settings.PLAYER_COLORS)]
+        layout = free_layouts.pop(0) if free_layouts else controls.GAMEPAD
+        roster.append(("Player {}".format(index + 1), color, layout))
+    return roster
+
+
 def main():
-    game = Game()
+    parser = argparse.ArgumentParser(description=settings.TITLE)
+    parser.add_argument("--players", type=int, choices=range(1, settings.MAX_PLAYERS + 1),
+                        help="the number of local players, added to or taken from the roster in settings.py")
+    parser.add_argument("--bot", action="append", default=[], choices=sorted(bots.BOTS),
+                        help="add a bot player; repeat for more bots")
+    parser.add_argument("--replay", help="play back a recorded replay file")
+    parser.add_argument("--speed", type=int, default=1, help="replay playback speed, as a multiple of real time")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="play online against the peer at this address")
+    parser.add_argument("--port", type=int, default=settings.NETPLAY_PORT, help="local port of an online match")
+    parser.add_argument("--player", type=int, choices=(1, 2), default=1, help="the player controlled on this machine")
+    parser.add_argument("--latency", type=float, default=0, help="simulated one-way latency in seconds, for testing")
+    parser.add_argument("--loss", type=float, default=0, help="simulated packet loss probability, for testing")
+    arguments = parser.parse_args()
+
+    connection = None
+    if arguments.connect:
+        host, port = arguments.connect.rsplit(":", 1)
+        connection = netplay.Connection(("", arguments.port), (host, int(port)),
+                                        latency=arguments.latency, loss=arguments.loss)
+
+    roster = fill_roster(settings.ROSTER, arguments.players) if arguments.players else list(settings.ROSTER)
+    for bot_name in arguments.bot:
+        color = settings.PLAYER_COLORS[len(roster) % len(settings.PLAYER_COLORS)]
+        roster.append(("Bot {}".format(len(roster) + 1), color, bot_name))
+    game = Game(roster, replay_path=arguments.replay, replay_speed=arguments.speed,
+                connection=connection, local_player=arguments.player - 1)
     while game.running:
         game.new()
     game.quit()
@@ -0,0 +1,130 @@
+import pygame
+import settings
+import assets
+import spritesheet
+import functools
+import math
+import os
+import zlib
+
+# collision masks of every player frame, built from the sprite sheets the first time a player
+# collides rather than at import, so tools that only import the simulation skip decoding them;
+# loading images and building masks needs no display, so the headless simulation tests bullets
+# and platforms against the same opaque pixels the game draws. Every colour shares the
+# silhouette of settings.PLAYER_HITMASK_COLOR.
+
+SHEET_PATH = "assets/player/{}/{}.png"  # color, animation name
+FRAME_RECTS_PATH = "assets/player/{}.json"  # animation name
+MUZZLE_FLASH_PATH = "assets/misc/muzzle_flash.png"
+ANIMATIONS = ("idle", "run", "jump")
+# tools such as tournament.py import the simulation from outside the game directory
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def asset_path(path: str) -> str:
+    """Returns path as the asset functions find it, from the pack or the working directory if they have it."""
+    return path if assets.exists(path) else os.path.join(DIRECTORY, path)
+
+
+def pixel(value: float) -> int:
+    """Returns the pixel a coordinate falls on, rounding like pygame.Rect does when the sprite is placed."""
+    return math.floor(value + 0.5)
+
+
+def blit_muzzle_flash(image: pygame.Surface, muzzle_flash: pygame.Surface, name: str) -> pygame.Surface:
+    """
+    Returns a copy of image with the muzzle flash blitted at the gun's location.
+
+    Parameters:
+    image (pygame.Surface): the frame to draw the muzzle flash on.
+    muzzle_flash (pygame.Surface): the image of the muzzle flash.
+    name (str): the name of the animation the frame belongs to.
+    """
+    image = image.copy()
+    # calculate offset to determine where to blit the muzzle flash
+    x_offset = settings.MUZZLE_FLASH_OFFSET_X
+    y_offset = settings.MUZZLE_FLASH_OFFSET_Y
+    if name == "run":
+        # the gun sits lower in the run animation
+        y_offset += settings.MUZZLE_FLASH_RUNNING_OFFSET_Y
+    image.blit(muzzle_flash, (x_offset, y_offset))
+    return image
+
+
+class FrameMask:
+    """The collision mask of a player frame and the bounding box of its opaque pixels."""
+
+    __slots__ = ("mask", "width", "height", "left", "top", "right", "bottom")
+
+    def __init__(self, image: pygame.Surface) -> None:
+        """
+        Initializes the FrameMask object.
+
+        Parameters:
+        image (pygame.Surface): the frame, with transparent pixels keyed out.
+        """
+        self.mask = pygame.mask.from_surface(image)
+        self.width, self.height = image.get_size()
+        rects = self.mask.get_bounding_rects()
+        bounds = rects[0].unionall(rects[1:])
+        # edges of the opaque pixels relative to the player's position, the midbottom of the image
+        self.left = bounds.left - self.width // 2
+        self.top = bounds.top - self.height
+        self.right = bounds.right - self.width // 2
+        self.bottom = bounds.bottom - self.height
+
+    def overlaps(self, x: float, y: float, left: float, top: float, right: float, bottom: float) -> bool:
+        """
+        Returns True if an opaque pixel of the frame drawn at (x, y) lies inside the box.
+
+        Parameters:
+        x, y (float): the player's position.
+        left, top, right, bottom (float): the edges of the box.
+        """
+        box_left, box_top = pixel(left), pixel(top)
+        width = max(pixel(right) - box_left, 1)
+        height = max(pixel(bottom) - box_top, 1)
+        offset = (box_left - pixel(x) + self.width // 2, box_top - pixel(y) + self.height)
+        return self.mask.overlap(solid_mask(width, height), offset) is not None
+
+
+@functools.lru_cache(maxsize=None)
+def solid_mask(width: int, height: int) -> pygame.mask.Mask:
+    """Returns a mask with every bit set; platforms and bullets are solid, so they are tested as boxes."""
+    return pygame.mask.Mask((width, height), fill=True)
+
+
+@functools.lru_cache(maxsize=None)
+def load() -> tuple:
+    """
+    Returns (masks, checksum): the FrameMask of every (animation name, frame index, facing left, shooting)
+    frame of a player, and a checksum of the masks, the same whether they come from the pack or loose files.
+    """
+    color = settings.PLAYER_HITMASK_COLOR
+    muzzle_flash = assets.decode_image(asset_path(MUZZLE_FLASH_PATH))
+    masks = {}
+    for name in ANIMATIONS:
+        sheet = assets.decode_image(asset_path(SHEET_PATH.format(color, name)))
+        rects = assets.decode_frame_rects(asset_path(FRAME_RECTS_PATH.format(name)))
+        frames = spritesheet.Spritesheet(sheet).get_frames(rects)
+        for index, frame in enumerate(frames):
+            for shooting in (False, True):
+                shot_frame = blit_muzzle_flash(frame, muzzle_flash, name) if shooting else frame
+                for facing_left in (False, True):
+                    image = pygame.transform.flip(shot_frame, True, False) if facing_left else shot_frame
+                    masks[(name, index, facing_left, shooting)] = FrameMask(image)
+
+    checksum = 0
+    for key in sorted(masks):
+        checksum = zlib.crc32(pygame.image.tobytes(masks[key].mask.to_surface(), "RGB"), checksum)
+    return masks, checksum
+
+
+def get_masks() -> dict:
+    """Returns the FrameMask of every player frame, loading them on the first call."""
+    return load()[0]
+
+
+def get_checksum() -> int:
+    """Returns the checksum of the player frame masks, loading them on the first call."""
+    return load()[1]
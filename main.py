@@ -6,6 +6,9 @@
 import tkinter as tk
 from tkinter.ttk import *
 import game
+import assets
+import preload
+import settings
 
 
 class Launcher(tk.Tk):
@@ -20,7 +23,7 @@ class Launcher(tk.Tk):
         # embed the title image into the first row
         canvas = tk.Canvas(width=562, height=101)
         canvas.grid(row=0, column=0, columnspan=2, padx=20, pady=15)
-        self.image = tk.PhotoImage(file="assets/launcher/title.gif")
+        self.image = tk.PhotoImage(data=assets.read_file("assets/launcher/title.gif"))
         canvas.create_image(0, 0, anchor="nw", image=self.image)
 
         # labels for player 1 controls
@@ -58,7 +61,7 @@ class Launcher(tk.Tk):
 
         # player color input
         # options
-        color_options = ("Black", "Blue", "Green", "Red", "Yellow")
+        color_options = tuple(color.capitalize() for color in settings.PLAYER_COLORS)
         # variables to store selected option
         self.player_1_color_variable = tk.StringVar()
         self.player_2_color_variable = tk.StringVar()
@@ -79,6 +82,12 @@ class Launcher(tk.Tk):
         self.player_2_color_input.grid(row=10, column=1)
         self.player_2_color_input.configure(width=15) # set menu width
 
+        # decode the assets while the players fill in the launcher, selected colours first
+        self.preloader = preload.Preloader()
+        self.preloader.start(self.get_colors())
+        self.player_1_color_variable.trace_add("write", self.on_color_change)
+        self.player_2_color_variable.trace_add("write", self.on_color_change)
+
         # launch and exit buttons
         Button(text="Launch", command=self.run_game).grid(
             row=11, column=0, sticky="e", pady=15)
@@ -86,21 +95,34 @@ class Launcher(tk.Tk):
         Button(text="Exit", command=self.quit).grid(
             row=11, column=1, sticky="w", pady=15)
 
-    def get_input(self) -> tuple[str]:
-        """Gets the input from the user Entry and OptionMenu objects and returns a tuple of the player names and colors."""
+    def get_roster(self) -> list[tuple]:
+        """Returns the roster from settings.py with the names and colors of the first two players from the Entry and OptionMenu objects."""
         player_1_name = self.player_1_name_input.get()
         player_2_name = self.player_2_name_input.get()
-        player_1_color = self.player_1_color_variable.get().lower()
-        player_2_color = self.player_2_color_variable.get().lower()
+        player_1_color, player_2_color = self.get_colors()[:2]
+
+        player_1_layout = settings.ROSTER[0][2]
+        player_2_layout = settings.ROSTER[1][2]
+        return [(player_1_name, player_1_color, player_1_layout),
+                (player_2_name, player_2_color, player_2_layout)] + settings.ROSTER[2:]
+
+    def get_colors(self) -> list[str]:
+        """Returns the colors currently selected for the players, followed by those of the other players in the roster."""
+        return [self.player_1_color_variable.get().lower(), self.player_2_color_variable.get().lower()] + \
+            [color for name, color, layout in settings.ROSTER[2:]]
 
-        return player_1_name, player_2_name, player_1_color, player_2_color
+    def on_color_change(self, *args):
+        """Preloads the assets of a newly selected color before the others."""
+        self.preloader.prioritize(self.get_colors())
 
     def run_game(self):
-        args = self.get_input()
+        roster = self.get_roster()
+        # the game takes what was preloaded for its players; the other colours are dropped
+        self.preloader.shutdown([color for name, color, layout in roster])
         self.destroy()  # close launcher
 
         # new game
-        g = game.Game(*args)
+        g = game.Game(roster)
         while g.running:
             g.new()
         g.quit()
@@ -0,0 +1,290 @@
+# Platform navigation graph for bots. Finds which platforms a player can reach from which,
+# and with what run-up and timing, by playing scripted jumps through the simulation from
+# every point along every platform. Bots look jumps and routes up in constant time instead
+# of simulating trajectories while they play. Graphs are cached on disk per map and physics
+# settings; the first bot to need one builds it, or build it ahead of time:
+#     python navigation.py
+
+import argparse
+import logging
+import os
+import struct
+import time
+import zlib
+import settings
+import simulation
+import replay
+import hitmasks
+
+NAV_MAGIC = b"GMNV"
+NAV_VERSION = 1
+# magic, version, graph key, jump count
+NAV_HEADER = struct.Struct("<4sBIH")
+# source, target, start x, facing left, run-up ticks, jumps, steers, ticks until landing
+NAV_JUMP = struct.Struct("<2Bd2B2?H")
+
+# settings of the builder itself, which change the graph too
+BUILD_SETTINGS = ("NAV_SAMPLE_SPACING", "NAV_RUN_UPS", "NAV_MAX_JUMP_TICKS")
+
+log = logging.getLogger(__name__)
+
+graphs = {}  # graph key -> NavigationGraph, shared by every bot of the process
+# the cache lives in the game directory whatever the working directory is
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+class Jump:
+    """A way from one platform to another: where to stand, which way to run, when to jump and how long it takes."""
+
+    __slots__ = ("source", "target", "start_x", "direction", "run_up", "jump", "steer", "ticks")
+
+    def __init__(self, source: int, target: int, start_x: float, direction: str, run_up: int,
+                 jump: bool, steer: bool, ticks: int) -> None:
+        """
+        Initializes the Jump object.
+
+        Parameters:
+        source (int): the index of the platform the jump starts from.
+        target (int): the index of the platform it lands on.
+        start_x (float): where the player stands still before running.
+        direction (str): "left" or "right".
+        run_up (int): the number of ticks the player runs before jumping.
+        jump (bool): whether the player jumps, or runs off the edge.
+        steer (bool): whether the player keeps running in the air.
+        ticks (int): the number of ticks from the start of the run to the landing.
+        """
+        self.source = source
+        self.target = target
+        self.start_x = start_x
+        self.direction = direction
+        self.run_up = run_up
+        self.jump = jump
+        self.steer = steer
+        self.ticks = ticks
+
+
+def jump_inputs(jump: Jump, elapsed: int, airborne: bool) -> int:
+    """
+    Returns the inputs of one tick of a jump; used both to build the graph and to follow it.
+
+    Parameters:
+    jump (Jump): the jump.
+    elapsed (int): the number of ticks since the jump started.
+    airborne (bool): whether the player has left the ground since the jump started.
+    """
+    move = simulation.LEFT if jump.direction == "left" else simulation.RIGHT
+    if not airborne:
+        if elapsed < jump.run_up or not jump.jump:
+            return move
+        return move | simulation.UP
+    return move if jump.steer else 0
+
+
+def graph_key(platform_list: list[tuple]) -> int:
+    """Returns a checksum of the map, of the settings and frames that change how players move and of the builder settings."""
+    names = replay.PHYSICS_SETTINGS + BUILD_SETTINGS
+    values = repr((platform_list, [(name, getattr(settings, name)) for name in names]))
+    return zlib.crc32(values.encode(), hitmasks.get_checksum())
+
+
+def standing_platform(sim: simulation.Simulation, player: simulation.PlayerState) -> int:
+    """Returns the index of the platform player stands on, or None."""
+    if not player.standing:
+        return None
+    platform = sim.get_platform_collision(player, player.hitbox())
+    return sim.platforms.index(platform) if platform is not None else None
+
+
+def try_jump(sim: simulation.Simulation, start_state: bytes, jump: Jump) -> int:
+    """
+    Plays a jump from a saved state and returns the number of ticks until it lands on another platform.
+
+    Sets jump.target to the platform landed on; returns None if the player lands back on the
+    source platform, falls into the void or is still in the air after NAV_MAX_JUMP_TICKS.
+    """
+    sim.load_state(start_state)
+    player = sim.players[0]
+    airborne = False
+    for elapsed in range(settings.NAV_MAX_JUMP_TICKS):
+        events = sim.step([jump_inputs(jump, elapsed, airborne)])
+        if events and any(name == "death" for name, _ in events):
+            return None
+        if not player.standing:
+            airborne = True
+        elif airborne:
+            target = standing_platform(sim, player)
+            if target is None or target == jump.source:
+                return None
+            jump.target = target
+            return elapsed + 1
+    return None
+
+
+class NavigationGraph:
+    """Which platforms can be reached from which, with the fastest jump between each pair and routes over several."""
+
+    def __init__(self, jumps: list[Jump]) -> None:
+        """
+        Initializes the NavigationGraph object.
+
+        Parameters:
+        jumps (list[Jump]): the fastest jump from every platform to every platform it reaches.
+        """
+        self.jumps = {(jump.source, jump.target): jump for jump in jumps}  # (source, target) -> Jump
+        self.neighbours = {}  # source -> targets reachable with one jump
+        for source, target in self.jumps:
+            self.neighbours.setdefault(source, []).append(target)
+        self.next_hop = self.find_routes()  # (source, target) -> the platform to jump to first
+
+    def find_routes(self) -> dict:
+        """Returns the first platform of the fastest route between every pair of connected platforms."""
+        platforms = sorted({platform for pair in self.jumps for platform in pair})
+        # Floyd-Warshall over jump durations; the graph has one node per platform
+        cost = {pair: jump.ticks for pair, jump in self.jumps.items()}
+        next_hop = {pair: pair[1] for pair in self.jumps}
+        for middle in platforms:
+            for source in platforms:
+                first = cost.get((source, middle))
+                if first is None:
+                    continue
+                for target in platforms:
+                    second = cost.get((middle, target))
+                    if second is None or source == target:
+                        continue
+                    if first + second < cost.get((source, target), float("inf")):
+                        cost[(source, target)] = first + second
+                        next_hop[(source, target)] = next_hop[(source, middle)]
+        return next_hop
+
+    def jump(self, source: int, target: int) -> Jump:
+        """Returns the fastest jump from platform source straight to platform target, or None."""
+        return self.jumps.get((source, target))
+
+    def route(self, source: int, target: int) -> Jump:
+        """Returns the first jump of the fastest route from platform source to platform target, or None."""
+        hop = self.next_hop.get((source, target))
+        return None if hop is None else self.jumps[(source, hop)]
+
+    def to_bytes(self, key: int) -> bytes:
+        """Returns the graph in the binary cache format."""
+        data = bytearray(NAV_HEADER.pack(NAV_MAGIC, NAV_VERSION, key, len(self.jumps)))
+        for jump in self.jumps.values():
+            data += NAV_JUMP.pack(jump.source, jump.target, jump.start_x, jump.direction == "left",
+                                  jump.run_up, jump.jump, jump.steer, jump.ticks)
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, key: int) -> "NavigationGraph":
+        """Returns the graph stored in data; raises ValueError if it is not the graph of key."""
+        magic, version, stored_key, count = NAV_HEADER.unpack_from(data)
+        if magic != NAV_MAGIC or version != NAV_VERSION or stored_key != key:
+            raise ValueError("not a navigation graph of this map and these settings")
+        jumps = []
+        for source, target, start_x, left, run_up, jumps_up, steer, ticks in NAV_JUMP.iter_unpack(
+                data[NAV_HEADER.size:NAV_HEADER.size + count * NAV_JUMP.size]):
+            jumps.append(Jump(source, target, start_x, "left" if left else "right", run_up, jumps_up, steer, ticks))
+        return cls(jumps)
+
+
+def build(platform_list: list[tuple] = None) -> NavigationGraph:
+    """
+    Plays every scripted jump from every sample point of every platform and returns the graph of the fastest ones.
+
+    Parameters:
+    platform_list (list[tuple]): a (coordinates, tile_count) tuple for every platform.
+    """
+    if platform_list is None:
+        platform_list = settings.PLATFORM_LIST
+    boxes = [simulation.PlatformState(coordinates, tile_count).box for coordinates, tile_count in platform_list]
+    fastest = {}  # (source, target) -> Jump
+    for source, box in enumerate(boxes):
+        x = box.left + settings.NAV_SAMPLE_SPACING / 2
+        while x < box.right:
+            for direction in ("left", "right"):
+                sim = simulation.Simulation([((x, box.top + settings.PLAYER_OFFSET), direction)],
+                                            platform_list, bullet_pool_size=1)
+                sim.step([0])  # land on the platform
+                if standing_platform(sim, sim.players[0]) != source:
+                    continue
+                start_state = sim.save_state()
+                plans = [(0, False, steer) for steer in (True, False)]
+                plans += [(run_up, True, steer) for run_up in settings.NAV_RUN_UPS for steer in (True, False)]
+                for run_up, jumps_up, steer in plans:
+                    jump = Jump(source, None, x, direction, run_up, jumps_up, steer, 0)
+                    ticks = try_jump(sim, start_state, jump)
+                    if ticks is None:
+                        continue
+                    jump.ticks = ticks
+                    best = fastest.get((source, jump.target))
+                    if best is None or (ticks, run_up) < (best.ticks, best.run_up):
+                        fastest[(source, jump.target)] = jump
+            x += settings.NAV_SAMPLE_SPACING
+    return NavigationGraph(list(fastest.values()))
+
+
+def get_graph(platform_list: list[tuple] = None) -> NavigationGraph:
+    """
+    Returns the navigation graph of a map under the current settings, from memory, the disk cache, or built.
+
+    Parameters:
+    platform_list (list[tuple]): a (coordinates, tile_count) tuple for every platform.
+    """
+    if platform_list is None:
+        platform_list = settings.PLATFORM_LIST
+    key = graph_key(platform_list)
+    graph = graphs.get(key)
+    if graph is not None:
+        return graph
+
+    directory = os.path.join(DIRECTORY, settings.NAV_CACHE_DIRECTORY)
+    path = os.path.join(directory, "{:08x}.nav".format(key))
+    try:
+        with open(path, "rb") as f:
+            graph = NavigationGraph.from_bytes(f.read(), key)
+    except (OSError, ValueError, struct.error):
+        graph = build(platform_list)
+        save_graph(graph, key, directory, path)
+    graphs[key] = graph
+    return graph
+
+
+def save_graph(graph: NavigationGraph, key: int, directory: str, path: str) -> bool:
+    """
+    Writes a graph to the disk cache and returns True if it could.
+
+    The cache only saves building the graph again; a read-only install keeps the graph in memory.
+    """
+    # other processes may be building the same graph; the rename replaces the file in one step
+    temporary_path = "{}.{}".format(path, os.getpid())
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(temporary_path, "wb") as f:
+            f.write(graph.to_bytes(key))
+        os.replace(temporary_path, path)
+        return True
+    except OSError as error:
+        log.warning("navigation graph not cached: %s", error)
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds the navigation graph bots use on the map in settings.py.")
+    parser.parse_args()
+
+    start = time.perf_counter()
+    graph = get_graph()
+    print("{} jumps between {} platforms in {:.2f} s".format(
+        len(graph.jumps), len(settings.PLATFORM_LIST), time.perf_counter() - start))
+    for (source, target), jump in sorted(graph.jumps.items()):
+        print("{} -> {}: from x={:.0f} {} {}, {} ticks".format(
+            source, target, jump.start_x, jump.direction,
+            "run {} ticks and jump".format(jump.run_up) if jump.jump else "walk off",
+            jump.ticks))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+import settings
+import simulation
+import argparse
+import heapq
+import random
+import socket
+import struct
+import time
+import zlib
+
+# peer-to-peer versus play: every peer runs the full simulation and only input bitfields are exchanged.
+# remote inputs that have not arrived yet are predicted, and when the real input differs the
+# simulation is rolled back to the mispredicted tick and re-simulated with save_state()/load_state()
+
+# packet layout (little endian):
+#   header: magic, ack (the next tick the sender is missing from the receiver), first tick, input count
+#   body: one byte per input, the sender's inputs for the ticks first..first + count - 1
+MAGIC = b"GMNP"
+PACKET_HEADER = struct.Struct("<4sIIB")
+MAX_PACKET_INPUTS = 255
+
+
+class Connection:
+    """A non-blocking UDP connection to one peer, with optional simulated latency and packet loss."""
+
+    def __init__(self, local_address: tuple, remote_address: tuple, latency: float = 0, jitter: float = 0,
+                 loss: float = 0, seed: int = None, clock=time.monotonic) -> None:
+        """
+        Initializes the Connection object.
+
+        Parameters:
+        local_address (tuple): the (host, port) to receive packets on.
+        remote_address (tuple): the (host, port) of the peer.
+        latency (float): seconds every outgoing packet is held back, to simulate a slow network.
+        jitter (float): the largest random deviation from latency in seconds.
+        loss (float): the probability an outgoing packet is dropped.
+        seed (int): the seed of the loss and jitter random number generator.
+        clock (function): returns the current time in seconds.
+        """
+        self.remote_address = remote_address
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(local_address)
+        self.socket.setblocking(False)
+
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.delayed = []  # heap of (send time, sequence number, packet)
+        self.sequence = 0
+        self.sent_count = 0
+        self.dropped_count = 0
+
+    def send(self, packet: bytes) -> None:
+        """Sends packet to the peer, or queues it if latency is simulated."""
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped_count += 1
+            return
+        if not self.latency and not self.jitter:
+            self.send_now(packet)
+            return
+        delay = max(0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+        heapq.heappush(self.delayed, (self.clock() + delay, self.sequence, packet))
+        self.sequence += 1
+
+    def send_now(self, packet: bytes) -> None:
+        """Sends packet to the peer immediately."""
+        try:
+            self.socket.sendto(packet, self.remote_address)
+            self.sent_count += 1
+        except OSError:
+            pass  # UDP is unreliable anyway; the input is resent with the next packet
+
+    def flush(self) -> None:
+        """Sends the queued packets whose simulated latency has passed."""
+        now = self.clock()
+        while self.delayed and self.delayed[0][0] <= now:
+            self.send_now(heapq.heappop(self.delayed)[2])
+
+    def receive(self) -> list[bytes]:
+        """Returns every packet received since the last call."""
+        self.flush()
+        packets = []
+        while True:
+            try:
+                packet, address = self.socket.recvfrom(2048)
+            except BlockingIOError:
+                return packets
+            except ConnectionResetError:
+                continue  # the peer is not listening yet (reported by Windows)
+            packets.append(packet)
+
+    def close(self) -> None:
+        """Closes the socket; queued packets are discarded."""
+        self.socket.close()
+
+
+class RollbackSession:
+    """Steps a simulation with local input and predicted, later corrected, input of a remote peer."""
+
+    def __init__(self, sim: simulation.Simulation, local_index: int, connection: Connection,
+                 input_delay: int = settings.NETPLAY_INPUT_DELAY, redundancy: int = settings.NETPLAY_REDUNDANCY,
+                 max_rollback: int = settings.NETPLAY_MAX_ROLLBACK) -> None:
+        """
+        Initializes the RollbackSession object.
+
+        Parameters:
+        sim (simulation.Simulation): the simulation of the match; both peers must start from the same state.
+        local_index (int): the index of the local player, 0 or 1; the peer controls the other player.
+        connection (Connection): the connection to the peer.
+        input_delay (int): ticks between reading a local input and simulating it, which hides that much latency.
+        redundancy (int): the most unacknowledged inputs repeated in every packet, which hides packet loss.
+        max_rollback (int): the most ticks the simulation may run ahead of the last confirmed remote input.
+        """
+        self.simulation = sim
+        self.local_index = local_index
+        self.remote_index = 1 - local_index
+        self.connection = connection
+        self.input_delay = input_delay
+        self.redundancy = min(redundancy, MAX_PACKET_INPUTS)
+        self.max_rollback = max_rollback
+
+        start = sim.tick
+        # the first input_delay ticks have no input on either peer
+        self.local_inputs = {tick: 0 for tick in range(start, start + input_delay)}
+        self.remote_inputs = {tick: 0 for tick in range(start - 1, start + input_delay)}
+        self.confirmed_tick = start + input_delay - 1  # every remote input up to this tick is known
+        self.remote_ack = start  # the first local input the peer has not acknowledged
+        self.predictions = {}  # tick -> remote input the tick was simulated with before it arrived
+        self.states = {}  # tick -> simulation state at the start of the tick
+        self.checksums = {}  # tick -> crc32 of the confirmed state at the start of the tick
+        self.checked_tick = start - 1
+        self.rollback_tick = None  # earliest mispredicted tick not yet re-simulated
+        self.stalled_input = 0  # local input given while stalled, added to the next tick's input
+        self.connected = False
+
+        self.rollback_count = 0
+        self.resimulated_count = 0
+        self.stall_count = 0
+
+    def advance(self, local_input: int) -> list[tuple]:
+        """
+        Simulates the next tick and returns its events, or None if the session is waiting for the peer.
+
+        Parameters:
+        local_input (int): the local player's input bitfield, simulated input_delay ticks from now.
+        """
+        tick = self.simulation.tick
+        input_tick = tick + self.input_delay
+        if input_tick in self.local_inputs:
+            # the stalled tick's input was sent already, so taps made during the stall go to the next tick
+            self.stalled_input |= local_input
+        else:
+            self.local_inputs[input_tick] = local_input | self.stalled_input
+            self.stalled_input = 0
+        self.send()
+        self.receive()
+
+        if not self.connected:
+            return None
+        if tick - self.confirmed_tick > self.max_rollback:
+            self.stall_count += 1
+            return None
+
+        if self.rollback_tick is not None:
+            self.rollback(self.rollback_tick)
+        events = self.simulate(tick)
+        self.prune()
+        return events
+
+    def send(self) -> None:
+        """Sends the unacknowledged local inputs to the peer."""
+        newest = self.simulation.tick + self.input_delay
+        first = max(self.remote_ack, newest - MAX_PACKET_INPUTS + 1)
+        count = min(newest - first + 1, self.redundancy)
+        inputs = bytes(self.local_inputs[tick] for tick in range(first, first + count))
+        self.connection.send(PACKET_HEADER.pack(MAGIC, self.confirmed_tick + 1, first, count) + inputs)
+
+    def receive(self) -> None:
+        """Stores the remote inputs of every received packet and notes the earliest misprediction."""
+        for packet in self.connection.receive():
+            if len(packet) < PACKET_HEADER.size:
+                continue
+            magic, ack, first, count = PACKET_HEADER.unpack_from(packet)
+            if magic != MAGIC or len(packet) != PACKET_HEADER.size + count:
+                continue
+            self.connected = True
+            self.remote_ack = max(self.remote_ack, ack)
+            for offset, value in enumerate(packet[PACKET_HEADER.size:]):
+                self.confirm(first + offset, value)
+
+        while self.confirmed_tick + 1 in self.remote_inputs:
+            self.confirmed_tick += 1
+
+    def confirm(self, tick: int, value: int) -> None:
+        """Stores a remote input and schedules a rollback if the tick was simulated with a different one."""
+        if tick <= self.confirmed_tick or tick in self.remote_inputs:
+            return
+        self.remote_inputs[tick] = value
+        predicted = self.predictions.pop(tick, None)
+        if predicted is not None and predicted != value:
+            if self.rollback_tick is None or tick < self.rollback_tick:
+                self.rollback_tick = tick
+
+    def predict(self, tick: int) -> int:
+        """Returns the remote input of tick, guessing the last confirmed one if it has not arrived."""
+        value = self.remote_inputs.get(tick)
+        if value is None:
+            value = self.predictions[tick] = self.remote_inputs[self.confirmed_tick]
+        return value
+
+    def simulate(self, tick: int) -> list[tuple]:
+        """Saves the state at the start of tick and simulates it."""
+        self.states[tick] = self.simulation.save_state()
+        inputs = [0, 0]
+        inputs[self.local_index] = self.local_inputs[tick]
+        inputs[self.remote_index] = self.predict(tick)
+        return self.simulation.step(inputs)
+
+    def rollback(self, tick: int) -> None:
+        """Restores the state at the start of tick and re-simulates up to the current tick."""
+        end = self.simulation.tick
+        self.simulation.load_state(self.states[tick])
+        for resimulated in range(tick, end):
+            self.predictions.pop(resimulated, None)
+            self.simulate(resimulated)  # sounds of re-simulated ticks were already played
+        self.rollback_tick = None
+        self.rollback_count += 1
+        self.resimulated_count += end - tick
+
+    def prune(self) -> None:
+        """Checksums newly confirmed states and discards the states and inputs no rollback can need."""
+        confirmed_state = min(self.confirmed_tick + 1, self.simulation.tick - 1)
+        for tick in range(self.checked_tick + 1, confirmed_state + 1):
+            self.checksums[tick] = zlib.crc32(self.states[tick])
+            self.checksums.pop(tick - settings.NETPLAY_CHECKSUM_HISTORY, None)
+        self.checked_tick = max(self.checked_tick, confirmed_state)
+
+        for tick in [tick for tick in self.states if tick < confirmed_state]:
+            del self.states[tick]
+        oldest_input = min(self.remote_ack, confirmed_state)
+        for tick in [tick for tick in self.local_inputs if tick < oldest_input]:
+            del self.local_inputs[tick]
+        # the last confirmed remote input is kept for predictions
+        oldest_input = min(self.confirmed_tick, self.simulation.tick)
+        for tick in [tick for tick in self.remote_inputs if tick < oldest_input]:
+            del self.remote_inputs[tick]
+
+
+def run_loopback(ticks: int, latency: float, jitter: float, loss: float, input_delay: int,
+                 port: int = settings.NETPLAY_PORT, seed: int = 0) -> tuple:
+    """
+    Plays a match of random inputs between two sessions over localhost UDP with simulated network conditions.
+
+    Returns (the two sessions, the number of ticks both peers checksummed, the number of mismatches).
+    A virtual clock advancing one frame per tick replaces real time, so the match runs as fast as possible.
+
+    Parameters:
+    ticks (int): the number of ticks each peer plays.
+    latency (float): the simulated one-way latency in seconds.
+    jitter (float): the largest deviation from latency in seconds.
+    loss (float): the probability a packet is dropped.
+    input_delay (int): the input delay of both sessions in ticks.
+    port (int): the first of the two localhost ports used.
+    seed (int): the seed of the inputs and of the network simulation.
+    """
+    now = [0.0]
+    clock = lambda: now[0]
+    addresses = [("127.0.0.1", port), ("127.0.0.1", port + 1)]
+    connections = [
+        Connection(addresses[0], addresses[1], latency, jitter, loss, seed, clock),
+        Connection(addresses[1], addresses[0], latency, jitter, loss, seed + 1, clock)
+    ]
+    sessions = [RollbackSession(simulation.Simulation(), index, connection, input_delay)
+                for index, connection in enumerate(connections)]
+
+    rng = random.Random(seed)
+    held = [0, 0]
+    try:
+        # keep going without input once a peer is done, until every played tick is confirmed on both
+        while any(session.checked_tick < ticks for session in sessions):
+            for index, session in enumerate(sessions):
+                if session.simulation.tick < ticks and rng.random() < 0.1:
+                    held[index] = rng.getrandbits(5)
+                session.advance(held[index] if session.simulation.tick < ticks else 0)
+            now[0] += 1 / settings.FPS
+    finally:
+        for connection in connections:
+            connection.close()
+
+    common = sessions[0].checksums.keys() & sessions[1].checksums.keys()
+    mismatches = sum(sessions[0].checksums[tick] != sessions[1].checksums[tick] for tick in common)
+    return sessions, len(common), mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays a rollback match between two local peers and checks they agree.")
+    parser.add_argument("--ticks", type=int, default=1800, help="ticks played by each peer")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated one-way latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="largest deviation from the latency in seconds")
+    parser.add_argument("--loss", type=float, default=0.05, help="probability a packet is dropped")
+    parser.add_argument("--delay", type=int, default=settings.NETPLAY_INPUT_DELAY, help="input delay in ticks")
+    parser.add_argument("--port", type=int, default=settings.NETPLAY_PORT, help="first of the two ports used")
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    sessions, checked, mismatches = run_loopback(arguments.ticks, arguments.latency, arguments.jitter,
+                                                 arguments.loss, arguments.delay, arguments.port, arguments.seed)
+    for session in sessions:
+        print("peer {}: {} rollbacks, {} ticks re-simulated, {} stalls, {}/{} packets dropped".format(
+            session.local_index, session.rollback_count, session.resimulated_count, session.stall_count,
+            session.connection.dropped_count, session.connection.dropped_count + session.connection.sent_count))
+    print("{} confirmed states compared, {} mismatches".format(checked, mismatches))
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
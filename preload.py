@@ -0,0 +1,133 @@
+import pygame
+import pygame.freetype
+import settings
+import assets
+import audio
+import game
+import concurrent.futures
+import itertools
+import queue
+import threading
+
+# priorities of preload requests, lowest first
+SELECTED_COLOR = 0  # sprite sheets of the colours chosen in the launcher
+SHARED = 1  # assets every round loads
+OTHER_COLOR = 2  # sprite sheets of colours that may still be chosen
+STOP = 3  # stops a worker once everything before it is decoded
+
+
+class Preloader:
+    """Decodes the game's assets on worker threads, most needed first, while the launcher is open."""
+
+    def __init__(self, workers: int = settings.PRELOAD_WORKERS) -> None:
+        """
+        Initializes the Preloader object.
+
+        Parameters:
+        workers (int): the number of decoding threads.
+        """
+        self.requests = queue.PriorityQueue()  # (priority, sequence number, key)
+        self.sequence = itertools.count()  # keeps requests of equal priority in order
+        self.loaders = {}  # key -> function decoding the asset
+        self.lock = threading.Lock()
+        self.threads = [threading.Thread(target=self.work, daemon=True) for _ in range(workers)]
+
+    def start(self, colors: list[str]) -> None:
+        """
+        Initializes the audio and font modules and starts decoding.
+
+        Parameters:
+        colors (list[str]): the player colours selected in the launcher.
+        """
+        audio.init_mixer()
+        pygame.freetype.init()
+        if assets.exists(settings.ATLAS_PATH):
+            self.request(("atlas", settings.ATLAS_PATH), lambda: assets.decode_atlas(settings.ATLAS_PATH), SHARED)
+        else:
+            for path, alpha in game.IMAGES.values():
+                self.request_image(path, SHARED)
+        self.request_image(game.BACKGROUND_PATH, SHARED)
+        for path, volume in game.SOUND_EFFECTS.values():
+            self.request(("sound", path), lambda path=path: assets.decode_sound(path), SHARED)
+        self.request(("font", game.FONT_PATH, game.FONT_SIZE),
+                     lambda: assets.decode_font(game.FONT_PATH, game.FONT_SIZE), SHARED)
+        self.prioritize(colors)
+        for thread in self.threads:
+            thread.start()
+
+    def request(self, key: tuple, loader, priority: int) -> None:
+        """
+        Queues an asset for decoding, or moves it up the queue if it was requested with a lower priority.
+
+        Parameters:
+        key (tuple): the key the asset loaders in assets.py look the result up with.
+        loader (callable): a function with no parameters that decodes the asset.
+        priority (int): SELECTED_COLOR, SHARED or OTHER_COLOR.
+        """
+        with self.lock:
+            if key not in self.loaders:
+                self.loaders[key] = loader
+                assets.preloaded[key] = concurrent.futures.Future()
+        # a repeated request leaves a stale queue entry, skipped once the asset has started
+        self.requests.put((priority, next(self.sequence), key))
+
+    def request_image(self, path: str, priority: int) -> None:
+        """Queues the image at path for decoding."""
+        self.request(("image", path), lambda: assets.decode_image(path), priority)
+
+    def prioritize(self, colors: list[str]) -> None:
+        """
+        Moves the sprite sheets of the selected colours to the front of the queue.
+
+        The atlas holds every colour, so sheets are only preloaded when it is missing.
+
+        Parameters:
+        colors (list[str]): the player colours selected in the launcher.
+        """
+        if assets.exists(settings.ATLAS_PATH):
+            return
+        for animation_name in ("idle", "run", "jump"):
+            path = game.FRAME_RECTS_PATH.format(animation_name)
+            self.request(("frame_rects", path), lambda path=path: assets.decode_frame_rects(path), SHARED)
+        for color in settings.PLAYER_COLORS:
+            priority = SELECTED_COLOR if color in colors else OTHER_COLOR
+            for animation_name in ("idle", "run", "jump"):
+                self.request_image(game.SHEET_PATH.format(color, animation_name), priority)
+
+    def work(self) -> None:
+        """Decodes queued assets until the queue is shut down."""
+        while True:
+            priority, sequence, key = self.requests.get()
+            if key is None:
+                return
+            future = assets.preloaded.get(key)
+            with self.lock:
+                if future is None or future.done() or future.running():
+                    continue  # already taken by the game, or decoded for an earlier queue entry
+                if not future.set_running_or_notify_cancel():
+                    continue  # the game decoded it itself
+            try:
+                future.set_result(self.loaders[key]())
+            except Exception as error:
+                future.set_exception(error)
+
+    def shutdown(self, colors: list[str]) -> None:
+        """
+        Drops the sprite sheets of colours nobody picked and stops the workers once the rest is decoded.
+
+        Dropped sheets are neither decoded nor left in assets.preloaded, where they would stay
+        in memory outside of the asset cache's limit.
+
+        Parameters:
+        colors (list[str]): the player colours of the game about to start.
+        """
+        with self.lock:
+            for color in settings.PLAYER_COLORS:
+                if color in colors:
+                    continue
+                for animation_name in ("idle", "run", "jump"):
+                    future = assets.preloaded.pop(("image", game.SHEET_PATH.format(color, animation_name)), None)
+                    if future is not None:
+                        future.cancel()  # a sheet being decoded finishes, but nothing keeps it
+        for _ in self.threads:
+            self.requests.put((STOP, next(self.sequence), None))
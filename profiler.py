@@ -0,0 +1,228 @@
+import settings
+import collections
+import contextlib
+import functools
+import json
+import csv
+import sys
+import time
+
+
+def percentile(sorted_samples: list[float], fraction: float) -> float:
+    """
+    Returns the nearest-rank percentile of already sorted samples.
+
+    Parameters:
+    sorted_samples (list[float]): the samples in ascending order.
+    fraction (float): the percentile as a fraction, e.g. 0.95.
+    """
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))
+    return sorted_samples[index]
+
+
+class Stage:
+    """Rolling timing and allocation samples of one profiled stage."""
+
+    def __init__(self, window: int) -> None:
+        self.times = collections.deque(maxlen=window)  # seconds
+        self.allocations = collections.deque(maxlen=window)  # net allocated memory blocks
+        self.count = 0
+
+    def add(self, duration: float, allocations: int) -> None:
+        """Records one sample."""
+        self.times.append(duration)
+        self.allocations.append(allocations)
+        self.count += 1
+
+    def summary(self) -> dict:
+        """Returns the percentiles of the samples in the window, in milliseconds."""
+        times = sorted(self.times)
+        allocations = self.allocations
+        return {
+            "samples": self.count,
+            "p50_ms": percentile(times, 0.50) * 1000,
+            "p95_ms": percentile(times, 0.95) * 1000,
+            "p99_ms": percentile(times, 0.99) * 1000,
+            "max_ms": (times[-1] if times else 0.0) * 1000,
+            "mean_allocations": sum(allocations) / len(allocations) if allocations else 0.0
+        }
+
+
+class Measurement:
+    """A context manager that records the duration and allocations of the code it wraps."""
+
+    __slots__ = ("stage", "start", "blocks")
+
+    def __init__(self, stage: Stage) -> None:
+        self.stage = stage
+
+    def __enter__(self):
+        self.blocks = sys.getallocatedblocks()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self.start
+        self.stage.add(duration, sys.getallocatedblocks() - self.blocks)
+        return False
+
+
+class Profiler:
+    """A frame profiler collecting rolling per-stage timings, allocation counts, dropped frames and input latency."""
+
+    def __init__(self, enabled: bool = True, window: int = settings.PROFILER_WINDOW,
+                 frame_budget: float = 1 / settings.FPS) -> None:
+        """
+        Initializes the Profiler object.
+
+        Parameters:
+        enabled (bool): whether anything is recorded; a disabled profiler costs almost nothing.
+        window (int): the number of most recent samples percentiles are computed over.
+        frame_budget (float): the time in seconds a frame may take before it counts as dropped.
+        """
+        self.enabled = enabled
+        self.window = window
+        self.frame_budget = frame_budget
+        self.stages = {}
+        self.frames = 0
+        self.dropped_frames = 0
+        self.frame_start = None
+        # input latency probe: from reading an input event to the display update showing its tick
+        self.latency_histogram = [0] * settings.PROFILER_LATENCY_BUCKETS
+        self.input_time = None  # when the earliest input not yet simulated was read
+        self.simulated_input_time = None  # when the earliest simulated input not yet shown was read
+        self.instrumented = []  # (owner, method name, original attribute)
+
+    def get_stage(self, name: str) -> Stage:
+        """Returns the stage called name, creating it if needed."""
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = Stage(self.window)
+        return stage
+
+    def measure(self, name: str):
+        """
+        Returns a context manager that records the code it wraps under name.
+
+        Parameters:
+        name (str): the name of the stage, e.g. "render".
+        """
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return Measurement(self.get_stage(name))
+
+    def begin_frame(self) -> None:
+        """Marks the start of the work of a frame."""
+        if self.enabled:
+            self.frame_start = time.perf_counter()
+
+    def end_frame(self) -> None:
+        """Marks the end of the work of a frame and counts it as dropped if it went over budget."""
+        if not self.enabled or self.frame_start is None:
+            return
+        duration = time.perf_counter() - self.frame_start
+        self.get_stage("frame").add(duration, 0)
+        self.frames += 1
+        if duration > self.frame_budget:
+            self.dropped_frames += 1
+        self.frame_start = None
+
+    def input_received(self) -> None:
+        """Marks that an input event of a player was read."""
+        if self.enabled and self.input_time is None:
+            self.input_time = time.perf_counter()
+
+    def inputs_simulated(self) -> None:
+        """Marks that a tick consumed the inputs read so far."""
+        if self.input_time is not None:
+            if self.simulated_input_time is None:
+                self.simulated_input_time = self.input_time
+            self.input_time = None
+
+    def frame_presented(self) -> None:
+        """Marks that a frame reached the display and records the latency of the inputs it shows."""
+        if self.simulated_input_time is None:
+            return
+        latency = time.perf_counter() - self.simulated_input_time
+        self.simulated_input_time = None
+        self.get_stage("input_latency").add(latency, 0)
+        bucket = int(latency * 1000 / settings.PROFILER_LATENCY_BUCKET_MS)
+        self.latency_histogram[min(bucket, len(self.latency_histogram) - 1)] += 1
+
+    def instrument(self, owner, method_name: str, name: str = None) -> None:
+        """
+        Wraps a method of a class or object so every call is measured.
+
+        Parameters:
+        owner (type or object): the class or object that has the method.
+        method_name (str): the name of the method, e.g. "update".
+        name (str): the name of the stage; defaults to "<owner>.<method>".
+        """
+        if not self.enabled:
+            return
+        if name is None:
+            owner_name = owner.__name__ if isinstance(owner, type) else type(owner).__name__
+            name = "{}.{}".format(owner_name, method_name)
+        original = owner.__dict__.get(method_name) if isinstance(owner, type) else None
+        method = getattr(owner, method_name)
+        stage = self.get_stage(name)
+
+        @functools.wraps(method)
+        def measured(*args, **kwargs):
+            with Measurement(stage):
+                return method(*args, **kwargs)
+
+        self.instrumented.append((owner, method_name, original))
+        setattr(owner, method_name, measured)
+
+    def restore(self) -> None:
+        """Removes every wrapper added by instrument()."""
+        for owner, method_name, original in reversed(self.instrumented):
+            if original is None:
+                delattr(owner, method_name)
+            else:
+                setattr(owner, method_name, original)
+        self.instrumented = []
+
+    def report(self) -> dict:
+        """Returns a summary of every stage and the frame counts."""
+        return {
+            "frames": self.frames,
+            "dropped_frames": self.dropped_frames,
+            "frame_budget_ms": self.frame_budget * 1000,
+            "input_latency_histogram": {
+                "bucket_ms": settings.PROFILER_LATENCY_BUCKET_MS,
+                "counts": self.latency_histogram
+            },
+            "stages": {name: stage.summary() for name, stage in self.stages.items()}
+        }
+
+    def export(self, path: str) -> None:
+        """
+        Writes the report to path, as CSV if it ends in ".csv" and as JSON otherwise.
+
+        Parameters:
+        path (str): the file to write.
+        """
+        report = self.report()
+        if path.endswith(".csv"):
+            fields = ["stage", "samples", "p50_ms", "p95_ms", "p99_ms", "max_ms", "mean_allocations"]
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                for name, summary in report["stages"].items():
+                    writer.writerow(dict(summary, stage=name))
+        else:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+
+    def overlay_lines(self) -> list[str]:
+        """Returns the lines of text shown by the on-screen overlay."""
+        lines = ["frames: {}  dropped: {}".format(self.frames, self.dropped_frames)]
+        for name, stage in self.stages.items():
+            summary = stage.summary()
+            lines.append("{}: p50 {:.2f}  p95 {:.2f}  p99 {:.2f} ms  {:+.0f} blocks".format(
+                name, summary["p50_ms"], summary["p95_ms"], summary["p99_ms"], summary["mean_allocations"]))
+        return lines
@@ -0,0 +1,55 @@
+import pygame
+import sprites
+
+
+class Renderer:
+    """A dirty rectangle renderer that only redraws the parts of the screen that changed."""
+
+    def __init__(self, screen: pygame.Surface, background: pygame.Surface, platforms: pygame.sprite.Group,
+                 sprite_group: pygame.sprite.LayeredDirty, bullets: sprites.BulletRenderer) -> None:
+        """
+        Initializes the Renderer object.
+
+        Parameters:
+        screen (pygame.Surface): the display surface.
+        background (pygame.Surface): the background image.
+        platforms (pygame.sprite.Group): the platforms, which never move and are drawn into the static layer.
+        sprite_group (pygame.sprite.LayeredDirty): the moving sprites, e.g. players and scoreboards.
+        bullets (sprites.BulletRenderer): draws the bullets on top of the sprites.
+        """
+        self.screen = screen
+        self.sprites = sprite_group
+        self.bullets = bullets
+
+        # everything that never changes is drawn once into a cached static layer
+        self.static = background.copy()
+        platforms.draw(self.static)
+        self.sprites.clear(screen, self.static)
+
+        self.bullet_rects = []  # where bullets were drawn in the last frame
+        self.full_redraw = True
+
+    def render(self, alpha: float = 1.0) -> None:
+        """
+        Renders a single frame, pushing only the changed rects to the display.
+
+        Parameters:
+        alpha (float): the fraction of a tick elapsed since the last tick, used to place moving objects.
+        """
+        if self.full_redraw:
+            self.screen.blit(self.static, (0, 0))
+            self.sprites.repaint_rect(self.screen.get_rect())
+
+        # erase the bullets of the last frame; sprites under them are redrawn
+        for rect in self.bullet_rects:
+            self.sprites.repaint_rect(rect)
+
+        dirty_rects = self.sprites.draw(self.screen)
+        new_bullet_rects = self.bullets.draw(self.screen, alpha)
+
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            pygame.display.update(dirty_rects + new_bullet_rects)
+        self.bullet_rects = new_bullet_rects
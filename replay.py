@@ -0,0 +1,211 @@
+import settings
+import simulation
+import hitmasks
+import struct
+import zlib
+
+# replay file layout (little endian):
+#   header: magic, format version, player count, tick rate, tick count, settings fingerprint
+#   body: runs of identical ticks, each a varint run length followed by one byte per player
+#         holding the XOR of that player's input bitfield with the previous run's
+MAGIC = b"GMRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHII")
+
+# settings that change the outcome of a simulation; replays only play back with the same values
+PHYSICS_SETTINGS = (
+    "FPS", "WIDTH", "HEIGHT", "VOID_HEIGHT", "PLATFORM_LIST", "PLATFORM_TILE_WIDTH", "PLATFORM_TILE_HEIGHT",
+    "PLAYER_ACC", "PLAYER_FRICTION", "PLAYER_GRAVITY", "PLAYER_JUMP_HEIGHT", "PLAYER_OFFSET",
+    "PLAYER_ANIMATION_FPS", "PLAYER_IDLE_FRAMES", "PLAYER_RUN_FRAMES",
+    "PLAYER_HITMASK_COLOR", "PLAYER_SPAWNS",
+    "GUN_RECOIL", "MUZZLE_FLASH_OFFSET_X", "MUZZLE_FLASH_OFFSET_Y", "MUZZLE_FLASH_RUNNING_OFFSET_Y", "BULLET_SPEED", "BULLET_OFFSET_X", "BULLET_OFFSET_Y", "BULLET_RUNNING_OFFSET_Y",
+    "BULLET_WIDTH", "BULLET_HEIGHT", "BULLET_POOL_SIZE", "KNOCKBACK_MULTIPLIER"
+)
+
+
+def settings_fingerprint() -> int:
+    """Returns a checksum of the settings and player frames that affect the simulation."""
+    values = repr([(name, getattr(settings, name)) for name in PHYSICS_SETTINGS])
+    return zlib.crc32(values.encode(), hitmasks.get_checksum())
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    """Appends an unsigned integer to buffer using 7 bits per byte."""
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, offset: int) -> tuple:
+    """Returns (value, new offset) of the unsigned varint at offset."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class Replay:
+    """The recorded inputs of a match."""
+
+    def __init__(self, player_count: int, inputs: list[tuple] = None, tick_rate: int = settings.FPS,
+                 fingerprint: int = None) -> None:
+        """
+        Initializes the Replay object.
+
+        Parameters:
+        player_count (int): the number of players in the match.
+        inputs (list[tuple]): the input bitfields of every player, one tuple per tick.
+        tick_rate (int): the number of ticks per second the match was played at.
+        fingerprint (int): the settings fingerprint the match was recorded with.
+        """
+        self.player_count = player_count
+        self.inputs = inputs if inputs is not None else []
+        self.tick_rate = tick_rate
+        self.fingerprint = settings_fingerprint() if fingerprint is None else fingerprint
+
+    def record(self, inputs: list[int]) -> None:
+        """
+        Appends the inputs of one tick.
+
+        Parameters:
+        inputs (list[int]): the input bitfield of every player.
+        """
+        self.inputs.append(tuple(inputs))
+
+    def __len__(self) -> int:
+        return len(self.inputs)
+
+    def check_settings(self) -> None:
+        """Raises ValueError if the replay was recorded with different game settings."""
+        if self.fingerprint != settings_fingerprint():
+            raise ValueError("replay was recorded with different game settings")
+
+    def to_bytes(self) -> bytes:
+        """Returns the replay encoded in the compact binary format."""
+        data = bytearray(HEADER.pack(MAGIC, VERSION, self.player_count, self.tick_rate,
+                                     len(self.inputs), self.fingerprint))
+        previous = (0,) * self.player_count
+        index = 0
+        while index < len(self.inputs):
+            current = self.inputs[index]
+            run_end = index + 1
+            while run_end < len(self.inputs) and self.inputs[run_end] == current:
+                run_end += 1
+            write_varint(data, run_end - index)
+            data.extend(new ^ old for new, old in zip(current, previous))
+            previous = current
+            index = run_end
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Replay":
+        """
+        Returns the replay decoded from the compact binary format.
+
+        Parameters:
+        data (bytes): the encoded replay.
+        """
+        magic, version, player_count, tick_rate, tick_count, fingerprint = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not a replay file")
+        if version != VERSION:
+            raise ValueError("unsupported replay version {}".format(version))
+
+        inputs = []
+        previous = (0,) * player_count
+        offset = HEADER.size
+        while len(inputs) < tick_count:
+            run_length, offset = read_varint(data, offset)
+            delta = data[offset:offset + player_count]
+            offset += player_count
+            current = tuple(old ^ change for old, change in zip(previous, delta))
+            inputs.extend([current] * run_length)
+            previous = current
+        return cls(player_count, inputs, tick_rate, fingerprint)
+
+    def save(self, path: str) -> None:
+        """Writes the replay to path."""
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        """Reads a replay from path."""
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class ReplayPlayer:
+    """Plays a replay back deterministically through a headless simulation, with seeking."""
+
+    def __init__(self, replay: Replay, keyframe_interval: int = settings.REPLAY_KEYFRAME_INTERVAL,
+                 spawns: list[tuple] = None) -> None:
+        """
+        Initializes the ReplayPlayer object.
+
+        Parameters:
+        replay (Replay): the replay to play.
+        keyframe_interval (int): the number of ticks between saved simulation states used for seeking.
+        spawns (list[tuple]): the (spawn_point, direction) of every player, if not the default ones.
+        """
+        replay.check_settings()
+        self.replay = replay
+        self.keyframe_interval = keyframe_interval
+        self.simulation = simulation.Simulation(spawns or settings.PLAYER_SPAWNS[:replay.player_count])
+        self.keyframes = {}  # tick -> saved simulation state
+        self.save_keyframe()
+
+    @property
+    def tick(self) -> int:
+        """The number of ticks played so far."""
+        return self.simulation.tick
+
+    def finished(self) -> bool:
+        """Returns True if every recorded tick has been played."""
+        return self.tick >= len(self.replay)
+
+    def save_keyframe(self) -> None:
+        """Saves the state of the simulation at the current tick."""
+        self.keyframes[self.tick] = self.simulation.save_state()
+
+    def step(self) -> list[tuple]:
+        """Plays the next tick and returns its events."""
+        events = self.simulation.step(self.replay.inputs[self.tick])
+        if self.tick % self.keyframe_interval == 0 and self.tick not in self.keyframes:
+            self.save_keyframe()
+        return events
+
+    def current_inputs(self) -> tuple:
+        """Returns the inputs of the next tick."""
+        return self.replay.inputs[self.tick]
+
+    def run(self, ticks: int = None) -> None:
+        """
+        Plays ticks ticks, or the rest of the replay, as fast as possible.
+
+        Parameters:
+        ticks (int): the number of ticks to play; None plays until the end.
+        """
+        end = len(self.replay) if ticks is None else min(len(self.replay), self.tick + ticks)
+        while self.tick < end:
+            self.step()
+
+    def seek(self, tick: int) -> None:
+        """
+        Moves the playback to tick by restoring the nearest earlier keyframe and fast-forwarding.
+
+        Parameters:
+        tick (int): the tick to move to.
+        """
+        tick = max(0, min(tick, len(self.replay)))
+        if tick < self.tick or tick - self.tick > self.keyframe_interval:
+            start = max(keyframe for keyframe in self.keyframes if keyframe <= tick)
+            if start > self.tick or tick < self.tick:
+                self.simulation.load_state(self.keyframes[start])
+        self.run(tick - self.tick)
@@ -0,0 +1,396 @@
+import settings
+import simulation
+import profiler
+import argparse
+import asyncio
+import collections
+import random
+import struct
+import time
+import zlib
+
+# a dedicated server hosting many headless matches in one asyncio event loop; clients send their
+# input bitfield every tick and receive snapshots of the simulation state, compressed as the XOR
+# against the last snapshot they acknowledged
+
+# packet layout (little endian): magic, packet type, then the fields of the type below
+MAGIC = b"GMSV"
+HEADER = struct.Struct("<4sB")
+JOIN = 0  # client -> server: no fields
+WELCOME = 1  # server -> client: match id, player index
+INPUT = 2  # client -> server: match id, player index, input bitfield, last received snapshot tick
+LEAVE = 3  # client -> server: match id, player index
+SNAPSHOT = 4  # server -> client: match id, tick, baseline tick, then the compressed state
+WELCOME_FIELDS = struct.Struct("<IB")
+INPUT_FIELDS = struct.Struct("<IBBI")
+LEAVE_FIELDS = struct.Struct("<IB")
+SNAPSHOT_FIELDS = struct.Struct("<III")
+NO_BASELINE = 0xFFFFFFFF  # baseline tick of a snapshot holding the full state
+
+
+def encode_state(state: bytes, baseline: bytes = None) -> bytes:
+    """
+    Returns state compressed on its own, or as the XOR against baseline, which is mostly zero bytes.
+
+    Parameters:
+    state (bytes): a state returned by Simulation.save_state().
+    baseline (bytes): an earlier state of the same simulation the receiver already has.
+    """
+    if baseline is not None:
+        delta = int.from_bytes(state, "little") ^ int.from_bytes(baseline, "little")
+        state = delta.to_bytes(len(state), "little")
+    return zlib.compress(state, 1)
+
+
+def decode_state(data: bytes, baseline: bytes = None) -> bytes:
+    """Returns the state encoded by encode_state() with the same baseline."""
+    state = zlib.decompress(data)
+    if baseline is not None:
+        state = (int.from_bytes(state, "little") ^ int.from_bytes(baseline, "little")).to_bytes(len(state), "little")
+    return state
+
+
+class Match:
+    """A headless match ticking on its own fixed schedule."""
+
+    def __init__(self, match_id: int, server: "MatchServer") -> None:
+        """
+        Initializes the Match object.
+
+        Parameters:
+        match_id (int): the id clients address the match with.
+        server (MatchServer): the server hosting the match.
+        """
+        self.match_id = match_id
+        self.server = server
+        self.simulation = simulation.Simulation()
+        player_count = len(self.simulation.players)
+        self.addresses = [None] * player_count  # address of the client controlling each player
+        self.last_seen = [0.0] * player_count
+        self.acks = [None] * player_count  # last snapshot tick each client received
+        self.inputs = [0] * player_count  # latest held input of each player
+        self.shots = [0] * player_count  # shots pressed since the last tick, so none are lost between ticks
+        self.history = collections.OrderedDict()  # tick -> state, the baselines clients may acknowledge
+        self.task = None
+        self.late_ticks = 0
+        self.tick_time = 0.0  # total seconds spent ticking and broadcasting
+
+    def is_full(self) -> bool:
+        """Returns True if every player has a client."""
+        return None not in self.addresses
+
+    def add_client(self, address: tuple) -> int:
+        """Gives the first free player to the client at address and returns its index."""
+        index = self.addresses.index(None)
+        self.addresses[index] = address
+        self.last_seen[index] = time.monotonic()
+        return index
+
+    def remove_client(self, index: int) -> None:
+        """Frees the player of a client that left or timed out; its player stands still."""
+        self.addresses[index] = None
+        self.inputs[index] = 0
+
+    def is_empty(self) -> bool:
+        """Returns True if no client is left."""
+        return all(address is None for address in self.addresses)
+
+    def receive_input(self, index: int, inputs: int, ack: int) -> None:
+        """
+        Stores the input of a player for the next tick.
+
+        Parameters:
+        index (int): the index of the player.
+        inputs (int): the player's input bitfield.
+        ack (int): the last snapshot tick the client received.
+        """
+        self.inputs[index] = inputs & ~simulation.SHOOT
+        self.shots[index] |= inputs & simulation.SHOOT
+        self.acks[index] = ack
+        self.last_seen[index] = time.monotonic()
+
+    async def run(self) -> None:
+        """Ticks the match every 1 / FPS seconds until every client is gone."""
+        loop = asyncio.get_running_loop()
+        interval = 1 / settings.FPS
+        next_tick = loop.time()
+        while not self.is_empty():
+            start = time.perf_counter()
+            self.tick()
+            self.tick_time += time.perf_counter() - start
+
+            next_tick += interval
+            delay = next_tick - loop.time()
+            if delay < 0:
+                # the host is overloaded; skip the missed ticks instead of trying to catch up
+                self.late_ticks += 1
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+        self.server.end_match(self)
+
+    def tick(self) -> None:
+        """Drops timed out clients, steps the simulation and sends every client its snapshot."""
+        now = time.monotonic()
+        for index, address in enumerate(self.addresses):
+            if address is not None and now - self.last_seen[index] > settings.SERVER_CLIENT_TIMEOUT:
+                self.remove_client(index)
+
+        stats = self.server.profiler
+        with stats.measure("tick"):
+            inputs = [held | shot for held, shot in zip(self.inputs, self.shots)]
+            self.shots = [0] * len(self.shots)
+            self.simulation.step(inputs)
+        with stats.measure("snapshot"):
+            state = self.simulation.save_state()
+            self.history[self.simulation.tick] = state
+            if len(self.history) > settings.SERVER_SNAPSHOT_HISTORY:
+                self.history.popitem(last=False)
+        with stats.measure("broadcast"):
+            self.broadcast(state)
+
+    def broadcast(self, state: bytes) -> None:
+        """Sends state to every client, encoded against the last snapshot it acknowledged."""
+        tick = self.simulation.tick
+        packets = {}  # baseline tick -> packet, shared by clients with the same baseline
+        for index, address in enumerate(self.addresses):
+            if address is None:
+                continue
+            baseline = self.acks[index]
+            if baseline not in self.history:
+                baseline = NO_BASELINE
+            packet = packets.get(baseline)
+            if packet is None:
+                payload = encode_state(state, self.history.get(baseline))
+                packet = packets[baseline] = (HEADER.pack(MAGIC, SNAPSHOT)
+                                              + SNAPSHOT_FIELDS.pack(self.match_id, tick, baseline) + payload)
+            self.server.send(packet, address)
+
+
+class MatchServer(asyncio.DatagramProtocol):
+    """Pairs joining clients into matches and routes their packets."""
+
+    def __init__(self, stats_interval: float = settings.SERVER_STATS_INTERVAL) -> None:
+        """
+        Initializes the MatchServer object.
+
+        Parameters:
+        stats_interval (float): seconds between printed load statistics; 0 disables them.
+        """
+        self.transport = None
+        self.matches = {}  # match id -> Match
+        self.waiting = None  # the match new clients join until it is full
+        self.next_match_id = 0
+        self.stats_interval = stats_interval
+        self.profiler = profiler.Profiler(window=settings.PROFILER_WINDOW * 10)
+        self.sent_bytes = 0
+        self.sent_packets = 0
+        self.stats_task = None
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self.transport = transport
+        if self.stats_interval:
+            self.stats_task = asyncio.get_running_loop().create_task(self.print_stats())
+
+    def datagram_received(self, data: bytes, address: tuple) -> None:
+        if len(data) < HEADER.size:
+            return
+        magic, packet_type = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            return
+        fields = data[HEADER.size:]
+        if packet_type == INPUT and len(fields) == INPUT_FIELDS.size:
+            match_id, index, inputs, ack = INPUT_FIELDS.unpack(fields)
+            match = self.matches.get(match_id)
+            if match and index < len(match.addresses) and match.addresses[index] == address:
+                match.receive_input(index, inputs, ack)
+        elif packet_type == JOIN:
+            self.join(address)
+        elif packet_type == LEAVE and len(fields) == LEAVE_FIELDS.size:
+            match_id, index = LEAVE_FIELDS.unpack(fields)
+            match = self.matches.get(match_id)
+            if match and index < len(match.addresses) and match.addresses[index] == address:
+                match.remove_client(index)
+
+    def join(self, address: tuple) -> None:
+        """Adds the client at address to the waiting match and starts the match once it is full."""
+        for match in self.matches.values():
+            if address in match.addresses:
+                # the welcome was lost; send it again
+                self.welcome(match, match.addresses.index(address))
+                return
+        if self.waiting is None:
+            self.waiting = Match(self.next_match_id, self)
+            self.matches[self.waiting.match_id] = self.waiting
+            self.next_match_id += 1
+        match = self.waiting
+        self.welcome(match, match.add_client(address))
+        if match.is_full():
+            self.waiting = None
+            match.task = asyncio.get_running_loop().create_task(match.run())
+
+    def welcome(self, match: Match, index: int) -> None:
+        """Tells the client of a player which match and player it controls."""
+        self.send(HEADER.pack(MAGIC, WELCOME) + WELCOME_FIELDS.pack(match.match_id, index), match.addresses[index])
+
+    def end_match(self, match: Match) -> None:
+        """Forgets a match whose clients are all gone."""
+        self.matches.pop(match.match_id, None)
+
+    def send(self, packet: bytes, address: tuple) -> None:
+        """Sends packet to address and counts the traffic."""
+        self.transport.sendto(packet, address)
+        self.sent_bytes += len(packet)
+        self.sent_packets += 1
+
+    def stats(self) -> dict:
+        """Returns the load of the server: tick, snapshot and broadcast timings, matches and traffic."""
+        running = [match for match in self.matches.values() if match.task]
+        return {
+            "matches": len(running),
+            "clients": sum(len(match.addresses) - match.addresses.count(None) for match in running),
+            "late_ticks": sum(match.late_ticks for match in running),
+            "sent_bytes": self.sent_bytes,
+            "sent_packets": self.sent_packets,
+            "stages": {name: stage.summary() for name, stage in self.profiler.stages.items()}
+        }
+
+    async def print_stats(self) -> None:
+        """Prints the load of the server every stats_interval seconds."""
+        last_bytes, last_packets = 0, 0
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            stats = self.stats()
+            line = "matches {} clients {} late ticks {}  out {:.1f} kB/s {:.0f} packets/s".format(
+                stats["matches"], stats["clients"], stats["late_ticks"],
+                (stats["sent_bytes"] - last_bytes) / self.stats_interval / 1000,
+                (stats["sent_packets"] - last_packets) / self.stats_interval)
+            for name, summary in stats["stages"].items():
+                line += "  {} p50 {:.3f} p99 {:.3f} ms".format(name, summary["p50_ms"], summary["p99_ms"])
+            # the fraction of one core a match uses, for sizing hosts
+            tick_times = [match.tick_time / max(1, match.simulation.tick) for match in self.matches.values() if match.task]
+            if tick_times:
+                line += "  per match {:.2%} of a core".format(sum(tick_times) / len(tick_times) * settings.FPS)
+            print(line, flush=True)
+            last_bytes, last_packets = stats["sent_bytes"], stats["sent_packets"]
+
+
+class BotClient(asyncio.DatagramProtocol):
+    """A client joining a match and pressing random inputs every tick, used to load test the server."""
+
+    def __init__(self, seed: int = None) -> None:
+        """
+        Initializes the BotClient object.
+
+        Parameters:
+        seed (int): the seed of the bot's random inputs.
+        """
+        self.transport = None
+        self.rng = random.Random(seed)
+        self.match_id = None
+        self.player_index = None
+        self.states = collections.OrderedDict()  # tick -> decoded state, the possible baselines
+        self.last_tick = NO_BASELINE
+        self.inputs = 0
+        self.received_bytes = 0
+        self.snapshots = 0
+        self.missing_baselines = 0
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, address: tuple) -> None:
+        if len(data) < HEADER.size:
+            return
+        magic, packet_type = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            return
+        self.received_bytes += len(data)
+        fields = data[HEADER.size:]
+        if packet_type == WELCOME:
+            self.match_id, self.player_index = WELCOME_FIELDS.unpack(fields)
+        elif packet_type == SNAPSHOT:
+            match_id, tick, baseline_tick = SNAPSHOT_FIELDS.unpack_from(fields)
+            baseline = None
+            if baseline_tick != NO_BASELINE:
+                baseline = self.states.get(baseline_tick)
+                if baseline is None:
+                    self.missing_baselines += 1
+                    return
+            self.states[tick] = decode_state(fields[SNAPSHOT_FIELDS.size:], baseline)
+            if len(self.states) > settings.SERVER_SNAPSHOT_HISTORY:
+                self.states.popitem(last=False)
+            self.last_tick = tick
+            self.snapshots += 1
+
+    async def play(self, duration: float) -> None:
+        """Joins a match and sends input every tick for duration seconds."""
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            if self.match_id is None:
+                self.transport.sendto(HEADER.pack(MAGIC, JOIN))
+            else:
+                if self.rng.random() < 0.1:
+                    self.inputs = self.rng.getrandbits(5)
+                self.transport.sendto(HEADER.pack(MAGIC, INPUT) + INPUT_FIELDS.pack(
+                    self.match_id, self.player_index, self.inputs, self.last_tick))
+            await asyncio.sleep(1 / settings.FPS)
+        if self.match_id is not None:
+            self.transport.sendto(HEADER.pack(MAGIC, LEAVE) + LEAVE_FIELDS.pack(self.match_id, self.player_index))
+
+
+async def serve(host: str, port: int, stats_interval: float) -> None:
+    """Runs the server until it is interrupted."""
+    loop = asyncio.get_running_loop()
+    transport, server = await loop.create_datagram_endpoint(lambda: MatchServer(stats_interval),
+                                                            local_addr=(host, port))
+    print("serving on {}:{}".format(host, port), flush=True)
+    try:
+        await asyncio.Future()
+    finally:
+        transport.close()
+
+
+async def run_bots(host: str, port: int, client_count: int, duration: float, seed: int) -> list[BotClient]:
+    """Runs client_count bots against the server for duration seconds and returns them."""
+    loop = asyncio.get_running_loop()
+    endpoints = []
+    for index in range(client_count):
+        endpoints.append(await loop.create_datagram_endpoint(lambda index=index: BotClient(seed + index),
+                                                             remote_addr=(host, port)))
+    bots = [bot for transport, bot in endpoints]
+    await asyncio.gather(*(bot.play(duration) for bot in bots))
+    for transport, bot in endpoints:
+        transport.close()
+    return bots
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dedicated Gun Mayhem match server and load generator.")
+    parser.add_argument("mode", choices=("serve", "bots"), help="run the server, or bot clients against it")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--stats", type=float, default=settings.SERVER_STATS_INTERVAL,
+                        help="seconds between printed server statistics")
+    parser.add_argument("--clients", type=int, default=100, help="number of bot clients")
+    parser.add_argument("--duration", type=float, default=10, help="seconds the bots play")
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    if arguments.mode == "serve":
+        try:
+            asyncio.run(serve(arguments.host, arguments.port, arguments.stats))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    bots = asyncio.run(run_bots(arguments.host, arguments.port, arguments.clients, arguments.duration, arguments.seed))
+    joined = [bot for bot in bots if bot.match_id is not None]
+    snapshots = sum(bot.snapshots for bot in bots)
+    print("{} of {} bots joined a match, {} snapshots received ({:.0f} bytes each), {} without baseline".format(
+        len(joined), len(bots), snapshots, sum(bot.received_bytes for bot in bots) / max(1, snapshots),
+        sum(bot.missing_baselines for bot in bots)))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,70 @@ from pygame.locals import *
 TITLE = "Gun Mayhem"
 HEIGHT = 720
 WIDTH = 1280
-FPS = 30
+FPS = 30  # simulation ticks per second
+
+# frame pacing settings; rendering runs apart from the fixed-rate simulation
+RENDER_FPS = 60  # frames drawn per second without vsync; 0 draws as fast as the pacing allows
+# "vsync" (waits for the display, falling back to "sleep" if it cannot), "sleep" (saves CPU)
+# or "busy_loop" (precise to the millisecond, but keeps a CPU core busy)
+FRAME_PACING = "vsync"
+INTERPOLATION = True  # draws moving objects between their last two simulated positions
+MAX_FRAME_TIME = 0.25  # seconds of simulation caught up after a stall, at most
 
 # game properties
 VOID_HEIGHT = HEIGHT + 500
 
+# profiler settings
+PROFILER_ENABLED = False
+PROFILER_WINDOW = 300  # frames percentiles are computed over
+PROFILER_OVERLAY_INTERVAL = 15  # ticks between overlay redraws
+PROFILER_OVERLAY_KEY = K_F3
+PROFILER_EXPORT_PATH = "profile.json"  # a path ending in .csv exports CSV
+PROFILER_LATENCY_BUCKET_MS = 2  # width of the buckets of the input latency histogram
+PROFILER_LATENCY_BUCKETS = 50  # the last bucket also counts every longer latency
+
+# audio settings
+AUDIO_FREQUENCY = 44100
+AUDIO_BUFFER = 512  # samples per mixing pass
+AUDIO_CHANNELS = 12  # sound effect voices playing at once
+# effect name -> (voice limit, priority for stealing channels, cooldown in ms per player)
+SFX_LIMITS = {
+    "death": (2, 4, 0),
+    "hit": (2, 3, 0),
+    "shoot": (4, 2, 0),
+    "jump": (2, 1, 100),
+    "step": (2, 0, 150)
+}
+SFX_DEFAULT_LIMIT = (2, 1, 0)
+
+# replay settings
+REPLAY_RECORDING = False  # save the inputs of every round
+REPLAY_DIRECTORY = "replays"
+REPLAY_KEYFRAME_INTERVAL = 300  # ticks between saved states used for seeking
+
+# online versus settings
+NETPLAY_PORT = 7777
+NETPLAY_INPUT_DELAY = 2  # ticks between pressing a key and its effect, hiding that much latency
+NETPLAY_REDUNDANCY = 32  # most unacknowledged inputs repeated in every packet
+NETPLAY_MAX_ROLLBACK = 8  # most ticks simulated ahead of the peer's last received input
+NETPLAY_CHECKSUM_HISTORY = 600  # confirmed state checksums kept for desync checks
+
+# dedicated server settings
+SERVER_PORT = 7788
+SERVER_SNAPSHOT_HISTORY = 32  # recent states kept as delta baselines, about a second
+SERVER_CLIENT_TIMEOUT = 5  # seconds without input before a client is dropped
+SERVER_STATS_INTERVAL = 5  # seconds between printed load statistics
+
+# collision settings
+COLLISION_CELL_SIZE = 64  # size of a broad phase grid cell in pixels
+
+# asset settings
+ASSET_CACHE_LIMIT = 64  # unreferenced assets kept in memory between rounds
+TEXT_CACHE_SIZE = 128  # rendered text surfaces kept in memory
+ASSET_PACK_PATH = "assets.pack"  # in the game directory; built by assetpack.py for releases, loose files are used if it is missing
+PRELOAD_WORKERS = 2  # threads decoding assets while the launcher is open
+ATLAS_PATH = "assets/atlas.bin"  # built by atlas.py when bundling; the separate images are used if it is missing
+
 # colours
 BLACK = (0, 0, 0)
 GREY = (105, 105, 105)
@@ -24,14 +83,29 @@ PLATFORM_LIST = [
     ((WIDTH - 200, HEIGHT - 200), 8),
     ((WIDTH / 2, HEIGHT - 310), 10)
 ]
+PLATFORM_TILE_WIDTH = 32
+PLATFORM_TILE_HEIGHT = 32
 
 # player properties
+PLAYER_COLORS = ("black", "blue", "green", "red", "yellow")  # directories in assets/player
 PLAYER_ACC = 1
 PLAYER_FRICTION = -0.2
 PLAYER_GRAVITY = 0.3
 PLAYER_JUMP_HEIGHT = -9
 PLAYER_ANIMATION_FPS = 10
 PLAYER_OFFSET = 12
+PLAYER_IDLE_FRAMES = 5
+PLAYER_RUN_FRAMES = 6
+
+# collisions test the opaque pixels of the player frames; every colour has the same silhouette
+PLAYER_HITMASK_COLOR = "black"
+
+# box around the player's body in the idle frames, for code that does not track animation frames
+# (the bots)
+PLAYER_HITBOX_WIDTH = 28
+PLAYER_HITBOX_HEIGHT = 33
+PLAYER_HITBOX_OFFSET_X = 2  # towards the direction the player faces
+PLAYER_HITBOX_OFFSET_Y = 9  # height of the feet above the bottom of the image
 
 # player 1 properties
 PLAYER_1_COLOR = "green"
@@ -57,6 +131,57 @@ PLAYER_2_LEFT = K_a
 PLAYER_2_RIGHT = K_d
 PLAYER_2_SHOOT = K_g
 
+# roster settings
+MAX_PLAYERS = 8
+# keyboard layouts a player can be given: (up, down, left, right, shoot)
+KEYBOARD_LAYOUTS = {
+    "arrows": (PLAYER_1_UP, PLAYER_1_DOWN, PLAYER_1_LEFT, PLAYER_1_RIGHT, PLAYER_1_SHOOT),
+    "wasd": (PLAYER_2_UP, PLAYER_2_DOWN, PLAYER_2_LEFT, PLAYER_2_RIGHT, PLAYER_2_SHOOT),
+    "ijkl": (K_i, K_k, K_j, K_l, K_p),
+    "numpad": (K_KP8, K_KP5, K_KP4, K_KP6, K_KP0),
+}
+# (name, colour, controls) of every player of a local game; the controls are a keyboard layout,
+# "gamepad" for the next gamepad plugged in, a bot in bots.BOTS, or None for no input
+ROSTER = [
+    ("Player 1", PLAYER_1_COLOR, "arrows"),
+    ("Player 2", PLAYER_2_COLOR, "wasd"),
+]
+# (spawn point, direction) of every player in roster order, one per possible player
+PLAYER_SPAWNS = [
+    (PLAYER_1_SPAWN_POINT, PLAYER_1_SPAWN_DIRECTION),
+    (PLAYER_2_SPAWN_POINT, PLAYER_2_SPAWN_DIRECTION),
+    ((WIDTH / 2 + 100, 0), "left"),
+    ((WIDTH / 2 - 100, 0), "right"),
+    ((WIDTH - 420, 0), "left"),
+    ((420, 0), "right"),
+    ((WIDTH - 250, 0), "left"),
+    ((250, 0), "right"),
+]
+
+# gamepad settings, for the button numbers of an Xbox controller
+GAMEPAD_DEADZONE = 0.25  # stick positions closer to the centre than this are ignored
+GAMEPAD_STICK_AXES = (0, 1)  # x and y axes of the stick that moves the player
+GAMEPAD_JUMP_BUTTONS = (0,)  # A
+GAMEPAD_SHOOT_BUTTONS = (2, 5)  # X and the right bumper
+
+# bot settings
+BOT_EDGE_MARGIN = 24  # distance bots keep between where they would stop and a platform edge
+BOT_FIRE_INTERVAL = 10  # fewest ticks between two shots of a bot
+BOT_WANDER_CHANCE = 0.02  # chance per tick that a bot changes where it walks
+BOT_BOOST_DISTANCE = 200  # horizontal distance from its target beyond which a recoil jumper shoots behind it
+
+# navigation settings
+NAV_CACHE_DIRECTORY = "navcache"  # in the game directory; graphs built by navigation.py, or by the first bot needing one
+NAV_SAMPLE_SPACING = 16  # distance between the points along a platform jumps are tried from
+NAV_RUN_UPS = (0, 3, 6, 10, 15)  # ticks of running before the jumps that are tried
+NAV_MAX_JUMP_TICKS = 180  # jumps still in the air after this many ticks are discarded
+NAV_START_TOLERANCE = 6  # how close to the start of a jump a bot must stop before taking it
+
+# tournament settings
+TOURNAMENT_MATCH_TICKS = FPS * 180  # ticks after which a match ends undecided
+TOURNAMENT_DEATHS = 5  # deaths that lose a match
+TOURNAMENT_REORDER_WINDOW = 4  # matches in flight per worker while results are written in order
+
 # gun properties
 GUN_RECOIL = 8
 MUZZLE_FLASH_OFFSET_X = 40
@@ -68,4 +193,7 @@ BULLET_SPEED = 22
 BULLET_OFFSET_X = 16
 BULLET_OFFSET_Y = -27
 BULLET_RUNNING_OFFSET_Y = -2
+BULLET_WIDTH = 3
+BULLET_HEIGHT = 1
+BULLET_POOL_SIZE = 32  # live bullets per match
 KNOCKBACK_MULTIPLIER = 1
@@ -7,8 +7,30 @@ Usage:
 
 from setuptools import setup
 
+try:
+    from py2app.build_app import py2app
+except ImportError:
+    py2app = None  # only bundling needs py2app, which setup_requires fetches for it
+
+CMDCLASS = {}
+if py2app is not None:
+    class BuildApp(py2app):
+        """Builds the texture atlas and the asset pack before bundling, so other setup.py commands leave them alone."""
+
+        def run(self):
+            import atlas  # decode every image with pygame, so only imported when bundling
+            import assetpack
+
+            atlas.build()  # a build artifact, so it always matches the images it is packed from
+            # ship the assets as one memory-mapped pack instead of the loose assets/ tree
+            assetpack.build()
+            super().run()
+
+    CMDCLASS['py2app'] = BuildApp
+
+
 APP = ['main.py']
-DATA_FILES = ['assets']
+DATA_FILES = ['assets.pack']
 OPTIONS = {'iconfile': 'assets/icon/icon.icns'}
 
 setup(
@@ -16,5 +38,6 @@ setup(
     name='Gun Mayhem',
     data_files=DATA_FILES,
     options={'py2app': OPTIONS},
+    cmdclass=CMDCLASS,
     setup_requires=['py2app'],
 )
@@ -1,8 +1,23 @@
 import sys
 from cx_Freeze import setup, Executable
+from cx_Freeze.command.build_exe import build_exe
+
+
+class BuildExe(build_exe):
+    """Builds the texture atlas and the asset pack before freezing, so other setup.py commands leave them alone."""
+
+    def run(self):
+        import atlas  # decode every image with pygame, so only imported when freezing
+        import assetpack
+
+        atlas.build()  # a build artifact, so it always matches the images it is packed from
+        # ship the assets as one memory-mapped pack instead of the loose assets/ tree
+        assetpack.build()
+        super().run()
+
 
 # Dependencies are automatically detected, but it might need fine tuning.
-build_exe_options = {"packages": ["os"], "include_files" : ["assets", "assets"]}
+build_exe_options = {"packages": ["os"], "include_files" : ["assets.pack"]}
 
 # GUI applications require a different base on Windows (the default is for
 # a console application).
@@ -15,5 +30,6 @@ setup(
     version = "0.1",
     description = "Gun Mayhem!",
     options = {"build_exe": build_exe_options},
+    cmdclass = {"build_exe": BuildExe},
     executables = [Executable("main.py", base=base, icon="assets/icon/icon.png")]
 )
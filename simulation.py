@@ -0,0 +1,639 @@
+import settings
+import collision
+import hitmasks
+import array
+import struct
+
+# the simulation has no display, audio or input device dependencies;
+# it is stepped one tick at a time from a list of per-player input bitfields
+
+# input bits
+UP = 1
+DOWN = 2
+LEFT = 4
+RIGHT = 8
+SHOOT = 16
+
+# packed state layouts (native byte order; states are meant for the machine that saved them)
+ANIMATIONS = ("idle", "run", "jump")
+# position, previous position, velocity, acceleration, respawn and hit counts, animation counters,
+# facing left, falling, standing, shooting, frame (animation, index, facing left, shooting)
+PLAYER_STATE = struct.Struct("8d2I4B4?2B2?")
+# tick, player count, bullet pool size, fired bullet count, live bullet count, largest bullet travel
+SIMULATION_STATE = struct.Struct("I2HQHd")
+
+
+class PlatformState:
+    """A class for the collision state of a platform."""
+
+    def __init__(self, coordinates: tuple, tile_count: int) -> None:
+        """
+        Initializes the PlatformState object.
+
+        Parameters:
+        coordinates (tuple): (x, y) representing the center of the platform.
+        tile_count (int): number of tiles the platform contains.
+        """
+        width = settings.PLATFORM_TILE_WIDTH * tile_count
+        height = settings.PLATFORM_TILE_HEIGHT
+        x, y = coordinates
+        # same rounding as pygame.Rect.center
+        left = int(x) - width // 2
+        top = int(y) - height // 2
+        self.box = collision.Box(left, top, left + width, top + height)
+        self.coordinates = coordinates
+        self.tile_count = tile_count
+
+
+class PlayerState:
+    """A class for the physical and animation state of a player."""
+
+    def __init__(self, index: int, spawn_point: tuple, direction: str) -> None:
+        """
+        Initializes the PlayerState object.
+
+        Parameters:
+        index (int): the index of the player in the simulation.
+        spawn_point (tuple): coordinates (x, y) where player will be created.
+        direction (str): the direction the player faces when spawning ("left" or "right").
+        """
+        self.index = index
+        self.spawn_point = spawn_point
+        self.spawn_direction = direction
+        self.direction = direction
+
+        # position, velocity and acceleration
+        self.x, self.y = spawn_point
+        self.prev_x, self.prev_y = spawn_point  # position at the start of the tick, for swept collisions
+        self.vel_x, self.vel_y = 0, 0
+        self.acc_x, self.acc_y = 0, 0
+
+        self.falling = True
+        self.standing = False
+        self.shooting = False
+        self.respawn_count = 0
+        self.hit_count = 0  # number of times the player was hit by an opponent
+
+        # animation state, kept here because step sounds depend on it
+        self.animation_ticks_per_frame = settings.FPS // settings.PLAYER_ANIMATION_FPS
+        self.animation_tick = 0
+        self.step_tick = 0
+        # indices of the next frames of the looping animations
+        self.idle_index = 0
+        self.run_index = 0
+        # (animation name, frame index, facing left, shooting) of the current image
+        self.frame = None
+        self.set_frame("idle", self.next_idle_index())
+
+    def update(self, inputs: int, events: list) -> None:
+        """
+        Updates the player by one tick.
+
+        Parameters:
+        inputs (int): bitfield of the player's pressed inputs.
+        events (list): list that (name, player index) tuples are appended to.
+        """
+        self.prev_x, self.prev_y = self.x, self.y
+        self.handle_input(inputs, events)
+        self.apply_friction()
+        self.update_velocity()
+        self.update_position()
+        self.update_animation(events)
+
+        if self.y > settings.VOID_HEIGHT:
+            self.respawn(events)  # player dies when below certain height
+
+    def handle_input(self, inputs: int, events: list) -> None:
+        """Handles the player's input bitfield."""
+        self.acc_x, self.acc_y = 0, settings.PLAYER_GRAVITY  # acceleration in the y is gravity
+        if inputs & UP and self.standing:
+            self.jump(events)
+        if inputs & LEFT:
+            self.move_left()
+        elif inputs & RIGHT:
+            self.move_right()
+
+    def move_right(self):
+        """Causes the player to accelerate right."""
+        self.acc_x = settings.PLAYER_ACC
+        self.direction = "right"
+
+    def move_left(self):
+        """Causes the player to accelerate left."""
+        self.acc_x = -settings.PLAYER_ACC
+        self.direction = "left"
+
+    def jump(self, events: list) -> None:
+        """Causes the player to jump."""
+        self.vel_y = settings.PLAYER_JUMP_HEIGHT
+        self.standing = False
+        events.append(("jump", self.index))
+
+    def apply_friction(self):
+        """Applies friction to the player acceleration."""
+        # model friction as proportional to player speed
+        # this limits max speed
+        self.acc_x += self.vel_x * settings.PLAYER_FRICTION
+
+    def update_velocity(self):
+        """Updates the velocity based on the acceleration."""
+        # v_2 = v_1 + aΔt, Δt = 1 tick -> v_2 = v_1 + a
+        self.vel_x += self.acc_x
+        self.vel_y += self.acc_y
+
+        # fixes perpetual running
+        if abs(self.vel_x) < 0.4:
+            self.vel_x = 0
+
+    def update_position(self):
+        """Updates the position of the player based on the velocity and acceleration."""
+        # Δd = v_2Δt - (1/2)aΔt^2, Δt = 1 tick -> Δd = v_2 - 0.5a
+        self.x += self.vel_x - 0.5 * self.acc_x
+        self.y += self.vel_y - 0.5 * self.acc_y
+        self.falling = self.vel_y > 0
+
+    def running(self) -> bool:
+        """Returns True if the player is accelerating in the direction they are moving."""
+        # if signs of acceleration and velocity are same, then player is running
+        return self.acc_x * self.vel_x > 0
+
+    def update_animation(self, events: list) -> None:
+        """Advances the animation state of the player."""
+        if not self.standing:
+            if self.falling:
+                self.set_frame("jump", 0)  # use falling down image
+            else:
+                self.set_frame("jump", 1)  # use jumping up image
+            return
+
+        # only advance animation every n ticks due to difference in game FPS and animation FPS
+        tick = self.animation_tick
+        self.animation_tick = (tick + 1) % self.animation_ticks_per_frame
+        if tick != 0:
+            return
+
+        if self.running():
+            self.set_frame("run", self.run_index)
+            self.run_index = (self.run_index + 1) % settings.PLAYER_RUN_FRAMES
+            step_tick = self.step_tick
+            self.step_tick = (step_tick + 1) % self.animation_ticks_per_frame
+            if step_tick == 0:
+                events.append(("step", self.index))
+        else:
+            self.set_frame("idle", self.next_idle_index())
+
+    def next_idle_index(self) -> int:
+        """Returns the index of the next idle frame and advances the idle animation."""
+        index = self.idle_index
+        self.idle_index = (index + 1) % settings.PLAYER_IDLE_FRAMES
+        return index
+
+    def set_frame(self, name: str, index: int) -> None:
+        """
+        Sets the current animation frame, including the muzzle flash if the player is shooting.
+
+        Parameters:
+        name (str): the name of the animation ("idle", "run" or "jump").
+        index (int): the index of the frame in the animation.
+        """
+        self.frame = (name, index, self.direction == "left", self.shooting)
+        self.shooting = False
+
+    def hitbox(self) -> collision.Box:
+        """Returns the bounding box of the opaque pixels of the player's current frame, the broad phase of its collisions."""
+        mask = hitmasks.get_masks()[self.frame]
+        x, y = hitmasks.pixel(self.x), hitmasks.pixel(self.y)
+        return collision.Box(x + mask.left, y + mask.top, x + mask.right, y + mask.bottom)
+
+    def touches(self, box: collision.Box, x: float = None, y: float = None) -> bool:
+        """
+        Returns True if an opaque pixel of the player's current frame lies inside box; the narrow phase of its collisions.
+
+        Parameters:
+        box (collision.Box): the box to test.
+        x, y (float): the position to test the player at; defaults to its current position.
+        """
+        return hitmasks.get_masks()[self.frame].overlaps(self.x if x is None else x, self.y if y is None else y,
+                                                         box.left, box.top, box.right, box.bottom)
+
+    def respawn(self, events: list) -> None:
+        """Resets the player's position, velocity, and direction."""
+        events.append(("death", self.index))
+        self.x, self.y = self.spawn_point
+        self.prev_x, self.prev_y = self.spawn_point  # teleporting is not movement
+        self.direction = self.spawn_direction
+        self.vel_x, self.vel_y = 0, 0
+        self.respawn_count += 1
+
+    def pack_into(self, buffer: bytearray, offset: int) -> None:
+        """Writes the mutable state of the player into buffer at offset."""
+        name, index, facing_left, shooting = self.frame
+        PLAYER_STATE.pack_into(
+            buffer, offset,
+            self.x, self.y, self.prev_x, self.prev_y, self.vel_x, self.vel_y, self.acc_x, self.acc_y,
+            self.respawn_count, self.hit_count,
+            self.animation_tick, self.step_tick, self.idle_index, self.run_index,
+            self.direction == "left", self.falling, self.standing, self.shooting,
+            ANIMATIONS.index(name), index, facing_left, shooting
+        )
+
+    def unpack_from(self, data: bytes, offset: int) -> None:
+        """Restores the mutable state of the player from data at offset."""
+        (self.x, self.y, self.prev_x, self.prev_y, self.vel_x, self.vel_y, self.acc_x, self.acc_y,
+         self.respawn_count, self.hit_count,
+         self.animation_tick, self.step_tick, self.idle_index, self.run_index,
+         facing_left, self.falling, self.standing, self.shooting,
+         name, index, frame_left, frame_shooting) = PLAYER_STATE.unpack_from(data, offset)
+        self.direction = "left" if facing_left else "right"
+        self.frame = (ANIMATIONS[name], index, frame_left, frame_shooting)
+
+
+def get_bullet_offset(x_vel: float) -> tuple:
+    """
+    Gets the x- and y-offset for a bullet relative to the position of the player who fired it.
+
+    Parameters:
+    x_vel (float): how many pixels the bullet is moving per tick.
+    """
+    x_offset = settings.BULLET_OFFSET_X
+    y_offset = settings.BULLET_OFFSET_Y
+    # check if player was moving
+    if abs(x_vel) > settings.BULLET_SPEED:
+        # add additonal offset due to change in height
+        y_offset += settings.BULLET_RUNNING_OFFSET_Y
+    if x_vel < 0:
+        x_offset *= -1  # flip x-offset
+    return x_offset, y_offset
+
+
+class BulletPool:
+    """A fixed-size pool of bullets stored in flat arrays and reused slot by slot."""
+
+    def __init__(self, size: int = settings.BULLET_POOL_SIZE) -> None:
+        """
+        Initializes the BulletPool object.
+
+        Parameters:
+        size (int): the maximum number of live bullets; shots fired while the pool is full produce no bullet.
+        """
+        self.size = size
+        self.x = array.array("d", bytes(8 * size))
+        self.prev_x = array.array("d", bytes(8 * size))  # x at the start of the tick, for swept collisions
+        self.y = array.array("d", bytes(8 * size))
+        self.vel_x = array.array("d", bytes(8 * size))
+        self.author = array.array("b", bytes(size))
+        self.order = array.array("q", bytes(8 * size))  # firing order of the bullet in each slot
+        self.fired_count = 0
+        # slots of live bullets in the order they were fired
+        self.active = []
+        # free slots, used from the end
+        self.free = list(range(size - 1, -1, -1))
+        self.max_travel = 0  # largest distance a bullet moved during the last update
+        # broad phase of the live bullets, updated incrementally as they move
+        self.grid = collision.UniformGrid()
+        self.half_width = settings.BULLET_WIDTH / 2
+        self.half_height = settings.BULLET_HEIGHT / 2
+
+    def spawn(self, x: float, y: float, vel_x: float, author: int) -> int:
+        """
+        Claims a free slot for a new bullet and returns it, or None if the pool is full.
+
+        Parameters:
+        x (float): the x coordinate of the center of the bullet.
+        y (float): the y coordinate of the center of the bullet.
+        vel_x (float): how many pixels the bullet moves per tick.
+        author (int): the index of the player who fired the bullet.
+        """
+        if not self.free:
+            return None
+        slot = self.free.pop()
+        self.x[slot] = x
+        self.prev_x[slot] = x
+        self.y[slot] = y
+        self.vel_x[slot] = vel_x
+        self.author[slot] = author
+        self.order[slot] = self.fired_count
+        self.fired_count += 1
+        self.active.append(slot)
+        self.grid.insert(slot, *self.get_box(slot))
+        return slot
+
+    def get_box(self, slot: int) -> tuple:
+        """Returns the (left, top, right, bottom) edges of the bullet in slot."""
+        x, y = self.x[slot], self.y[slot]
+        return (x - self.half_width, y - self.half_height,
+                x + self.half_width, y + self.half_height)
+
+    def update(self) -> None:
+        """Moves every live bullet and frees the slots of bullets outside of the screen."""
+        x, prev_x, vel_x = self.x, self.prev_x, self.vel_x
+        width = settings.WIDTH
+        active = []
+        self.max_travel = 0
+        for slot in self.active:
+            prev_x[slot] = x[slot]
+            x[slot] += vel_x[slot]
+            self.max_travel = max(self.max_travel, abs(vel_x[slot]))
+            # check if outside of screen
+            if 0 <= x[slot] <= width:
+                active.append(slot)
+                self.grid.move(slot, *self.get_box(slot))
+            else:
+                self.free.append(slot)
+                self.grid.remove(slot)
+        self.active = active
+
+    def remove(self, slots: list[int]) -> None:
+        """
+        Frees the slots of bullets that hit something.
+
+        Parameters:
+        slots (list[int]): the slots to free.
+        """
+        removed = set(slots)
+        self.active = [slot for slot in self.active if slot not in removed]
+        self.free.extend(removed)
+        for slot in removed:
+            self.grid.remove(slot)
+
+    def clear(self) -> None:
+        """Frees every slot."""
+        self.active = []
+        self.free = list(range(self.size - 1, -1, -1))
+        self.grid.clear()
+
+    def get_state(self) -> bytes:
+        """Returns the contents of the slots and the live and free slot lists as bytes."""
+        return b"".join((
+            self.x.tobytes(), self.prev_x.tobytes(), self.y.tobytes(), self.vel_x.tobytes(),
+            self.author.tobytes(), self.order.tobytes(),
+            array.array("H", self.active).tobytes(), array.array("H", self.free).tobytes()
+        ))
+
+    def set_state(self, data: memoryview, fired_count: int, active_count: int, max_travel: float) -> None:
+        """
+        Restores the pool from bytes returned by get_state() and rebuilds its broad phase.
+
+        Parameters:
+        data (memoryview): the bytes returned by get_state().
+        fired_count (int): the number of bullets fired so far.
+        active_count (int): the number of live bullets.
+        max_travel (float): the largest distance a bullet moved during the last update.
+        """
+        offset = 0
+        for values in (self.x, self.prev_x, self.y, self.vel_x, self.author, self.order):
+            size = len(values) * values.itemsize
+            memoryview(values).cast("B")[:] = data[offset:offset + size]
+            offset += size
+        slots = array.array("H")
+        slots.frombytes(data[offset:])
+        self.active = slots[:active_count].tolist()
+        self.free = slots[active_count:].tolist()
+        self.fired_count = fired_count
+        self.max_travel = max_travel
+        self.grid.clear()
+        for slot in self.active:
+            self.grid.insert(slot, *self.get_box(slot))
+
+    def __len__(self) -> int:
+        return len(self.active)
+
+
+class Simulation:
+    """A headless, fixed-timestep simulation of a game of Gun Mayhem."""
+
+    def __init__(self, spawns: list[tuple] = None, platform_list: list[tuple] = None,
+                 bullet_pool_size: int = settings.BULLET_POOL_SIZE) -> None:
+        """
+        Initializes the Simulation object.
+
+        Parameters:
+        spawns (list[tuple]): a (spawn_point, direction) tuple for every player.
+        platform_list (list[tuple]): a (coordinates, tile_count) tuple for every platform.
+        bullet_pool_size (int): the maximum number of live bullets.
+        """
+        if spawns is None:
+            spawns = settings.PLAYER_SPAWNS[:2]  # a two-player match
+        if platform_list is None:
+            platform_list = settings.PLATFORM_LIST
+
+        self.players = [PlayerState(index, spawn_point, direction)
+                        for index, (spawn_point, direction) in enumerate(spawns)]
+        self.platforms = [PlatformState(coordinates, tile_count)
+                          for coordinates, tile_count in platform_list]
+        # platforms never move, so their broad phase is built once
+        self.platform_grid = collision.UniformGrid()
+        for index, platform in enumerate(self.platforms):
+            box = platform.box
+            self.platform_grid.insert(index, box.left, box.top, box.right, box.bottom)
+        self.bullets = BulletPool(bullet_pool_size)
+        self.tick = 0
+
+    def step(self, inputs: list[int]) -> list[tuple]:
+        """
+        Advances the simulation by one tick and returns the (name, player index) events that occurred.
+
+        Parameters:
+        inputs (list[int]): input bitfield of every player.
+        """
+        events = []
+        for player, player_inputs in zip(self.players, inputs):
+            if player_inputs & SHOOT:
+                self.fire_bullet(player, events)
+
+        for player, player_inputs in zip(self.players, inputs):
+            player.update(player_inputs, events)
+
+        self.bullets.update()
+
+        self.handle_collisions(events)
+        self.tick += 1
+        return events
+
+    def save_state(self) -> bytes:
+        """
+        Returns everything that changes while the simulation runs, packed into bytes.
+
+        Loading the bytes with load_state() returns a simulation with the same spawns,
+        platforms and bullet pool size to the exact same tick, so the state can be
+        saved and restored many times per frame for rollback and replay seeking.
+        """
+        bullets = self.bullets
+        buffer = bytearray(SIMULATION_STATE.size + PLAYER_STATE.size * len(self.players))
+        SIMULATION_STATE.pack_into(buffer, 0, self.tick, len(self.players), bullets.size,
+                                   bullets.fired_count, len(bullets.active), bullets.max_travel)
+        offset = SIMULATION_STATE.size
+        for player in self.players:
+            player.pack_into(buffer, offset)
+            offset += PLAYER_STATE.size
+        return bytes(buffer) + bullets.get_state()
+
+    def load_state(self, state: bytes) -> None:
+        """
+        Restores the simulation to a state returned by save_state().
+
+        Parameters:
+        state (bytes): the saved state.
+        """
+        (tick, player_count, pool_size, fired_count,
+         active_count, max_travel) = SIMULATION_STATE.unpack_from(state)
+        if player_count != len(self.players) or pool_size != self.bullets.size:
+            raise ValueError("state was saved from a simulation with a different player count or bullet pool size")
+        self.tick = tick
+        offset = SIMULATION_STATE.size
+        for player in self.players:
+            player.unpack_from(state, offset)
+            offset += PLAYER_STATE.size
+        self.bullets.set_state(memoryview(state)[offset:], fired_count, active_count, max_travel)
+
+    def fire_bullet(self, player: PlayerState, events: list) -> None:
+        """
+        Creates a bullet and adds recoil effect to the player.
+
+        Parameters:
+        player (PlayerState): the player that shot the bullet.
+        events (list): list that (name, player index) tuples are appended to.
+        """
+        player.shooting = True
+        self.add_bullet(player)
+        events.append(("shoot", player.index))
+        self.add_recoil(player)
+
+    def add_recoil(self, player: PlayerState) -> None:
+        """Changes the velocity of the player according to the recoil settings."""
+        if player.direction == "left":
+            player.vel_x += settings.GUN_RECOIL
+        else:
+            player.vel_x += -settings.GUN_RECOIL
+
+    def add_bullet(self, player: PlayerState) -> int:
+        """Creates a bullet with the appropriate velocity and returns its slot in the pool."""
+        x_vel = settings.BULLET_SPEED + player.vel_x
+        if player.direction == "left":
+            x_vel = -settings.BULLET_SPEED + player.vel_x
+        x_offset, y_offset = get_bullet_offset(x_vel)
+        return self.bullets.spawn(player.x + x_offset, player.y + y_offset, x_vel, player.index)
+
+    def handle_collisions(self, events: list) -> None:
+        """Checks and handles player collisions with platforms and bullets."""
+        for player in self.players:
+            hitbox = player.hitbox()
+
+            platform = self.get_platform_collision(player, hitbox)
+            if platform is None and player.falling:
+                # catch landings on platforms the player fell through during the tick
+                platform = self.get_platform_sweep(player, hitbox)
+
+            if platform is not None:
+                if player.falling:
+                    player.vel_y = 0
+                    player.standing = True
+                    # offset due to sprite feet being above the bottom of the image
+                    player.y = platform.box.top + settings.PLAYER_OFFSET
+            else:
+                player.standing = False
+
+            bullet_collisions = self.get_bullet_collisions(player, hitbox)
+            if bullet_collisions:
+                self.bullets.remove(bullet_collisions)
+                slot = bullet_collisions[0]
+                if self.bullets.author[slot] != player.index:
+                    player.vel_x += self.bullets.vel_x[slot] * settings.KNOCKBACK_MULTIPLIER
+                    player.hit_count += 1
+                    events.append(("hit", player.index))
+
+    def get_platform_collision(self, player: PlayerState, hitbox: collision.Box) -> PlatformState:
+        """
+        Returns the first platform in the platform list touching the player's opaque pixels, or None.
+
+        Parameters:
+        player (PlayerState): the player to check.
+        hitbox (collision.Box): the player's hitbox.
+        """
+        candidates = self.platform_grid.query(hitbox)
+        for index in sorted(candidates):
+            platform = self.platforms[index]
+            if hitbox.overlaps(platform.box) and player.touches(platform.box):
+                return platform
+        return None
+
+    def get_platform_sweep(self, player: PlayerState, hitbox: collision.Box) -> PlatformState:
+        """
+        Returns the platform whose top the player's hitbox crossed earliest during the tick, or None.
+
+        Parameters:
+        player (PlayerState): the player to check.
+        hitbox (collision.Box): the player's hitbox at the end of the tick.
+        """
+        dx, dy = player.x - player.prev_x, player.y - player.prev_y
+        half_width = (hitbox.right - hitbox.left) / 2
+        half_height = (hitbox.bottom - hitbox.top) / 2
+        start_x = hitbox.left + half_width - dx
+        start_y = hitbox.top + half_height - dy
+        start_bottom = hitbox.bottom - dy
+
+        swept_box = collision.Box(min(hitbox.left, hitbox.left - dx), min(hitbox.top, hitbox.top - dy),
+                                  max(hitbox.right, hitbox.right - dx), max(hitbox.bottom, hitbox.bottom - dy))
+        landing = None
+        for index in sorted(self.platform_grid.query(swept_box)):
+            platform = self.platforms[index]
+            if start_bottom > platform.box.top:
+                continue  # only landings from above
+            time = collision.sweep(start_x, start_y, dx, dy, platform.box, half_width, half_height)
+            if time is None or (landing is not None and time >= landing[0]):
+                continue
+            # the box only bounds the body; the feet must stand on the platform where it would land
+            if player.touches(platform.box, player.prev_x + dx * time, platform.box.top + settings.PLAYER_OFFSET):
+                landing = (time, platform)
+        return landing[1] if landing else None
+
+    def get_bullet_collisions(self, player: PlayerState, hitbox: collision.Box) -> list[int]:
+        """
+        Returns the slots of the bullets that touched the player's hitbox during the tick, earliest impact first.
+
+        Bullets are swept against the hitbox along their motion relative to the player, so fast
+        bullets cannot pass through it between two ticks, and the box the sweep covered is then
+        tested against the player's mask. A player's own bullets only count if they touch it
+        at the end of the tick, since they are fired from inside the shooter.
+
+        Parameters:
+        player (PlayerState): the player to check.
+        hitbox (collision.Box): the player's hitbox at the end of the tick.
+        """
+        bullets = self.bullets
+        player_dx, player_dy = player.x - player.prev_x, player.y - player.prev_y
+        reach_x = bullets.max_travel + abs(player_dx)
+        reach_y = abs(player_dy)
+        swept_box = collision.Box(hitbox.left - reach_x, hitbox.top - reach_y,
+                                  hitbox.right + reach_x, hitbox.bottom + reach_y)
+        candidates = bullets.grid.query(swept_box)
+        if not candidates:
+            return []
+
+        x, y, prev_x = bullets.x, bullets.y, bullets.prev_x
+        half_width, half_height = bullets.half_width, bullets.half_height
+        hits = []
+        for slot in candidates:
+            bullet = collision.Box(x[slot] - half_width, y[slot] - half_height,
+                                   x[slot] + half_width, y[slot] + half_height)
+            overlapping = hitbox.overlaps(bullet)
+            own = bullets.author[slot] == player.index
+            if not overlapping and own:
+                continue
+            # motion of the bullet relative to the player during the tick
+            dx = (x[slot] - prev_x[slot]) - player_dx
+            dy = -player_dy
+            time = collision.sweep(x[slot] - dx, y[slot] - dy, dx, dy, hitbox, half_width, half_height)
+            if time is None:
+                if not overlapping:
+                    continue
+                time = 1.0
+            # narrow phase: the opaque pixels the bullet passed over, or only those under it for own bullets
+            if not own:
+                bullet = collision.Box(min(bullet.left, bullet.left - dx), min(bullet.top, bullet.top - dy),
+                                       max(bullet.right, bullet.right - dx), max(bullet.bottom, bullet.bottom - dy))
+            if not player.touches(bullet):
+                continue
+            hits.append((time, bullets.order[slot], slot))
+        hits.sort()
+        return [slot for time, order, slot in hits]
@@ -2,228 +2,148 @@ import pygame
 import pygame.freetype
 import settings
 import controls
+import simulation
+import hitmasks
 import itertools
-import copy
+import functools
 
 
 # aliases
-Vector = pygame.math.Vector2  # Pygame class for 2D vectors
 Sprite = pygame.sprite.Sprite  # Pygame class for sprites
+DirtySprite = pygame.sprite.DirtySprite  # Pygame class for sprites that are only redrawn when changed
+
+
+@functools.lru_cache(maxsize=settings.TEXT_CACHE_SIZE)
+def render_text(font: pygame.freetype.Font, text: str, color: tuple) -> pygame.Surface:
+    """
+    Returns a surface with the rendered text, cached by font (and therefore size), text and color.
+
+    Parameters:
+    font (pygame.freetype.Font): the font used to render the text.
+    text (str): the text to render.
+    color (tuple): a tuple (R,G,B) representing the color of the text.
+    """
+    return font.render(text, color)[0]
 
 
 class Animation():
     """A class for player animations."""
 
-    def __init__(self, idle: tuple[pygame.Surface], run: tuple[pygame.Surface], jump: tuple[pygame.Surface]):
+    def __init__(self, idle: tuple[pygame.Surface], run: tuple[pygame.Surface], jump: tuple[pygame.Surface], muzzle_flash: pygame.Surface = None):
         """
-        Initializes the Animation object.
+        Initializes the Animation object and precomputes every variant of every frame.
 
         idle (tuple[pygame.Surface]): sequence of images for the idle animation.
         run (tuple[pygame.Surface]): sequence of images for the run animation.
         jump (tuple[pygame.Surface]): two images.
             jump[0]: player going up.
             jump[1]: player going down.
+        muzzle_flash (pygame.Surface): image of the muzzle flash drawn on frames where the player is shooting.
         """
-        # create infinite cycles of the images in the tuples to be animated
-        self.idle = itertools.cycle(idle)
-        self.run = itertools.cycle(run)
+        self.idle = tuple(idle)
+        self.run = tuple(run)
         # jump is just a tuple of two images
-        self.jump = jump
+        self.jump = tuple(jump)
+        self.muzzle_flash = muzzle_flash
+
+        # (animation name, frame index, facing left, shooting) -> image; collision masks are built by hitmasks
+        self.frames = {}
+        for name, images in (("idle", self.idle), ("run", self.run), ("jump", self.jump)):
+            for index, image in enumerate(images):
+                for shooting in (False, True):
+                    if shooting and muzzle_flash is None:
+                        continue
+                    shot_image = self.blit_muzzle_flash(image, name) if shooting else image
+                    for facing_left in (False, True):
+                        frame = shot_image
+                        if facing_left:
+                            frame = pygame.transform.flip(frame, True, False)
+                        self.frames[(name, index, facing_left, shooting)] = frame
+
+    def blit_muzzle_flash(self, image: pygame.Surface, name: str) -> pygame.Surface:
+        """
+        Returns a copy of image with the muzzle flash blitted at the gun's location.
+
+        Parameters:
+        image (pygame.Surface): the frame to draw the muzzle flash on.
+        name (str): the name of the animation the frame belongs to.
+        """
+        return hitmasks.blit_muzzle_flash(image, self.muzzle_flash, name)
+
+    def get_frame(self, name: str, index: int, facing_left: bool = False, shooting: bool = False) -> pygame.Surface:
+        """
+        Returns the image of the precomputed frame.
+
+        Parameters:
+        name (str): the name of the animation ("idle", "run" or "jump").
+        index (int): the index of the frame in the animation.
+        facing_left (bool): whether the frame is flipped to face left.
+        shooting (bool): whether the frame includes the muzzle flash.
+        """
+        return self.frames[(name, index, facing_left, shooting and self.muzzle_flash is not None)]
+
+    def frame_count(self, name: str) -> int:
+        """Returns the number of frames in the animation called name."""
+        return len(getattr(self, name))
 
 
-class Player(Sprite):
-    """A class for players."""
+class Player(DirtySprite):
+    """A class for players, drawn from the state of a simulated player."""
 
-    def __init__(self, name: str, controls: controls.KeyboardControl, spawn_point: tuple, animation: Animation, direction, muzzle_flash: pygame.Surface, sfx: dict) -> None:
+    def __init__(self, name: str, controls: controls.KeyboardControl, state: simulation.PlayerState, animation: Animation) -> None:
         """
         Initializes the Player object.
 
         Parameters:
         name (str): the name of the player.
         controls (KeyboardControl): player keyboard control settings.
-        spawn_point (tuple): coordinates (x, y) where player will be created.
+        state (simulation.PlayerState): the simulated state of the player.
         animations (Animation): contains images that represent the player's visual appearance.
         """
         super().__init__() # call parent class constructor
+        self.name = name
+        self.controls = controls
+        self.state = state
         self.animation = animation
         self.set_image() # set initial image
-        self.set_vectors(spawn_point)
         self.set_rect() # set rect that contains player
-        self.set_mask() # set the collision mask
-
-        self.spawn_direction = direction
-        self.direction = direction
-
-        self.spawn_point = spawn_point
-        self.controls = controls
-        self.falling = True
-        self.standing = False
 
-        self.respawn_count = 0
-
-        animation_ticks_per_frame = settings.FPS // settings.PLAYER_ANIMATION_FPS
-        sound_ticks_per_frame = animation_ticks_per_frame
-
-        self.animation_tick = itertools.cycle(range(animation_ticks_per_frame))
-        self.step_tick = itertools.cycle(range(sound_ticks_per_frame))
-
-        self.muzzle_flash = muzzle_flash
-        self.shooting = False
-
-        self.name = name
-        self.sfx = sfx
-
-    def set_mask(self):
-        """Sets a mask from the player image used for collision checking."""
-        self.mask = pygame.mask.from_surface(self.image)
+    @property
+    def respawn_count(self) -> int:
+        """The number of times the player has died."""
+        return self.state.respawn_count
 
     def set_rect(self):
         """Sets the player's rect from the player image and position."""
         self.rect = self.image.get_rect()
         # places the rectangle's and image's midbottom at the required position
-        self.rect.midbottom = self.pos
-
-    def set_vectors(self, spawn_point):
-        """Sets the initial position, velocity, and acceleration vectors."""
-        self.pos = Vector(spawn_point)
-        self.vel = Vector(0, 0)
-        self.acc = Vector(0, 0)
+        self.rect.midbottom = (self.state.x, self.state.y)
 
     def set_image(self):
-        """Sets the player's image to the next frame for the idle animation."""
-        self.image = next(self.animation.idle)
+        """Sets the player's image to the current precomputed animation frame."""
+        self.image = self.animation.get_frame(*self.state.frame)
 
     def update(self):
-        """Updates the sprite each frame, taking into account user input."""
-        self.handle_keys()  # keyboard input
-        self.apply_friction()
-        self.update_velocity()
-        self.update_position()
-        self.update_image()
-        self.set_mask()  # collision mask
-
-        if self.pos.y > settings.VOID_HEIGHT:
-            self.respawn()  # player dies when below certain height
-
-    def update_image(self):
-        """Update the sprite's image to enable animations."""
-        if not self.standing:
-            if self.falling:
-                self.image = self.animation.jump[0]  # use falling down image
-            else:
-                self.image = self.animation.jump[1]  # use jumping up image
-
-            self.blit_muzzle_flash_if_shooting()
-            self.flip_if_facing_left()
-
-        elif next(self.animation_tick) == 0:
-            # if signs of acceleration and velocity are same, then player is running
-            if self.acc.x * self.vel.x > 0:
-                self.image = next(self.animation.run)
-                # only advance animation every n frames due to difference in game FPS and animation FPS
-                if next(self.step_tick) == 0:
-                    self.sfx_step()
-            else:
-                self.image = next(self.animation.idle)
-
-            self.blit_muzzle_flash_if_shooting()
-            self.flip_if_facing_left()
-
-    def blit_muzzle_flash_if_shooting(self):
-        """Blits the image of a muzzle flash onto to the sprite if the player is shooting."""
-        if self.shooting:
-            self.image = self.image.copy()
-            # calculate offset to determine where to blit the muzzle flash
-            x_offset = settings.MUZZLE_FLASH_OFFSET_X
-            y_offset = settings.MUZZLE_FLASH_OFFSET_Y
-            if self.acc.x * self.vel.x > 0 and self.standing:
-                y_offset += settings.MUZZLE_FLASH_RUNNING_OFFSET_Y
-
-            # blit the image of a muzzle flash at the proper location
-            self.image.blit(self.muzzle_flash, (x_offset, y_offset))
-            self.shooting = False
-
-    def flip_if_facing_left(self):
-        """Flips the player if they are facing left."""
-        if self.direction == "left":
-            self.image = pygame.transform.flip(self.image, True, False)
-
-    def update_position(self):
-        """Updates the position of the player based on the velocity and acceleration."""
-        # update position vector
-        # Δd = v_2Δt - (1/2)aΔt^2, Δt = 1 tick -> Δd = v_2 - 0.5a
-        self.pos += self.vel - 0.5 * self.acc
-
-        # move sprite
-        self.rect.midbottom = self.pos
-        self.falling = self.vel.y > 0
-
-    def update_velocity(self):
-        """Updates the velocity based on the acceleration."""
-        # update new velocity
-        # v_2 = v_1 + aΔt, Δt = 1 tick -> v_2 = v_1 + a
-        self.vel += self.acc
-
-        # fixes perpetual running
-        if abs(self.vel.x) < 0.4:
-            self.vel.x = 0
-
-    def apply_friction(self):
-        """Applies friction to the player acceleration."""
-        # model friction as proportional to player speed
-        # this limits max speed
-        self.acc.x += self.vel.x * settings.PLAYER_FRICTION
-
-    def handle_keys(self):
-        """Handles the player keyboard input."""
-        self.acc = Vector(
-            0, settings.PLAYER_GRAVITY)  # acceleration in the y is gravity
-        keys = pygame.key.get_pressed()
-        if keys[self.controls.UP] and self.standing:
-            self.jump()
-        if keys[self.controls.LEFT]:
-            self.move_left()
-        elif keys[self.controls.RIGHT]:
-            self.move_right()
-
-    def move_right(self):
-        """Causes the player to accelerate right."""
-        self.acc.x = settings.PLAYER_ACC
-        self.direction = "right"
-
-    def move_left(self):
-        """Causes the player to accelerate left."""
-        self.acc.x = -settings.PLAYER_ACC
-        self.direction = "left"
-
-    def jump(self):
-        """Causes the player to jump."""
-        self.vel.y = settings.PLAYER_JUMP_HEIGHT
-        self.standing = False
-        self.sfx_jump()
-
-    def sfx_jump(self):
-        """Plays the sound effect for the player jumping."""
-        sound = self.sfx["jump"]
-        sound.play()
-
-    def sfx_step(self):
-        """Plays the sound effect for the player running."""
-        sound = self.sfx["step"]
-        sound.play()
-
-    def sfx_death(self):
-        """Plays the sound effect for the player's death."""
-        sound = self.sfx["death"]
-        sound.play()
-
-    def respawn(self):
-        """Resets the player's positiion, velocity, and acceleration."""
-        self.sfx_death()
-        self.pos = self.spawn_point
-        self.direction = self.spawn_direction
-        self.vel.x, self.vel.y = 0, 0
-        self.respawn_count += 1
+        """Updates the sprite each frame from the simulated state."""
+        old_image, old_topleft = self.image, self.rect.topleft
+        self.set_image()
+        self.rect.midbottom = (self.state.x, self.state.y)
+        if self.image is not old_image or self.rect.topleft != old_topleft:
+            self.dirty = 1  # redraw on the next frame
+
+    def interpolate(self, alpha: float):
+        """
+        Places the sprite between its positions at the start and end of the last tick.
+
+        Parameters:
+        alpha (float): the fraction of a tick elapsed since the last tick, from 0 to 1.
+        """
+        state = self.state
+        old_topleft = self.rect.topleft
+        self.rect.midbottom = (state.prev_x + (state.x - state.prev_x) * alpha,
+                               state.prev_y + (state.y - state.prev_y) * alpha)
+        if self.rect.topleft != old_topleft:
+            self.dirty = 1
 
 
 class Platform(Sprite):
@@ -251,7 +171,6 @@ class Platform(Sprite):
         self.blit_tiles(image, w)
 
         self.set_rect(coordinates)  # move the platforms to required locations
-        self.mask = pygame.mask.from_surface(self.image)
 
     def create_surface(self, h: int, w: int):
         """Creates a surface on which textures are tiled."""
@@ -273,81 +192,43 @@ class Platform(Sprite):
         self.rect.center = coordinates
 
 
-class Bullet(Sprite):
-    """A class for bullets."""
+class BulletRenderer:
+    """A class that draws every bullet of a simulation.BulletPool."""
 
-    def __init__(self, player_pos: tuple, x_vel: int, image: pygame.Surface, author: object) -> None:
+    def __init__(self, image: pygame.Surface, pool: simulation.BulletPool) -> None:
         """
-        Initializes the Bullet object.
+        Initializes the BulletRenderer object.
 
         Parameters:
-        player_pos (tuple): the position of the player when the bullet was fired.
-        x_vel (int): the velocity of the bullet.
-        image (pygame.Surface): the image of the bullet.
-        author (object): the player who fired the bullet.
+        image (pygame.Surface): the image of a bullet travelling right.
+        pool (simulation.BulletPool): the pool of bullets to draw.
         """
-        super().__init__()
-        self.author = author
-
-        self.image = image
-        self.mask = pygame.mask.from_surface(self.image)
-
-        self.set_vectors(player_pos, x_vel)
-        self.set_rect()
-        self.set_mask()
-
-    def set_mask(self):
-        """Sets a mask from the bullet image used for collision checking."""
-        self.mask = pygame.mask.from_surface(self.image)
-
-    def set_vectors(self, player_pos: tuple, x_vel: int) -> None:
+        self.pool = pool
+        # the two images are shared by every bullet
+        self.image_right = image
+        self.image_left = pygame.transform.flip(image, True, False)
+        self.half_width = image.get_width() // 2
+        self.half_height = image.get_height() // 2
+
+    def draw(self, surface: pygame.Surface, alpha: float = 1.0) -> list[pygame.Rect]:
         """
-        Sets the position, velocity, and acceleration vectors.
+        Blits every live bullet onto surface in one call and returns the rects drawn.
 
         Parameters:
-        player_pos (tuple): a tuple (x,y) representing the position of the player who shot the bullet.
-        x_vel (int): an int representing how many pixels the bullet moves per frame.
+        surface (pygame.Surface): the surface to draw on.
+        alpha (float): the fraction of a tick elapsed since the last tick; bullets are drawn that far along their path.
         """
-        player_x, player_y = player_pos
-        x_offset, y_offset = self.get_offset(x_vel)
+        pool = self.pool
+        x, prev_x, y, vel_x = pool.x, pool.prev_x, pool.y, pool.vel_x
+        blit_sequence = [
+            (self.image_left if vel_x[slot] < 0 else self.image_right,
+             (int(prev_x[slot] + (x[slot] - prev_x[slot]) * alpha) - self.half_width, int(y[slot]) - self.half_height))
+            for slot in pool.active
+        ]
+        return surface.blits(blit_sequence)
 
-        self.pos = Vector(player_x + x_offset, player_y + y_offset)
-        self.vel = Vector(x_vel, 0)
 
-    def get_offset(self, x_vel: int) -> tuple:
-        """
-        Gets the x- and y-offset for the bullets relative to the player's position.
-
-        Parameters:
-        x_vel (int): an int representing how many pixels the bullet is moving per frame.
-        """
-        x_offset = settings.BULLET_OFFSET_X
-        y_offset = settings.BULLET_OFFSET_Y
-        # check if player was moving
-        if abs(x_vel) > settings.BULLET_SPEED:
-            # add additonal offset due to change in height
-            y_offset += settings.BULLET_RUNNING_OFFSET_Y
-        if x_vel < 0:
-            self.image = pygame.transform.flip(self.image, True, False)
-            x_offset *= -1  # flip x-offset
-        return x_offset, y_offset
-
-    def set_rect(self):
-        """Sets the bullet's rect based on its image."""
-        self.rect = self.image.get_rect()
-        self.rect.midbottom = self.pos
-
-    def update(self):
-        """Updates the bullet position based on its velocity."""
-        self.pos.x += self.vel.x
-        self.rect.center = self.pos
-
-        # check if outside of screen
-        if not (0 <= self.pos.x <= settings.WIDTH):
-            self.kill()  # delete from all sprite groups to prevent memory leak
-
-
-class Scoreboard(Sprite):
+class Scoreboard(DirtySprite):
     """A class for Scoreboard objects."""
 
     def __init__(self, font: pygame.freetype.Font, color: tuple, position: tuple, player: object):
@@ -366,21 +247,30 @@ class Scoreboard(Sprite):
         self.font = font
         self.color = color
 
-        # must create a copy of the idle animation to prevent modifying the original object,
-        # which will cause the animation to speed up as it will be iterated two times per tick
-        self.icon_animation = copy.copy(player.animation.idle)
+        # the scoreboard keeps its own frame index so it does not advance the player's animation
+        self.icon_animation = player.animation.idle
+        self.icon_index = 0
+        self.advance_icon()
 
         ticks_per_frame = settings.FPS // settings.PLAYER_ANIMATION_FPS
         self.animation_ticker = itertools.cycle(range(ticks_per_frame))
+        next(self.animation_ticker)  # the first icon frame is already set
 
+        self.image = None  # backing surface, reused while the contents fit
+        self.respawn_count = player.respawn_count
         self.set_image()
 
+    def advance_icon(self):
+        """Sets the icon to the next frame of the idle animation."""
+        self.icon = self.icon_animation[self.icon_index]
+        self.icon_index = (self.icon_index + 1) % len(self.icon_animation)
+
     def set_image(self):
-        """Generates the image of the scoreboard based on the player attributes."""
+        """Redraws the image of the scoreboard based on the player attributes."""
         # generate the lines of text
-        line_1 = self.font.render(self.player.name, self.color)[0]
-        line_2 = self.font.render("Deaths: {}".format(
-            self.player.respawn_count), self.color)[0]
+        line_1 = render_text(self.font, self.player.name, self.color)
+        line_2 = render_text(self.font, "Deaths: {}".format(
+            self.respawn_count), self.color)
 
         # get the dimensions of the lines
         line_space = 10
@@ -388,9 +278,6 @@ class Scoreboard(Sprite):
         line_1_height = line_1.get_height()
         line_2_height = line_2.get_height()
 
-        # get the next icon frame every 6 ticks for 10 FPS
-        if next(self.animation_ticker) == 0:
-            self.icon = next(self.icon_animation)
         icon_width = self.icon.get_width()
         icon_height = self.icon.get_height()
 
@@ -407,7 +294,16 @@ class Scoreboard(Sprite):
             line_space
         )
 
-        self.image = pygame.Surface((width, height))
+        # only allocate a new surface if the contents no longer fit
+        if self.image is None or width > self.image.get_width() or height > self.image.get_height():
+            self.image = pygame.Surface((width, height))
+            # set colorkey to black for transparency
+            self.image.set_colorkey((0, 0, 0))
+            # set rect
+            self.rect = self.image.get_rect()
+            self.rect.midbottom = self.pos
+        else:
+            self.image.fill((0, 0, 0))
 
         # blits an image of the player on the left side of the scoreboard
         self.image.blit(self.icon, (0, 0))
@@ -417,13 +313,70 @@ class Scoreboard(Sprite):
         # blit line 2 (deaths)
         self.image.blit(line_2, (icon_width, line_1_height + line_space))
 
+    def update(self):
+        """Updates the scoreboard each tick, redrawing it only if something it shows changed."""
+        changed = False
+
+        # get the next icon frame every 3 ticks for 10 FPS
+        if next(self.animation_ticker) == 0:
+            self.advance_icon()
+            changed = True
+
+        if self.player.respawn_count != self.respawn_count:
+            self.respawn_count = self.player.respawn_count
+            changed = True
+
+        if changed:
+            self.set_image()
+            self.dirty = 1
+
+
+class ProfilerOverlay(DirtySprite):
+    """A class for the on-screen overlay showing profiler statistics."""
+
+    def __init__(self, font: pygame.freetype.Font, color: tuple, position: tuple, profiler: object):
+        """
+        Initializes the overlay.
+
+        Parameters:
+        font (pygame.freetype.Font): the font used to display text.
+        color (tuple): a tuple (R,G,B) representing the color of the text.
+        position (tuple): a tuple (x,y) representing the position of the topleft of the overlay.
+        profiler (object): an object with an overlay_lines() method returning the lines to show.
+        """
+        super().__init__()
+        self.font = font
+        self.color = color
+        self.pos = position
+        self.profiler = profiler
+        self.ticker = itertools.cycle(range(settings.PROFILER_OVERLAY_INTERVAL))
+        self.set_image()
+
+    def set_image(self):
+        """Redraws the overlay from the current profiler statistics."""
+        lines = [self.font.render(line, self.color)[0] for line in self.profiler.overlay_lines()]
+        line_space = 4
+        width = max(line.get_width() for line in lines)
+        height = sum(line.get_height() + line_space for line in lines)
+
+        self.image = pygame.Surface((width, height))
+        y = 0
+        for line in lines:
+            self.image.blit(line, (0, y))
+            y += line.get_height() + line_space
         # set colorkey to black for transparency
         self.image.set_colorkey((0, 0, 0))
 
-        # set rect
         self.rect = self.image.get_rect()
-        self.rect.midbottom = self.pos
+        self.rect.topleft = self.pos
+
+    def toggle(self):
+        """Shows the overlay if it is hidden and hides it otherwise."""
+        self.visible = not self.visible
+        self.dirty = 1
 
     def update(self):
-        """Updates the scoreboard each tick."""
-        self.set_image()
+        """Redraws the overlay every few ticks while it is visible."""
+        if next(self.ticker) == 0 and self.visible:
+            self.set_image()
+            self.dirty = 1
@@ -1,17 +1,33 @@
 import pygame
+import assets
 
 
 class Spritesheet:
     """A class for sprite sheets."""
 
-    def __init__(self, surface: pygame.Surface):
+    def __init__(self, surface: pygame.Surface, path: str = None, group: assets.AssetGroup = None):
         """
         Initializes the sprite sheet object.
 
         Parameters:
         surface (pygame.Surface) = surface containing the sprite sheet.
+        path (str): path the sheet was loaded from, used as the cache key for its frames.
+        group (assets.AssetGroup): the asset group cut frames are cached in.
         """
         self.sheet = surface
+        self.path = path
+        self.group = group
+
+    @classmethod
+    def load(cls, path: str, group: assets.AssetGroup) -> "Spritesheet":
+        """
+        Returns a sprite sheet loaded from disk through the asset cache.
+
+        Parameters:
+        path (str): path to the sprite sheet image.
+        group (assets.AssetGroup): the asset group the sheet and its frames are acquired through.
+        """
+        return cls(group.image(path, alpha=True), path, group)
 
     def get_frame(self, rect: pygame.Rect, colorkey: tuple[int] = (0, 0, 0)) -> pygame.Surface:
         """
@@ -33,4 +49,9 @@ class Spritesheet:
         Parameters:
         rects (list[pygame.Rect]): a list containing the location and dimensions of every frame.
         """
-        return [self.get_frame(rect) for rect in rects]
+        if self.group is None or self.path is None:
+            return [self.get_frame(rect) for rect in rects]
+
+        # cut frames are shared by every round that uses this sheet
+        key = ("frames", self.path, tuple(tuple(rect) for rect in rects))
+        return self.group.acquire(key, lambda: [self.get_frame(rect) for rect in rects])
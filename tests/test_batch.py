@@ -0,0 +1,122 @@
+import random
+import numpy as np
+import pytest
+import batch
+import collision
+import hitmasks
+import settings
+import simulation
+
+MOVEMENT = simulation.UP | simulation.DOWN | simulation.LEFT | simulation.RIGHT
+EVERY_BUTTON = MOVEMENT | simulation.SHOOT
+
+
+@pytest.fixture
+def pixel_misses(monkeypatch) -> list:
+    """Records the index of every player whose bounding box touched something its pixels did not."""
+    misses = []
+    touches = simulation.PlayerState.touches
+
+    def recording_touches(player, *args, **kwargs):
+        touched = touches(player, *args, **kwargs)
+        if not touched:
+            misses.append(player.index)
+        return touched
+
+    monkeypatch.setattr(simulation.PlayerState, "touches", recording_touches)
+    return misses
+
+
+def random_inputs(rng: random.Random, buttons: int) -> int:
+    """Returns a random input bitfield of the given buttons, held for about a third of the ticks."""
+    return rng.randrange(32) & buttons if rng.random() < 0.3 else 0
+
+
+def assert_same_players(scalar: simulation.Simulation, vectorized: batch.BatchSimulation, tick: int) -> None:
+    """Asserts that every player of the scalar simulation matches the first match of the batch simulation."""
+    frames = sorted(hitmasks.get_masks())
+    for player, row in zip(scalar.players, vectorized.players[0]):
+        assert (player.x, player.y, player.vel_x, player.vel_y, player.frame,
+                player.standing, player.respawn_count, player.hit_count) == (
+            row["x"], row["y"], row["vel_x"], row["vel_y"], frames[row["frame"]],
+            row["standing"], row["respawn_count"], row["hit_count"]), "players differ at tick {}".format(tick)
+
+
+def agreeing_ticks(seed: int, buttons: int, misses: list, spawns: list = None, ticks: int = 1800) -> int:
+    """
+    Steps a Simulation and a one-match BatchSimulation with the same random inputs, asserting they agree,
+    and returns the number of ticks until a player's box touched something its pixels did not.
+
+    Parameters:
+    seed (int): the seed of the inputs.
+    buttons (int): bitfield of the buttons the players press.
+    misses (list): the pixel_misses fixture.
+    spawns (list): a (spawn_point, direction) tuple for every player.
+    ticks (int): the number of ticks to compare at most.
+    """
+    rng = random.Random(seed)
+    if spawns is None:
+        spawns = settings.PLAYER_SPAWNS[:2]
+    scalar = simulation.Simulation(spawns)
+    vectorized = batch.BatchSimulation(1, spawns)
+    for tick in range(ticks):
+        inputs = [random_inputs(rng, buttons) for _ in spawns]
+        misses.clear()
+        scalar.step(inputs)
+        vectorized.step(np.array([inputs]))
+        if misses:
+            # the batch simulation tests the box only, so the matches may part from here
+            return tick
+        assert_same_players(scalar, vectorized, tick)
+    return ticks
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_movement_matches_simulation_until_pixels_differ(seed, pixel_misses):
+    # players land from their spawns and move around before they reach a platform edge
+    assert agreeing_ticks(seed, MOVEMENT, pixel_misses) > 60
+
+
+def test_frame_boxes_bound_masks():
+    ids, left, top, right, bottom = batch.frame_boxes()
+    for (name, index, facing_left, shooting), mask in hitmasks.get_masks().items():
+        frame = ids[simulation.ANIMATIONS.index(name), index, int(facing_left), int(shooting)]
+        assert (left[frame], top[frame], right[frame], bottom[frame]) == (mask.left, mask.top, mask.right, mask.bottom)
+
+
+def test_sweep_matches_collision_sweep():
+    rng = random.Random(0)
+    for _ in range(2000):
+        # small integers, so boxes often touch exactly at their edges or start inside each other
+        x, y, dx, dy = (rng.randint(-8, 8) for _ in range(4))
+        left, top = rng.randint(-6, 6), rng.randint(-6, 6)
+        box = collision.Box(left, top, left + rng.randint(1, 6), top + rng.randint(1, 6))
+        half_width, half_height = rng.choice((0, 0.5, 1.5)), rng.choice((0, 0.5, 1.5))
+        expected = collision.sweep(x, y, dx, dy, box, half_width, half_height)
+        time = batch.sweep(np.float64(x), np.float64(y), np.float64(dx), np.float64(dy),
+                           box.left - half_width, box.top - half_height,
+                           box.right + half_width, box.bottom + half_height)
+        assert (None if np.isinf(time) else time) == expected, (x, y, dx, dy, left, top, half_width, half_height)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_shooting_matches_simulation_until_pixels_differ(seed, pixel_misses):
+    assert agreeing_ticks(seed, EVERY_BUTTON, pixel_misses) > 60
+
+
+def test_duel_matches_simulation(pixel_misses):
+    # two players face each other on the widest platform; the left one runs right, firing every
+    # few ticks, and knocks the other towards the edge
+    spawns = [((settings.WIDTH / 2 - 150, settings.HEIGHT - 200), "right"),
+              ((settings.WIDTH / 2 + 150, settings.HEIGHT - 200), "left")]
+    scalar = simulation.Simulation(spawns)
+    vectorized = batch.BatchSimulation(1, spawns)
+    for tick in range(300):
+        inputs = [0, 0]
+        if tick > 60:
+            inputs[0] = simulation.RIGHT | (simulation.SHOOT if tick % 8 == 0 else 0)
+        scalar.step(inputs)
+        vectorized.step(np.array([inputs]))
+        assert_same_players(scalar, vectorized, tick)
+    assert not pixel_misses
+    assert scalar.players[1].hit_count > 0
@@ -0,0 +1,30 @@
+import collision
+
+
+def test_sweep_catches_point_passing_through_thin_box():
+    box = collision.Box(10, 0, 12, 10)
+    # starts left of the box and ends right of it, never inside at either end
+    assert collision.sweep(0, 5, 30, 0, box) == 10 / 30
+
+
+def test_sweep_touching_edge_is_not_a_hit():
+    box = collision.Box(10, 0, 20, 10)
+    # slides along the top edge, and stops exactly at the left edge
+    assert collision.sweep(0, 0, 30, 0, box) is None
+    assert collision.sweep(0, 5, 10, 0, box) is None
+
+
+def test_sweep_starting_inside_hits_at_once():
+    box = collision.Box(10, 0, 20, 10)
+    assert collision.sweep(15, 5, 30, 0, box) == 0
+
+
+def test_sweep_expands_box_by_half_size():
+    box = collision.Box(10, 0, 20, 10)
+    assert collision.sweep(0, 5, 20, 0, box, half_width=2) == 8 / 20
+    assert collision.sweep(5, -3, 0, 10, box, half_width=5.5, half_height=2) == 1 / 10
+
+
+def test_boxes_sharing_an_edge_do_not_overlap():
+    assert not collision.Box(0, 0, 10, 10).overlaps(collision.Box(10, 0, 20, 10))
+    assert collision.Box(0, 0, 10, 10).overlaps(collision.Box(9, 9, 20, 20))
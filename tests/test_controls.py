@@ -0,0 +1,53 @@
+import pygame
+import pytest
+import controls
+import simulation
+
+
+@pytest.fixture
+def input_state() -> controls.InputState:
+    """Returns the InputState of two keyboard players, the first on the arrows and the second on WASD."""
+    pygame.joystick.init()
+    return controls.InputState([controls.KEYBOARD_CONTROLS["arrows"], controls.KEYBOARD_CONTROLS["wasd"]])
+
+
+def key_event(event_type: int, layout: str, bit: int) -> pygame.event.Event:
+    """Returns a key event for the key of layout bound to bit."""
+    key = next(key for key, key_bit in controls.KEYBOARD_CONTROLS[layout].bindings() if key_bit == bit)
+    return pygame.event.Event(event_type, key=key)
+
+
+def test_keys_go_to_their_player(input_state):
+    assert input_state.handle_event(key_event(pygame.KEYDOWN, "wasd", simulation.LEFT))
+    assert input_state.handle_event(key_event(pygame.KEYDOWN, "arrows", simulation.UP))
+    assert input_state.snapshot() == [simulation.UP, simulation.LEFT]
+
+
+def test_unbound_keys_are_ignored(input_state):
+    assert not input_state.handle_event(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_F12))
+    assert not input_state.handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=(0, 0)))
+    assert input_state.snapshot() == [0, 0]
+
+
+def test_held_keys_last_until_released(input_state):
+    input_state.handle_event(key_event(pygame.KEYDOWN, "arrows", simulation.RIGHT))
+    assert input_state.snapshot() == [simulation.RIGHT, 0]
+    assert input_state.snapshot() == [simulation.RIGHT, 0]
+    input_state.handle_event(key_event(pygame.KEYUP, "arrows", simulation.RIGHT))
+    assert input_state.snapshot() == [0, 0]
+
+
+def test_taps_reach_one_snapshot(input_state):
+    # pressed and released between two ticks
+    input_state.handle_event(key_event(pygame.KEYDOWN, "wasd", simulation.UP))
+    input_state.handle_event(key_event(pygame.KEYUP, "wasd", simulation.UP))
+    input_state.handle_event(key_event(pygame.KEYDOWN, "wasd", simulation.SHOOT))
+    assert input_state.snapshot() == [0, simulation.UP | simulation.SHOOT]
+    # shooting takes one press per shot, even while the key is held
+    assert input_state.snapshot() == [0, 0]
+
+
+def test_key_bound_twice_is_rejected():
+    pygame.joystick.init()
+    with pytest.raises(ValueError):
+        controls.InputState([controls.KEYBOARD_CONTROLS["arrows"], controls.KEYBOARD_CONTROLS["arrows"]])
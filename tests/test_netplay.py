@@ -0,0 +1,37 @@
+import time
+import netplay
+import simulation
+
+
+def connect_peers() -> tuple:
+    """Returns two Connection objects sending to each other over the loopback interface."""
+    first = netplay.Connection(("127.0.0.1", 0), None)
+    second = netplay.Connection(("127.0.0.1", 0), None)
+    first.remote_address = second.socket.getsockname()
+    second.remote_address = first.socket.getsockname()
+    return first, second
+
+
+def test_tap_during_stall_is_simulated():
+    first, second = connect_peers()
+    try:
+        session = netplay.RollbackSession(simulation.Simulation(), 0, first, input_delay=2)
+        peer = netplay.RollbackSession(simulation.Simulation(), 1, second, input_delay=2)
+        # the peer has not answered yet, so the session stalls on its first tick
+        assert session.advance(0) is None
+        assert session.advance(simulation.SHOOT) is None
+
+        peer.advance(0)
+        deadline = time.monotonic() + 5
+        events = None
+        while events is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+            events = session.advance(0)
+        assert events is not None
+        # the input of the stalled tick was sent before the tap, so the tap goes to the next tick
+        session.advance(0)
+        assert session.local_inputs[2] == 0
+        assert session.local_inputs[3] == simulation.SHOOT
+    finally:
+        first.close()
+        second.close()
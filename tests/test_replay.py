@@ -0,0 +1,58 @@
+import random
+import pytest
+import replay
+import settings
+import simulation
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 16383, 16384, 2 ** 32 - 1, 2 ** 63])
+def test_varint_round_trip(value):
+    buffer = bytearray(b"\xff")
+    replay.write_varint(buffer, value)
+    assert replay.read_varint(bytes(buffer), 1) == (value, len(buffer))
+    assert len(buffer) - 1 == max(1, -(-value.bit_length() // 7))
+
+
+def test_replay_round_trip():
+    rng = random.Random(0)
+    recording = replay.Replay(3)
+    for _ in range(2000):
+        # inputs are held for a while, like real ones, with runs longer than a varint byte
+        inputs = [rng.randrange(32) for _ in range(3)]
+        for _ in range(rng.choice((1, 2, 50, 200))):
+            recording.record(inputs)
+
+    decoded = replay.Replay.from_bytes(recording.to_bytes())
+    assert decoded.inputs == recording.inputs
+    assert (decoded.player_count, decoded.tick_rate, decoded.fingerprint) == (3, settings.FPS, recording.fingerprint)
+
+
+def test_replay_runs_are_compact():
+    recording = replay.Replay(2, [(simulation.LEFT, 0)] * 10000 + [(0, 0)] * 10000)
+    assert len(recording.to_bytes()) < replay.HEADER.size + 16
+
+
+def test_replay_rejects_other_files():
+    data = bytearray(replay.Replay(2, [(0, 0)]).to_bytes())
+    data[0] ^= 0xFF
+    with pytest.raises(ValueError):
+        replay.Replay.from_bytes(bytes(data))
+
+
+def test_replay_plays_back_the_match():
+    rng = random.Random(1)
+    sim = simulation.Simulation()
+    recording = replay.Replay(2)
+    for _ in range(600):
+        inputs = [rng.randrange(32) if rng.random() < 0.3 else 0 for _ in range(2)]
+        recording.record(inputs)
+        sim.step(inputs)
+
+    player = replay.ReplayPlayer(replay.Replay.from_bytes(recording.to_bytes()))
+    player.run()
+    assert player.simulation.save_state() == sim.save_state()
+
+    # seeking back replays to the same state
+    player.seek(250)
+    player.run()
+    assert player.simulation.save_state() == sim.save_state()
@@ -0,0 +1,21 @@
+import random
+import server
+import settings
+import simulation
+
+
+def test_snapshot_round_trip():
+    rng = random.Random(0)
+    sim = simulation.Simulation(settings.PLAYER_SPAWNS[:4])
+    states = []
+    for _ in range(300):
+        sim.step([rng.randrange(32) for _ in range(4)])
+        states.append(sim.save_state())
+
+    full = server.encode_state(states[-1])
+    assert server.decode_state(full) == states[-1]
+    # a recent baseline leaves few changed bytes, an old one many
+    for baseline in (states[-2], states[-30], states[0]):
+        delta = server.encode_state(states[-1], baseline)
+        assert server.decode_state(delta, baseline) == states[-1]
+    assert len(server.encode_state(states[-1], states[-2])) < len(full)
@@ -0,0 +1,143 @@
+import random
+import pytest
+import collision
+import hitmasks
+import settings
+import simulation
+
+# the widest platform, which the players of these tests land on
+PLATFORM = ((settings.WIDTH / 2, settings.HEIGHT - 100), 16)
+
+
+def random_match(seed: int, ticks: int, player_count: int = 2) -> tuple:
+    """
+    Returns (simulation, rng) after ticks of random inputs, so the state has moving players and live bullets.
+
+    Parameters:
+    seed (int): the seed of the inputs.
+    ticks (int): the number of ticks to play.
+    player_count (int): the number of players.
+    """
+    rng = random.Random(seed)
+    sim = simulation.Simulation(settings.PLAYER_SPAWNS[:player_count])
+    for _ in range(ticks):
+        sim.step([rng.randrange(32) for _ in range(player_count)])
+    return sim, rng
+
+
+def landed(sim: simulation.Simulation) -> simulation.Simulation:
+    """Returns sim after its players fell from their spawns onto the platforms below."""
+    for _ in range(120):
+        sim.step([0] * len(sim.players))
+    assert all(player.standing for player in sim.players)
+    return sim
+
+
+@pytest.mark.parametrize("player_count", [2, 5])
+def test_state_round_trip(player_count):
+    sim, rng = random_match(0, 300, player_count)
+    state = sim.save_state()
+    restored = simulation.Simulation(settings.PLAYER_SPAWNS[:player_count])
+    restored.load_state(state)
+    assert restored.save_state() == state
+
+    # both continue identically from the restored state
+    for _ in range(300):
+        inputs = [rng.randrange(32) for _ in range(player_count)]
+        assert restored.step(inputs) == sim.step(inputs)
+    assert restored.save_state() == sim.save_state()
+
+
+def test_load_state_rejects_other_player_count():
+    state = simulation.Simulation(settings.PLAYER_SPAWNS[:2]).save_state()
+    with pytest.raises(ValueError):
+        simulation.Simulation(settings.PLAYER_SPAWNS[:3]).load_state(state)
+
+
+def test_tunnelling_bullet_hits():
+    spawns = [((PLATFORM[0][0] - 150, 0), "right"), ((PLATFORM[0][0] + 150, 0), "left")]
+    sim = landed(simulation.Simulation(spawns, [PLATFORM]))
+    target = sim.players[1]
+    hitbox = target.hitbox()
+    # a bullet fast enough to start in front of the player and end behind it within one tick
+    x = hitbox.left - 40
+    y = target.y + settings.BULLET_OFFSET_Y
+    speed = hitbox.right - hitbox.left + 80
+    assert x + speed - settings.BULLET_WIDTH / 2 > hitbox.right
+    sim.bullets.spawn(x, y, speed, 0)
+
+    events = sim.step([0, 0])
+    assert ("hit", 1) in events
+    assert target.hit_count == 1
+    assert len(sim.bullets) == 0
+
+
+def test_own_bullet_passes_through_shooter():
+    spawns = [((PLATFORM[0][0], 0), "right")]
+    sim = landed(simulation.Simulation(spawns, [PLATFORM]))
+    events = sim.step([simulation.SHOOT])
+    assert ("hit", 0) not in events
+    assert len(sim.bullets) == 1
+
+
+def test_landing_exactly_on_platform_top():
+    platform = simulation.PlatformState(*PLATFORM)
+    sim = simulation.Simulation([((PLATFORM[0][0], 0), "right")], [PLATFORM])
+    player = sim.players[0]
+    # the lowest opaque pixel just touches the top of the platform, without overlapping it
+    player.y = platform.box.top - hitmasks.get_masks()[player.frame].bottom
+    assert player.hitbox().bottom == platform.box.top
+
+    for _ in range(60):
+        sim.step([0])
+    assert player.standing
+    assert player.y == platform.box.top + settings.PLAYER_OFFSET
+    assert player.vel_y == 0
+
+
+def test_fast_fall_lands_on_thin_platform():
+    platform = simulation.PlatformState(*PLATFORM)
+    sim = simulation.Simulation([((PLATFORM[0][0], 0), "right")], [PLATFORM])
+    player = sim.players[0]
+    # falls further than the platform is thick within one tick
+    player.y = platform.box.top - 20
+    player.vel_y = 3 * settings.PLATFORM_TILE_HEIGHT
+    sim.step([0])
+    assert player.standing
+    assert player.y == platform.box.top + settings.PLAYER_OFFSET
+
+
+def test_mirrored_masks():
+    masks = hitmasks.get_masks()
+    for (name, index, facing_left, shooting), left_mask in masks.items():
+        if not facing_left:
+            continue
+        right_mask = masks[(name, index, False, shooting)]
+        width, height = right_mask.width, right_mask.height
+        assert left_mask.mask.get_size() == (width, height)
+        assert all(left_mask.mask.get_at((width - 1 - x, y)) == right_mask.mask.get_at((x, y))
+                   for x in range(width) for y in range(height))
+        # the box of the opaque pixels mirrors around the player's position
+        assert (left_mask.left, left_mask.right) == (-right_mask.right, -right_mask.left)
+        assert (left_mask.top, left_mask.bottom) == (right_mask.top, right_mask.bottom)
+
+
+def test_mirrored_player_touches_mirrored_boxes():
+    player = simulation.PlayerState(0, (640, 400), "right")
+    facing_right = player.frame
+    player.direction = "left"
+    player.set_frame(facing_right[0], facing_right[1])
+    facing_left = player.frame
+    rng = random.Random(0)
+    outcomes = set()
+    for _ in range(500):
+        left, top = rng.randint(600, 680), rng.randint(340, 410)
+        box = collision.Box(left, top, left + rng.randint(1, 8), top + rng.randint(1, 8))
+        mirrored = collision.Box(2 * player.x - box.right, box.top, 2 * player.x - box.left, box.bottom)
+        player.frame = facing_right
+        touches = player.touches(box)
+        player.frame = facing_left
+        assert player.touches(mirrored) == touches
+        outcomes.add(touches)
+    assert outcomes == {False, True}
+
@@ -0,0 +1,232 @@
+# Tournament and balance sweep runner. Plays headless matches between bots for every
+# combination of settings overrides and bot pairing, spread over a process pool, and
+# prints a table of the results. Every match is seeded from its position in the sweep,
+# so a sweep gives the same results however many workers play it.
+#     python tournament.py --set GUN_RECOIL=6,8,10 --set PLAYER_FRICTION=-0.2,-0.25 --pair aim_bot,recoil_bot
+#     python tournament.py --round-robin --matches 20 --output results.csv
+
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import csv
+import itertools
+import os
+import time
+import settings
+import simulation
+import bots
+import navigation
+
+# settings a sweep may override; the simulation and bots read them while they run
+SWEEP_SETTINGS = ("GUN_RECOIL", "KNOCKBACK_MULTIPLIER", "PLAYER_FRICTION", "PLAYER_JUMP_HEIGHT")
+
+
+@contextlib.contextmanager
+def override_settings(overrides: dict):
+    """Sets settings for the duration of the with block; pool workers play many matches in turn."""
+    originals = {name: getattr(settings, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(settings, name, value)
+
+
+def play_match(match: dict) -> dict:
+    """
+    Plays one match between bots and returns its result.
+
+    Parameters:
+    match (dict): the match's "id", "bots" (one bot name per player, in spawn order),
+        "overrides" (setting name -> value), "seed" and "ticks" (the longest the match may last).
+    """
+    with override_settings(match["overrides"]):
+        bot_names = match["bots"]
+        sim = simulation.Simulation(settings.PLAYER_SPAWNS[:len(bot_names)])
+        players = [bots.create_bot(name, match["seed"] * len(bot_names) + index)
+                   for index, name in enumerate(bot_names)]
+        for index, bot in enumerate(players):
+            bot.attach(sim, index)
+
+        hits = 0
+        start = time.perf_counter()
+        while sim.tick < match["ticks"]:
+            for name, player_index in sim.step([bot.get_input() for bot in players]):
+                if name == "hit":
+                    hits += 1
+            if any(player.respawn_count >= settings.TOURNAMENT_DEATHS for player in sim.players):
+                break
+        duration = time.perf_counter() - start
+
+    deaths = [player.respawn_count for player in sim.players]
+    fewest = min(deaths)
+    winner = deaths.index(fewest) if deaths.count(fewest) == 1 else None
+    return {
+        "id": match["id"],
+        "bots": bot_names,
+        "overrides": match["overrides"],
+        "seed": match["seed"],
+        "ticks": sim.tick,
+        "deaths": deaths,
+        "hits_taken": [player.hit_count for player in sim.players],
+        "hits": hits,
+        "winner": winner,
+        "seconds": duration
+    }
+
+
+def parse_override(text: str) -> tuple:
+    """Returns (setting name, list of values) from "NAME=value,value,..."."""
+    name, _, values = text.partition("=")
+    name = name.strip().upper()
+    if name not in SWEEP_SETTINGS:
+        raise argparse.ArgumentTypeError("{} is not one of {}".format(name, ", ".join(SWEEP_SETTINGS)))
+    try:
+        return name, [float(value) for value in values.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError("values of {} must be numbers".format(name))
+
+
+def parse_pairing(text: str) -> tuple:
+    """Returns the bot names of a comma-separated pairing, e.g. "aim_bot,recoil_bot"."""
+    names = tuple(name.strip() for name in text.split(","))
+    unknown = [name for name in names if name not in bots.BOTS]
+    if unknown:
+        raise argparse.ArgumentTypeError("unknown bots: {}".format(", ".join(unknown)))
+    if not 2 <= len(names) <= settings.MAX_PLAYERS:
+        raise argparse.ArgumentTypeError("a pairing has 2 to {} bots".format(settings.MAX_PLAYERS))
+    return names
+
+
+def build_matches(overrides: list[tuple], pairings: list[tuple], repeats: int, seed: int, ticks: int) -> list[dict]:
+    """
+    Returns every match of the sweep in a fixed order.
+
+    Parameters:
+    overrides (list[tuple]): a (setting name, values) pair for every swept setting.
+    pairings (list[tuple]): the bot names of every pairing.
+    repeats (int): the number of matches per combination; players swap spawn points between repeats.
+    seed (int): the seed of the sweep.
+    ticks (int): the longest a match may last.
+    """
+    names = [name for name, values in overrides]
+    grid = [dict(zip(names, combination)) for combination in itertools.product(*(values for _, values in overrides))]
+    matches = []
+    for combination in grid:
+        for pairing in pairings:
+            for repeat in range(repeats):
+                # rotating the pairing puts every bot on every spawn point in turn
+                shift = repeat % len(pairing)
+                matches.append({
+                    "id": len(matches),
+                    "bots": pairing[shift:] + pairing[:shift],
+                    "overrides": combination,
+                    "seed": seed + len(matches),
+                    "ticks": ticks
+                })
+    return matches
+
+
+def aggregate(results: list[dict]) -> dict:
+    """Returns the totals of every (overrides, bot) combination, keyed in a stable order."""
+    totals = collections.defaultdict(collections.Counter)
+    for result in sorted(results, key=lambda result: result["id"]):
+        key_overrides = tuple(sorted(result["overrides"].items()))
+        for index, name in enumerate(result["bots"]):
+            total = totals[(key_overrides, name)]
+            total["matches"] += 1
+            total["wins"] += result["winner"] == index
+            total["deaths"] += result["deaths"][index]
+            total["hits_taken"] += result["hits_taken"][index]
+            total["ticks"] += result["ticks"]
+    return totals
+
+
+def print_table(totals: dict) -> None:
+    """Prints the aggregated results, one row per settings combination and bot."""
+    print("{:<50} {:<12} {:>7} {:>6} {:>7} {:>7} {:>9}".format(
+        "overrides", "bot", "matches", "wins", "deaths", "hits", "length"))
+    for (overrides, name), total in totals.items():
+        matches = total["matches"]
+        label = " ".join("{}={:g}".format(setting, value) for setting, value in overrides) or "defaults"
+        print("{:<50} {:<12} {:>7} {:>5.0%} {:>7.2f} {:>7.2f} {:>8.1f}s".format(
+            label, name, matches, total["wins"] / matches, total["deaths"] / matches,
+            total["hits_taken"] / matches, total["ticks"] / matches / settings.FPS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays headless bot matches over a grid of settings on every core.")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], type=parse_override,
+                        metavar="NAME=V1,V2", help="a setting and the values to sweep; repeat for a grid")
+    parser.add_argument("--pair", dest="pairings", action="append", default=[], type=parse_pairing,
+                        metavar="BOT,BOT", help="bots playing each other; repeat for more pairings")
+    parser.add_argument("--round-robin", action="store_true", help="pair every bot with every bot, itself included")
+    parser.add_argument("--matches", type=int, default=10, help="matches per settings combination and pairing")
+    parser.add_argument("--ticks", type=int, default=settings.TOURNAMENT_MATCH_TICKS, help="longest match in ticks")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the sweep")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--output", help="CSV file every match result is streamed to")
+    arguments = parser.parse_args()
+
+    pairings = list(arguments.pairings)
+    if arguments.round_robin:
+        pairings += list(itertools.combinations_with_replacement(sorted(bots.BOTS), 2))
+    if not pairings:
+        pairings = [("aim_bot", "aim_bot")]
+    matches = build_matches(arguments.overrides, pairings, arguments.matches, arguments.seed, arguments.ticks)
+    # build the navigation graph of every combination once, instead of in every worker at the same time
+    for overrides in {tuple(sorted(match["overrides"].items())) for match in matches}:
+        with override_settings(dict(overrides)):
+            navigation.get_graph()
+
+    results = []
+    writer = None
+    output = open(arguments.output, "w", newline="") if arguments.output else contextlib.nullcontext()
+    start = time.perf_counter()
+    with output, concurrent.futures.ProcessPoolExecutor(arguments.workers) as executor:
+        if arguments.output:
+            writer = csv.writer(output)
+            writer.writerow(["id", "seed", "overrides", "bots", "ticks", "deaths", "hits_taken", "hits", "winner"])
+        # rows are written in id order so the file does not depend on the worker count; at most
+        # window matches are in flight, which bounds the finished rows waiting for an earlier one
+        window = arguments.workers * settings.TOURNAMENT_REORDER_WINDOW
+        queued = iter(matches)
+        running = set()
+        finished = {}  # id -> result waiting for the rows before it
+        next_id = 0
+        while True:
+            for match in itertools.islice(queued, window - len(running) - len(finished)):
+                running.add(executor.submit(play_match, match))
+            if not running:
+                break
+            done, running = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                results.append(result)
+                finished[result["id"]] = result
+            while next_id in finished:
+                result = finished.pop(next_id)
+                next_id += 1
+                if writer:
+                    writer.writerow([result["id"], result["seed"],
+                                     " ".join("{}={:g}".format(*item) for item in sorted(result["overrides"].items())),
+                                     " ".join(result["bots"]), result["ticks"],
+                                     " ".join(map(str, result["deaths"])), " ".join(map(str, result["hits_taken"])),
+                                     result["hits"], "" if result["winner"] is None else result["winner"]])
+            if writer:
+                output.flush()
+            print("\rplayed {}/{} matches".format(len(results), len(matches)), end="", flush=True)
+    elapsed = time.perf_counter() - start
+
+    simulated = sum(result["ticks"] for result in results)
+    print("\rplayed {} matches, {:.0f} minutes of play, in {:.1f} s on {} workers ({:.0f}x real time)".format(
+        len(results), simulated / settings.FPS / 60, elapsed, arguments.workers,
+        simulated / settings.FPS / elapsed))
+    print_table(aggregate(results))
+
+
+if __name__ == "__main__":
+    main()